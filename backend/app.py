@@ -1,9 +1,13 @@
 # Flask backend for LLM-Powered Cognitive Interview Assistant
 import os
+import re
+import threading
 import time
+import uuid
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_required, current_user
@@ -29,15 +33,24 @@ app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', 'dev-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///interview_assistant.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['FACE_BATCH_MAX_FRAMES'] = int(os.environ.get('FACE_BATCH_MAX_FRAMES', '32'))
+# 'interactive' scores each interview right away; 'batch' collects feedback
+# prompts into Gemini batch jobs (cheaper, results can take minutes or longer)
+app.config['FEEDBACK_LLM_MODE'] = os.environ.get('FEEDBACK_LLM_MODE', 'interactive')
+app.config['FEEDBACK_BATCH_SIZE'] = int(os.environ.get('FEEDBACK_BATCH_SIZE', '50'))
+app.config['FEEDBACK_BATCH_WAIT_SECONDS'] = float(os.environ.get('FEEDBACK_BATCH_WAIT_SECONDS', '300'))
 
 # Create upload folder
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Import models and auth blueprint first
-from models import User, InterviewSession, db
+from models import User, InterviewSession, InterviewAnswer, ResumeAnalysisJob, db
+import background
+import llm_gateway
 
 # Initialize extensions
 db.init_app(app)
+background.init_app(app)
 CORS(app, supports_credentials=True, origins=['http://localhost:3000'])
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -72,6 +85,21 @@ def serve_react_app(path):
 def health_check():
     return jsonify({"status": "healthy", "message": "Interview Assistant Backend Running"})
 
+def format_resume_analysis(analysis, filename):
+    """Shape an analyze_resume_file result for the upload/status responses"""
+    return {
+        "message": "Resume uploaded and analyzed successfully",
+        "filename": filename,
+        "analysis": {
+            "technical_skills": analysis['technical_skills'][:10],  # Top 10 for display
+            "soft_skills": analysis['soft_skills'][:8],
+            "projects": analysis['projects'][:5],
+            "experience_level": analysis['experience_level'],
+            "summary": analysis['summary']
+        },
+        "keywords": analysis['keywords']  # For backward compatibility
+    }
+
 @app.route('/api/upload-resume', methods=['POST'])
 @login_required
 def upload_resume():
@@ -87,28 +115,42 @@ def upload_resume():
         # Add user ID to filename to avoid conflicts
         unique_filename = f"{current_user.id}_{int(time.time())}_{filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        file_bytes = file.read()
+        with open(filepath, 'wb') as out:
+            out.write(file_bytes)
         
+        content_hash = None
         try:
-            # Use new resume analyzer
-            from resume_analyzer import analyze_resume_file
-            analysis = analyze_resume_file(filepath, os.environ.get('GEMINI_API_KEY'))
+            from resume_cache import hash_resume_bytes, get_cached_analysis
+            
+            # Identical PDFs (e.g. retried interviews) are served from the cache
+            # before any parsing or LLM work happens
+            content_hash = hash_resume_bytes(file_bytes)
+            analysis = get_cached_analysis(content_hash)
+            if analysis is not None:
+                response = format_resume_analysis(analysis, unique_filename)
+                response["status"] = "completed"
+                return jsonify(response)
+        except Exception as e:
+            print(f"Error reading resume analysis cache: {e}")
+        
+        try:
+            # Parsing and the Gemini call run on the background pool; the
+            # client polls /api/resume-analysis/<job_id> for the result
+            from resume_jobs import enqueue_resume_analysis
+            job = enqueue_resume_analysis(current_user.id, unique_filename, filepath, content_hash)
             
             return jsonify({
-                "message": "Resume uploaded and analyzed successfully",
+                "message": "Resume uploaded, analysis in progress",
                 "filename": unique_filename,
-                "analysis": {
-                    "technical_skills": analysis['technical_skills'][:10],  # Top 10 for display
-                    "soft_skills": analysis['soft_skills'][:8],
-                    "projects": analysis['projects'][:5],
-                    "experience_level": analysis['experience_level'],
-                    "summary": analysis['summary']
-                },
-                "keywords": analysis['keywords']  # For backward compatibility
-            })
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/resume-analysis/{job.id}"
+            }), 202
         except Exception as e:
-            print(f"Error analyzing resume: {e}")
+            print(f"Error queueing resume analysis: {e}")
             # Fallback to basic keyword extraction
+            from resume_jobs import extract_resume_keywords
             keywords = extract_resume_keywords(filepath)
             return jsonify({
                 "message": "Resume uploaded successfully",
@@ -119,6 +161,97 @@ def upload_resume():
     
     return jsonify({"error": "Invalid file format. Please upload a PDF."}), 400
 
+@app.route('/api/resume-analysis/<job_id>')
+@login_required
+def resume_analysis_status(job_id):
+    """Report progress and, once finished, the result of a resume analysis job"""
+    job = ResumeAnalysisJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"error": "Analysis job not found"}), 404
+    
+    status = {
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress or 0,
+        "filename": job.filename
+    }
+    
+    if job.status == 'completed':
+        status.update(format_resume_analysis(json.loads(job.result), job.filename))
+    elif job.status == 'failed':
+        # Basic keyword extraction, done once when the job failed
+        status.update({
+            "message": "Resume uploaded successfully",
+            "keywords": json.loads(job.fallback_keywords) if job.fallback_keywords else [],
+            "note": "Basic analysis used due to processing error"
+        })
+    
+    return jsonify(status)
+
+@app.route('/api/resumes/batch', methods=['POST'])
+@login_required
+def screen_resume_batch():
+    """
+    Analyze a zip archive of PDF resumes, streaming one JSON line per resume
+    
+    Upload the archive as 'archive'. The response is newline-delimited JSON
+    in completion order, ending with a {"summary": ...} line that reports
+    throughput. Results are also kept server-side; posting 'batch_id'
+    (without an archive) resumes an interrupted batch, skipping resumes
+    already analyzed, and GET /api/resumes/batch/<batch_id> returns them.
+    """
+    from resume_batch import BatchScreening, batch_slots
+    
+    batch_id = request.form.get('batch_id') or uuid.uuid4().hex
+    if not re.fullmatch(r'[0-9a-f]{32}', batch_id):
+        return jsonify({"error": "Invalid batch id"}), 400
+    batch_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'batches', f"{current_user.id}_{batch_id}")
+    archive_path = os.path.join(batch_dir, 'archive.zip')
+    
+    upload = request.files.get('archive')
+    if upload and upload.filename:
+        if not upload.filename.lower().endswith('.zip'):
+            return jsonify({"error": "Invalid file format. Please upload a .zip archive of PDFs."}), 400
+        os.makedirs(batch_dir, exist_ok=True)
+        upload.save(archive_path)
+    elif not os.path.exists(archive_path):
+        return jsonify({"error": "No resume archive provided"}), 400
+    
+    if not batch_slots.acquire(blocking=False):
+        return jsonify({"error": "A resume batch is already running, try again shortly"}), 503
+    
+    batch = BatchScreening(archive_path, os.path.join(batch_dir, 'results.jsonl'))
+    
+    def lines():
+        try:
+            yield json.dumps({"batch_id": batch_id}) + "\n"
+            for record in batch:
+                yield json.dumps(record) + "\n"
+            yield json.dumps({"summary": batch.summary()}) + "\n"
+        except Exception as e:
+            print(f"Error screening resume batch {batch_id}: {e}")
+            yield json.dumps({"error": "Batch screening failed", "batch_id": batch_id}) + "\n"
+    
+    response = Response(lines(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs even if the client disconnects before the stream starts
+    response.call_on_close(batch_slots.release)
+    return response
+
+@app.route('/api/resumes/batch/<batch_id>')
+@login_required
+def resume_batch_results(batch_id):
+    """All results recorded so far for a resume batch, as JSONL"""
+    if not re.fullmatch(r'[0-9a-f]{32}', batch_id):
+        return jsonify({"error": "Batch not found"}), 404
+    batch_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'batches', f"{current_user.id}_{batch_id}")
+    if not os.path.exists(os.path.join(batch_dir, 'results.jsonl')):
+        return jsonify({"error": "Batch not found"}), 404
+    return send_from_directory(os.path.abspath(batch_dir), 'results.jsonl', mimetype='application/x-ndjson')
+
 @app.route('/api/generate-questions', methods=['POST'])
 @login_required
 def generate_questions():
@@ -156,16 +289,25 @@ def generate_questions():
             from gemini import client
             from question_generator import QuestionGenerator
             
-            qg = QuestionGenerator(client)
+            qg = QuestionGenerator(client, user_id=current_user.id)
             questions = qg.generate_resume_based_questions(
                 technical_skills=analysis.get('technical_skills', []),
                 soft_skills=analysis.get('soft_skills', []),
                 projects=analysis.get('projects', []),
                 difficulty=difficulty
             )
+            if qg.failed_categories:
+                print(f"Partial question set generated, missing: {qg.failed_categories}")
         else:
-            # Use existing logic for role-based interviews
-            questions = generate_interview_questions(mode, difficulty, role, keywords)
+            # Role-mode questions come from the pre-generated bank when it has
+            # enough unseen ones for this user; otherwise ask Gemini
+            banked = None
+            if mode == 'role':
+                import question_bank
+                banked = question_bank.draw_questions(current_user.id, role, difficulty)
+            questions = banked.questions if banked else generate_interview_questions(
+                mode, difficulty, role, keywords, user_id=current_user.id
+            )
         
         # Check if questions were generated successfully
         if "error" in questions:
@@ -177,6 +319,9 @@ def generate_questions():
         # Store questions and commit
         session.questions = json.dumps(questions)
         db.session.add(session)
+        if mode == 'role':
+            db.session.flush()
+            bank_questions(session, questions, banked)
         db.session.commit()
 
         return jsonify({
@@ -184,10 +329,136 @@ def generate_questions():
             "questions": questions
         })
         
+    except llm_gateway.LLMUnavailableError as e:
+        print(f"Gemini unavailable while generating questions: {e}")
+        return jsonify({"error": "The AI service is temporarily overloaded. Please try again in a few minutes."}), 503
     except Exception as e:
         print(f"Error generating questions: {e}")
         return jsonify({"error": "An error occurred while generating questions. Please try again."}), 500
 
+def bank_questions(session, questions, banked=None):
+    """Mark a role-mode session's questions as served, banking freshly generated ones"""
+    try:
+        import question_bank
+        # Savepoint: a bank failure must not take the session row down with it
+        with db.session.begin_nested():
+            if banked is not None:
+                question_ids = banked.question_ids
+            else:
+                question_ids = question_bank.add_questions(session.role, session.difficulty, questions)
+            question_bank.mark_served(session.user_id, question_ids, session.id)
+    except Exception as e:
+        # The interview itself must not fail because of the bank
+        print(f"Error updating question bank: {e}")
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/generate-questions/stream', methods=['POST'])
+@login_required
+def generate_questions_stream():
+    """
+    Streaming variant of /api/generate-questions using Server-Sent Events
+    
+    Emits a 'session' event as soon as the interview row exists, one
+    'question' event per parsed question (persisted immediately), then 'done'
+    with the full question set, or 'error' if generation fails.
+    """
+    data = request.json or {}
+    mode = data.get('mode')
+    difficulty = data.get('difficulty')
+    role = data.get('role', '')
+    keywords = data.get('keywords', [])
+    analysis = data.get('analysis', {})
+    
+    user_id = current_user.id
+    from gemini import client
+    from question_generator import QuestionGenerator
+    qg = QuestionGenerator(client, user_id=user_id)
+    
+    session = InterviewSession()
+    session.user_id = user_id
+    session.mode = mode
+    session.difficulty = difficulty
+    session.role = role
+    session.status = 'active'
+    session.questions = json.dumps({})
+    
+    if mode == 'resume' and analysis:
+        session.resume_filename = data.get('filename', '')
+        session.technical_skills = json.dumps(analysis.get('technical_skills', []))
+        session.soft_skills = json.dumps(analysis.get('soft_skills', []))
+        session.projects = json.dumps(analysis.get('projects', []))
+        session.experience_level = analysis.get('experience_level', 'entry')
+        session.resume_summary = analysis.get('summary', '')
+        question_stream = qg.stream_resume_based_questions(
+            technical_skills=analysis.get('technical_skills', []),
+            soft_skills=analysis.get('soft_skills', []),
+            projects=analysis.get('projects', []),
+            difficulty=difficulty
+        )
+    else:
+        if mode == 'resume':
+            context = f"Skills/keywords from the candidate's resume: {', '.join(keywords)}"
+        else:
+            context = f"The interview is for a {role} position; tailor every question to {role} responsibilities."
+        question_stream = qg.stream_questions(context, {
+            'hr_questions': "exactly 3 behavioral/HR questions assessing soft skills and cultural fit",
+            'technical_questions': "exactly 4 technical questions testing the core competencies" + (f" of a {role}" if role else ""),
+            'cultural_questions': "exactly 3 situational questions testing problem-solving and experience",
+        }, difficulty)
+    
+    db.session.add(session)
+    db.session.commit()
+    session_id = session.id
+    
+    @stream_with_context
+    def events():
+        # The request's ORM session is torn down once the view returns, so the
+        # generator works with a freshly loaded row
+        session = db.session.get(InterviewSession, session_id)
+        questions = {}
+        index = 0
+        banked = None
+        yield sse_event('session', {"session_id": session_id})
+        try:
+            stream = question_stream
+            if mode == 'role':
+                # Role interviews are served from the question bank when it has enough unseen questions
+                import question_bank
+                banked = question_bank.draw_questions(user_id, role, difficulty)
+                if banked is not None:
+                    stream = ((category, q) for category, qs in banked.questions.items() for q in qs)
+            for category, question in stream:
+                questions.setdefault(category, []).append(question)
+                # Persist incrementally so a dropped connection keeps what was generated
+                session.questions = json.dumps(questions)
+                db.session.commit()
+                yield sse_event('question', {"index": index, "category": category, "question": question})
+                index += 1
+        except llm_gateway.LLMUnavailableError as e:
+            print(f"Gemini unavailable while streaming questions: {e}")
+            yield sse_event('error', {"error": "The AI service is temporarily overloaded. Please try again in a few minutes."})
+            return
+        except Exception as e:
+            print(f"Error streaming questions: {e}")
+            yield sse_event('error', {"error": "An error occurred while generating questions. Please try again."})
+            return
+        
+        if not questions:
+            yield sse_event('error', {"error": "Unable to generate interview questions at this time."})
+            return
+        if mode == 'role':
+            bank_questions(session, questions, banked)
+            db.session.commit()
+        yield sse_event('done', {"session_id": session_id, "questions": questions})
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering so events flush immediately
+    })
+
 @app.route('/api/submit-answer', methods=['POST'])
 @login_required
 def submit_answer():
@@ -196,31 +467,24 @@ def submit_answer():
     question_index = data.get('question_index')
     answer = data.get('answer')
     
+    if not isinstance(question_index, int) or question_index < 0:
+        return jsonify({"error": "A valid question_index is required"}), 400
+    
     try:
-        session = InterviewSession.query.filter_by(id=session_id, user_id=current_user.id).first()
-        if not session:
+        owned = db.session.query(InterviewSession.id).filter_by(id=session_id, user_id=current_user.id).first()
+        if not owned:
             return jsonify({"error": "Interview session not found"}), 404
         
-        # Get current answers or initialize
-        answers = json.loads(session.answers) if session.answers else []
-        
-        # Add/update answer
-        if question_index is not None and len(answers) <= question_index:
-            answers.extend([None] * (question_index + 1 - len(answers)))
-        if question_index is not None:
-            answers[question_index] = answer
-        
-        session.answers = json.dumps(answers)
+        # Single-row upsert: O(1) per save and safe for concurrent saves
+        InterviewAnswer.upsert(session_id, question_index, answer)
         db.session.commit()
         
         return jsonify({"message": "Answer submitted successfully"})
         
     except Exception as e:
-        error_msg = str(e).lower()
-        if '503' in error_msg or 'unavailable' in error_msg or 'overloaded' in error_msg:
-            return jsonify({"error": "The AI service is temporarily overloaded. Please try again in a few minutes."}), 503
-        else:
-            return jsonify({"error": "An error occurred while generating questions. Please try again."}), 500
+        db.session.rollback()
+        print(f"Error saving answer: {e}")
+        return jsonify({"error": "An error occurred while saving your answer. Please try again."}), 500
 
 @app.route('/api/complete-interview', methods=['POST'])
 @login_required
@@ -233,31 +497,97 @@ def complete_interview():
         if not session:
             return jsonify({"error": "Interview session not found"}), 404
         
-        # Generate feedback using Gemini API
-        feedback = generate_interview_feedback(session)
+        if session.status == 'completed':
+            return jsonify({
+                "message": "Interview completed successfully",
+                "session_id": session.id,
+                "status": session.status,
+                "feedback": json.loads(session.feedback)
+            })
         
-        session.feedback = json.dumps(feedback)
-        session.status = 'completed'
-        db.session.commit()
+        # No more frames will arrive for this interview
+        from face_sessions import registry
+        record_face_transitions(session.id)
+        registry.remove(session.id)
+        
+        # Feedback is generated on the background pool; the client polls
+        # /api/interview-feedback/<session_id> until scoring finishes
+        if session.status != 'scoring':
+            session.status = 'scoring'
+            session.submitted_at = session.submitted_at or datetime.utcnow()
+            session.feedback = None
+            db.session.commit()
+            if app.config['FEEDBACK_LLM_MODE'] == 'batch':
+                queue_feedback_batch(session)
+            else:
+                background.submit(score_interview_session, session.id)
         
-        # Check if feedback was generated successfully
-        if "error" in feedback:
-            return jsonify({
-                "error": feedback["error"],
-                "details": feedback.get("details", "Unknown error")
-            }), 500
-
         return jsonify({
-            "message": "Interview completed successfully",
-            "feedback": feedback
-        })
+            "message": "Interview submitted, feedback is being generated",
+            "session_id": session.id,
+            "status": session.status,
+            "status_url": f"/api/interview-feedback/{session.id}"
+        }), 202
         
     except Exception as e:
-        error_msg = str(e).lower()
-        if '503' in error_msg or 'unavailable' in error_msg or 'overloaded' in error_msg:
-            return jsonify({"error": "The AI service is temporarily overloaded. Please try again in a few minutes."}), 503
-        else:
-            return jsonify({"error": "An error occurred while completing the interview. Please try again."}), 500
+        print(f"Error completing interview: {e}")
+        return jsonify({"error": "An error occurred while completing the interview. Please try again."}), 500
+
+@app.route('/api/interview-feedback/<int:session_id>')
+@login_required
+def interview_feedback(session_id):
+    """Scoring status of a completed interview, with the feedback once ready"""
+    session = InterviewSession.query.filter_by(id=session_id, user_id=current_user.id).first()
+    if not session:
+        return jsonify({"error": "Interview session not found"}), 404
+    
+    status = {"session_id": session.id, "status": session.status}
+    
+    if session.status == 'completed':
+        status["feedback"] = json.loads(session.feedback)
+    elif session.status == 'scoring_failed':
+        feedback = json.loads(session.feedback) if session.feedback else {}
+        status["error"] = feedback.get("error", "Unable to generate feedback at this time. Please try again.")
+        status["details"] = feedback.get("details", "Unknown error")
+    
+    return jsonify(status)
+
+@app.route('/api/metrics')
+@login_required
+def metrics():
+    """Operational counters for the LLM gateway and other subsystems"""
+    metrics = {"llm": llm_gateway.get_stats()}
+    try:
+        import llm_batch
+        metrics["llm_batch"] = llm_batch.get_stats()
+    except Exception as e:
+        print(f"Error collecting LLM batch metrics: {e}")
+    try:
+        import llm_cache
+        metrics["llm_cache"] = llm_cache.get_stats()
+    except Exception as e:
+        print(f"Error collecting LLM cache metrics: {e}")
+    try:
+        from face_detector import detector
+        metrics["face_detection"] = detector.get_stats()
+    except Exception as e:
+        print(f"Error collecting face detection metrics: {e}")
+    try:
+        from face_sessions import registry
+        metrics["face_sessions"] = registry.get_stats()
+    except Exception as e:
+        print(f"Error collecting face session metrics: {e}")
+    try:
+        import question_bank
+        metrics["question_bank"] = question_bank.get_stats()
+    except Exception as e:
+        print(f"Error collecting question bank metrics: {e}")
+    try:
+        import question_index
+        metrics["question_index"] = question_index.get_stats()
+    except Exception as e:
+        print(f"Error collecting question index metrics: {e}")
+    return jsonify(metrics)
 
 @app.route('/api/user-info')
 @login_required
@@ -296,6 +626,161 @@ def face_status():
         print(f"Error getting face status: {e}")
         return jsonify({"face_detected": True}), 200  # Default to true to avoid false alarms
 
+@app.route('/api/face-frame/<int:session_id>', methods=['POST'])
+@login_required
+def face_frame(session_id):
+    """
+    Analyze one frame captured in the candidate's browser
+    
+    Accepts the JPEG either as the raw request body or as a multipart
+    'frame' field. Each interview session has its own detector, so
+    concurrent candidates are analyzed independently.
+    """
+    from face_sessions import registry, DetectorBusyError, InvalidFrameError
+    
+    owned = db.session.query(InterviewSession.status).filter_by(id=session_id, user_id=current_user.id).first()
+    if not owned:
+        return jsonify({"error": "Interview session not found"}), 404
+    if owned.status != 'active':
+        return jsonify({"error": "Interview is no longer in progress"}), 409
+    
+    upload = request.files.get('frame')
+    data = upload.read() if upload else request.get_data()
+    if not data:
+        return jsonify({"error": "No frame provided"}), 400
+    
+    try:
+        result = registry.submit(session_id, data).result(timeout=10)
+        record_face_transitions(session_id)
+        return jsonify(result)
+    except DetectorBusyError as e:
+        return jsonify({"error": str(e)}), 503
+    except InvalidFrameError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error analyzing face frame: {e}")
+        return jsonify({"error": "Face detection failed"}), 500
+
+@app.route('/api/face-frames/<int:session_id>', methods=['POST'])
+@login_required
+def face_frames(session_id):
+    """
+    Analyze a batch of browser-captured frames in one request
+    
+    Multipart form: one or more 'frames' file fields (JPEG/PNG, in capture
+    order) and an optional 'timestamps' field holding a JSON list of capture
+    times in epoch seconds. Decoding and detection run in a process pool;
+    the response has one result per frame, in order.
+    """
+    from face_sessions import registry, DetectorBusyError
+    
+    owned = db.session.query(InterviewSession.status).filter_by(id=session_id, user_id=current_user.id).first()
+    if not owned:
+        return jsonify({"error": "Interview session not found"}), 404
+    if owned.status != 'active':
+        return jsonify({"error": "Interview is no longer in progress"}), 409
+    
+    frames = [upload.read() for upload in request.files.getlist('frames')]
+    if not frames:
+        return jsonify({"error": "No frames provided"}), 400
+    if len(frames) > app.config['FACE_BATCH_MAX_FRAMES']:
+        return jsonify({"error": f"At most {app.config['FACE_BATCH_MAX_FRAMES']} frames per batch"}), 413
+    
+    timestamps = None
+    if request.form.get('timestamps'):
+        try:
+            timestamps = [float(t) for t in json.loads(request.form['timestamps'])]
+        except (ValueError, TypeError):
+            return jsonify({"error": "timestamps must be a JSON list of numbers"}), 400
+        if len(timestamps) != len(frames):
+            return jsonify({"error": "timestamps must have one entry per frame"}), 400
+    
+    try:
+        results = registry.process_batch(session_id, frames, timestamps, timeout=30)
+        record_face_transitions(session_id)
+        return jsonify({"session_id": session_id, "frames": results})
+    except DetectorBusyError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        print(f"Error analyzing face frame batch: {e}")
+        return jsonify({"error": "Face detection failed"}), 500
+
+@app.route('/api/proctoring-events/<int:session_id>', methods=['POST'])
+@login_required
+def proctoring_events(session_id):
+    """
+    Record face presence transitions observed by the client
+    
+    Body: {"events": [{"face_detected": bool, "timestamp": epoch seconds}]},
+    for clients that detect faces themselves. Only transitions are sent,
+    so this is called a handful of times per interview. Timestamps outside
+    the interview are clamped to it. Frames sent to /api/face-frame(s) are
+    logged by the session's own detector and need no events.
+    """
+    import proctoring
+    
+    session = InterviewSession.query.filter_by(id=session_id, user_id=current_user.id).first()
+    if not session:
+        return jsonify({"error": "Interview session not found"}), 404
+    if session.status != 'active':
+        return jsonify({"error": "Interview is no longer in progress"}), 409
+    
+    events = (request.json or {}).get('events')
+    if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+        return jsonify({"error": "events must be a list of objects"}), 400
+    
+    try:
+        proctoring.record_events(session, events)
+        db.session.commit()
+        return jsonify({"session_id": session_id, "proctoring": proctoring.get_summary(session)})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error recording proctoring events: {e}")
+        return jsonify({"error": "Failed to record proctoring events"}), 500
+
+@app.route('/api/proctoring/<int:session_id>')
+@login_required
+def proctoring_summary(session_id):
+    """Face presence summary (percent present, longest absence) of an interview"""
+    import proctoring
+    
+    session = InterviewSession.query.filter_by(id=session_id, user_id=current_user.id).first()
+    if not session:
+        return jsonify({"error": "Interview session not found"}), 404
+    
+    return jsonify({"session_id": session_id, "proctoring": proctoring.get_summary(session)})
+
+@app.route('/api/face-status/stream')
+@login_required
+def face_status_stream():
+    """
+    Server-Sent Events stream of debounced face presence
+    
+    Sends a 'status' event with the current state on connect, then one
+    'transition' event (with the time the change started) only when the
+    candidate leaves or returns to the frame. Comment lines keep idle
+    connections open through proxies.
+    """
+    try:
+        from face_detector import detector
+    except Exception as e:
+        print(f"Error in face status stream: {e}")
+        return jsonify({"error": "Face status stream failed"}), 500
+    
+    def stream():
+        updates = detector.watch_presence()
+        try:
+            yield sse_event('status', next(updates))
+            for update in updates:
+                yield ": keepalive\n\n" if update is None else sse_event('transition', update)
+        finally:
+            updates.close()
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 
 @app.route('/api/logout', methods=['POST'])
 @login_required
@@ -305,65 +790,13 @@ def logout():
     return jsonify({"message": "Logged out successfully"})
 
 # Helper functions
-def extract_resume_keywords(filepath):
-    """Extract keywords from uploaded PDF resume"""
-    try:
-        import PyPDF2
-        import re
-        from collections import Counter
-        
-        with open(filepath, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        
-        # Common technical skills and keywords
-        skill_patterns = [
-            r'\b(?:python|java|javascript|typescript|c\+\+|c#|php|ruby|go|rust|swift|kotlin)\b',
-            r'\b(?:react|angular|vue|node\.?js|express|django|flask|spring|laravel)\b',
-            r'\b(?:html|css|sass|scss|bootstrap|tailwind)\b',
-            r'\b(?:sql|mysql|postgresql|mongodb|redis|elasticsearch)\b',
-            r'\b(?:aws|azure|gcp|docker|kubernetes|jenkins|git|github|gitlab)\b',
-            r'\b(?:machine learning|data science|ai|tensorflow|pytorch|pandas|numpy)\b',
-            r'\b(?:agile|scrum|devops|ci/cd|microservices|api|rest|graphql)\b'
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            found_skills.extend(matches)
-        
-        # Additional keyword extraction from common resume terms
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text_lower)
-        
-        # Filter common resume keywords
-        resume_keywords = ['experience', 'project', 'developed', 'designed', 'implemented', 
-                          'managed', 'created', 'built', 'led', 'collaborated', 'analyzed',
-                          'optimization', 'performance', 'testing', 'debugging', 'integration']
-        
-        found_keywords = [word for word in words if word in resume_keywords]
-        
-        # Combine and get most frequent
-        all_keywords = found_skills + found_keywords
-        if all_keywords:
-            keyword_counts = Counter(all_keywords)
-            return [keyword for keyword, count in keyword_counts.most_common(10)]
-        else:
-            # Fallback to basic skill detection
-            basic_skills = ['programming', 'development', 'software', 'engineering', 'technical']
-            return [skill for skill in basic_skills if skill in text_lower][:5]
-        
-    except Exception as e:
-        print(f"Error extracting keywords: {e}")
-        return ['general programming', 'software development']
-
-def generate_interview_questions(mode, difficulty, role, keywords):
-    """Generate interview questions using Gemini API"""
+def generate_interview_questions(mode, difficulty, role, keywords, user_id=None):
+    """Generate interview questions using Gemini API, avoiding the user's earlier questions"""
     try:
         from gemini import client
+        from google.genai import types
+        import question_index
+        from question_generator import InterviewQuestionSet, ROLE_MINIMUMS, generate_avoiding
         
         if mode == 'resume':
             prompt = f"""You are an expert technical interviewer conducting a {difficulty} level interview.
@@ -376,12 +809,7 @@ Generate a comprehensive set of interview questions in the following categories:
 - 3 situational questions that test problem-solving and experience
 
 Make questions specific to the skills and experience level indicated.
-Return the response as a JSON object with exactly these keys:
-{{
-    "hr_questions": [array of 3 HR/behavioral questions],
-    "technical_questions": [array of 4 technical questions],
-    "cultural_questions": [array of 3 situational/cultural fit questions]
-}}
+Return hr_questions (3), technical_questions (4) and cultural_questions (3).
 
 Ensure all questions are relevant to the skills: {', '.join(keywords)}"""
         else:
@@ -393,162 +821,230 @@ Generate a comprehensive set of interview questions specifically tailored for a
 - 3 situational questions that test problem-solving and experience in {role} scenarios
 
 Make questions specific to {role} responsibilities and requirements.
-Return the response as a JSON object with exactly these keys:
-{{
-    "hr_questions": [array of 3 HR/behavioral questions],
-    "technical_questions": [array of 4 technical questions],
-    "cultural_questions": [array of 3 situational/cultural fit questions]
-}}
+Return hr_questions (3), technical_questions (4) and cultural_questions (3).
 
 Ensure all questions are highly relevant to a {role} position."""
         
-        # Retry logic for Gemini API calls
-        max_retries = 3
-        retry_delay = 1  # Initial delay in seconds
-
-        for attempt in range(max_retries):
-            try:
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt
-                )
-
-                # Parse response and return structured questions
-                if response.text:
-                    # Try to extract JSON from response
-                    import re
-                    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                    if json_match:
-                        questions_data = json.loads(json_match.group())
-                        return questions_data
-                    else:
-                        # If no JSON found, return error
-                        print(f"No JSON found in response: {response.text[:200]}")
-                        raise ValueError("Invalid response format from LLM")
-
-            except json.JSONDecodeError as je:
-                print(f"JSON parse error (attempt {attempt + 1}/{max_retries}): {je}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                    continue
-                else:
-                    break
-            except Exception as e:
-                error_str = str(e).lower()
-                is_retryable = ('503' in error_str or
-                              'unavailable' in error_str or
-                              'overloaded' in error_str)
-
-                if is_retryable and attempt < max_retries - 1:
-                    print(f"Gemini API temporarily unavailable for questions (attempt {attempt + 1}/{max_retries}): {e}")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    print(f"Error generating questions (final attempt): {e}")
-                    break
+        questions = generate_avoiding(
+            prompt,
+            question_index.avoid_instructions(user_id) if user_id is not None else "",
+            user_id,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=InterviewQuestionSet
+            ),
+            # Schema-constrained output is plain JSON, no scanning needed
+            parse=lambda text: InterviewQuestionSet(**json.loads(text)).model_dump(),
+            client=client
+        )
+        if user_id is not None:
+            questions = question_index.drop_repeats(user_id, questions, ROLE_MINIMUMS)
+        return questions
 
+    except llm_gateway.LLMUnavailableError:
+        # Surfaced as a 503 by the endpoint
+        raise
     except Exception as e:
         print(f"Error generating questions: {e}")
 
     # Return error if all retry attempts fail
-        return {
-            "error": "Unable to generate interview questions at this time. Please check your connection and try again.",
-            "details": "All retry attempts exhausted"
+    return {
+        "error": "Unable to generate interview questions at this time. Please check your connection and try again.",
+        "details": "All retry attempts exhausted"
+    }
+
+def record_face_transitions(session_id):
+    """Move a session detector's new presence transitions into the proctoring log"""
+    try:
+        from face_sessions import registry
+        import proctoring
+        
+        transitions = registry.take_transitions(session_id)
+        if transitions:
+            proctoring.record_events(db.session.get(InterviewSession, session_id), transitions)
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error recording face transitions: {e}")
+
+def score_interview_session(session_id):
+    """Background task: generate feedback and move the session out of 'scoring'"""
+    session = db.session.get(InterviewSession, session_id)
+    if session is None or session.status != 'scoring':
+        return
+    
+    try:
+        feedback = generate_interview_feedback(session)
+    except Exception as e:
+        print(f"Error scoring interview {session_id}: {e}")
+        feedback = {
+            "error": "Unable to generate feedback at this time. Please try again.",
+            "details": "Feedback generation failed"
         }
+    save_interview_feedback(session, feedback)
+
+def recover_scoring_sessions():
+    """Re-enqueue feedback for sessions a previous process left in 'scoring'"""
+    pending = [row.id for row in db.session.query(InterviewSession.id).filter_by(status='scoring')]
+    for session_id in pending:
+        if app.config['FEEDBACK_LLM_MODE'] == 'batch':
+            # Batch jobs submitted by the old process are not tracked; the next job re-asks
+            queue_feedback_batch(db.session.get(InterviewSession, session_id))
+        else:
+            background.submit(score_interview_session, session_id)
+    if pending:
+        print(f"Recovered {len(pending)} interviews awaiting feedback")
+    return len(pending)
+
+# Shared collector for batch-mode feedback, created on first use
+feedback_batches = None
+
+def queue_feedback_batch(session):
+    """Batch mode: add a session's feedback prompt to the next Gemini batch job"""
+    global feedback_batches
+    try:
+        import llm_batch
+        if feedback_batches is None:
+            feedback_batches = llm_batch.BatchCollector(
+                apply_batch_feedback,
+                max_size=app.config['FEEDBACK_BATCH_SIZE'],
+                max_wait=app.config['FEEDBACK_BATCH_WAIT_SECONDS']
+            )
+        prompt, config, _ = build_feedback_request(session)
+        feedback_batches.add(session.id, prompt, config=config, parse=parse_feedback)
+    except Exception as e:
+        print(f"Error queueing batch feedback for interview {session.id}: {e}")
+        background.submit(score_interview_session, session.id)
+
+def apply_batch_feedback(session_id, result):
+    """Batch collector handler: store one session's feedback from a finished batch job"""
+    with app.app_context():
+        session = db.session.get(InterviewSession, session_id)
+        if session is None or session.status != 'scoring':
+            return
+        if not result.ok:
+            # Empty, unparseable or failed batch answers are retried interactively
+            print(f"Batch feedback for interview {session_id} failed, scoring interactively: {result.error}")
+            background.submit(score_interview_session, session_id)
+            return
+        feedback = result.value
+        import proctoring
+        presence = proctoring.get_summary(session)
+        if presence:
+            feedback["proctoring"] = presence
+        save_interview_feedback(session, feedback)
+
+def parse_feedback(text):
+    """Parse a feedback response; ValueError unless it is a scored feedback object"""
+    feedback = json.loads(text)
+    if not isinstance(feedback, dict) or "overall_score" not in feedback:
+        raise ValueError("Feedback response has no overall_score")
+    return feedback
+
+def save_interview_feedback(session, feedback):
+    """Store generated feedback and move the session out of 'scoring'"""
+    session.feedback = json.dumps(feedback)
+    if "error" in feedback:
+        # Calling /api/complete-interview again retries scoring
+        session.status = 'scoring_failed'
+    else:
+        session.status = 'completed'
+        session.completed_at = datetime.utcnow()
+    db.session.commit()
+
+def build_feedback_request(session):
+    """Prompt, generation config and proctoring summary for a session's feedback"""
+    from google.genai import types
+    
+    questions = json.loads(session.questions)
+    
+    # One indexed query; sessions saved before InterviewAnswer existed
+    # still carry their answers in the legacy JSON column
+    answers = json.loads(session.answers) if session.answers else []
+    for row in InterviewAnswer.query.filter_by(session_id=session.id).all():
+        if row.question_index >= len(answers):
+            answers.extend([None] * (row.question_index + 1 - len(answers)))
+        answers[row.question_index] = row.text
+    
+    # Prepare interview data for analysis
+    interview_data = []
+    all_questions = []
+    
+    # Flatten questions from categories
+    for category, question_list in questions.items():
+        for q in question_list:
+            all_questions.append({"category": category.replace("_", " ").title(), "text": q})
+    
+    # Pair questions with answers
+    for i, question in enumerate(all_questions):
+        answer = answers[i] if i < len(answers) and answers[i] else "No answer provided"
+        interview_data.append({
+            "category": question["category"],
+            "question": question["text"],
+            "answer": answer
+        })
+    
+    # Camera presence, if the interview was proctored
+    import proctoring
+    presence = proctoring.get_summary(session)
+    presence_section = ""
+    if presence:
+        presence_section = f"""
+    Camera Proctoring Summary:
+    - Candidate visible for {presence['percent_present']}% of the {presence['duration_seconds']} second interview
+    - Longest time away from the camera: {presence['longest_absence_seconds']} seconds ({presence['absence_count']} absences)
+    Mention attentiveness in the feedback only if the candidate was away for a significant share of the interview.
+    """
+    
+    # Create detailed prompt for Gemini
+    analysis_prompt = f"""
+    You are an expert HR interviewer and career coach. Analyze this interview session and provide detailed feedback.
+    
+    Interview Mode: {session.mode}
+    Difficulty Level: {session.difficulty}
+    Role: {session.role or 'General'}
+    
+    Interview Questions and Answers:
+    {json.dumps(interview_data, indent=2)}
+    {presence_section}
+    Provide feedback in the following JSON format:
+    {{
+        "overall_score": number (0-100),
+        "category_scores": {{
+            "hr_performance": number (0-100),
+            "technical_performance": number (0-100), 
+            "cultural_fit": number (0-100)
+        }},
+        "strengths": [list of 3-5 specific strengths observed],
+        "improvements": [list of 3-5 specific areas for improvement],
+        "detailed_feedback": "comprehensive paragraph feedback"
+    }}
+    
+    Scoring Criteria:
+    - HR Performance: Communication skills, self-awareness, career goals
+    - Technical Performance: Problem-solving, technical knowledge, methodology
+    - Cultural Fit: Team collaboration, adaptability, values alignment
+    
+    Be constructive, specific, and encouraging while providing actionable feedback.
+    """
+
+    return analysis_prompt, types.GenerateContentConfig(response_mime_type="application/json"), presence
 
 def generate_interview_feedback(session):
     """Generate feedback for completed interview using Gemini API"""
     try:
         from gemini import client
         
-        questions = json.loads(session.questions)
-        answers = json.loads(session.answers) if session.answers else []
-        
-        # Prepare interview data for analysis
-        interview_data = []
-        all_questions = []
-        
-        # Flatten questions from categories
-        for category, question_list in questions.items():
-            for q in question_list:
-                all_questions.append({"category": category.replace("_", " ").title(), "text": q})
-        
-        # Pair questions with answers
-        for i, question in enumerate(all_questions):
-            answer = answers[i] if i < len(answers) and answers[i] else "No answer provided"
-            interview_data.append({
-                "category": question["category"],
-                "question": question["text"],
-                "answer": answer
-            })
-        
-        # Create detailed prompt for Gemini
-        analysis_prompt = f"""
-        You are an expert HR interviewer and career coach. Analyze this interview session and provide detailed feedback.
-        
-        Interview Mode: {session.mode}
-        Difficulty Level: {session.difficulty}
-        Role: {session.role or 'General'}
-        
-        Interview Questions and Answers:
-        {json.dumps(interview_data, indent=2)}
-        
-        Provide feedback in the following JSON format:
-        {{
-            "overall_score": number (0-100),
-            "category_scores": {{
-                "hr_performance": number (0-100),
-                "technical_performance": number (0-100), 
-                "cultural_fit": number (0-100)
-            }},
-            "strengths": [list of 3-5 specific strengths observed],
-            "improvements": [list of 3-5 specific areas for improvement],
-            "detailed_feedback": "comprehensive paragraph feedback"
-        }}
-        
-        Scoring Criteria:
-        - HR Performance: Communication skills, self-awareness, career goals
-        - Technical Performance: Problem-solving, technical knowledge, methodology
-        - Cultural Fit: Team collaboration, adaptability, values alignment
-        
-        Be constructive, specific, and encouraging while providing actionable feedback.
-        """
+        prompt, config, presence = build_feedback_request(session)
         
-        # Retry logic for Gemini API calls
-        max_retries = 3
-        retry_delay = 1  # Initial delay in seconds
-
-        for attempt in range(max_retries):
-            try:
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=analysis_prompt
-                )
-
-                if response.text:
-                    # Try to parse the JSON response
-                    import re
-                    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                    if json_match:
-                        feedback_data = json.loads(json_match.group())
-                        return feedback_data
-
-            except Exception as gemini_error:
-                error_str = str(gemini_error).lower()
-                is_retryable = ('503' in error_str or
-                              'unavailable' in error_str or
-                              'overloaded' in error_str)
-
-                if is_retryable and attempt < max_retries - 1:
-                    print(f"Gemini API temporarily unavailable (attempt {attempt + 1}/{max_retries}): {gemini_error}")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    print(f"Gemini API error (final attempt): {gemini_error}")
-                    break
+        try:
+            feedback = llm_gateway.generate(prompt, config=config, parse=parse_feedback,
+                                            client=client, cache=False)
+            if presence and isinstance(feedback, dict):
+                feedback["proctoring"] = presence
+            return feedback
+        except Exception as gemini_error:
+            print(f"Gemini API error generating feedback: {gemini_error}")
         
         # Return error if LLM fails to generate feedback
         return {
@@ -564,7 +1060,36 @@ def generate_interview_feedback(session):
         }
 
 
-if __name__ == '__main__':
+# Start-up work is done once per serving process, under `python app.py`
+# and WSGI servers alike; scripts that only import the app skip it
+_started = False
+_start_lock = threading.Lock()
+
+def start_app():
+    """Create tables, resume work an earlier process left unfinished and warm the question index"""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
     with app.app_context():
         db.create_all()
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+        from resume_jobs import recover_pending_jobs
+        recover_pending_jobs(app.config['UPLOAD_FOLDER'])
+        recover_scoring_sessions()
+    # Build the near-duplicate index now rather than on the first interview
+    import question_index
+    background.submit(question_index.get_index)
+
+@app.before_request
+def ensure_started():
+    if not _started:
+        start_app()
+
+if __name__ == '__main__':
+    # With the reloader on, this process only watches files and restarts the
+    # server in a child process (WERKZEUG_RUN_MAIN set); only that child serves
+    use_reloader = os.environ.get('FLASK_USE_RELOADER', 'true').lower() == 'true'
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_app()
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=use_reloader)
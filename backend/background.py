@@ -0,0 +1,40 @@
+"""
+Background Task Runner
+Bounded thread pool for slow work that must not hold a Flask request worker
+Every task runs inside the application context so it can use the database
+"""
+
+import os
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_app = None
+_executor = None
+
+
+def init_app(app):
+    """Bind the runner to the Flask app; call once at startup"""
+    global _app, _executor
+    _app = app
+    _executor = ThreadPoolExecutor(
+        max_workers=int(os.environ.get('BACKGROUND_WORKERS', '4')),
+        thread_name_prefix='background'
+    )
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) on the pool inside an app context"""
+    if _executor is None:
+        raise RuntimeError("background.init_app() has not been called")
+
+    def run():
+        with _app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Background task {getattr(fn, '__name__', fn)} failed")
+                raise
+
+    return _executor.submit(run)
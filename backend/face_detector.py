@@ -1,22 +1,382 @@
 """
 Face Detection Module using OpenCV
 Provides video streaming with real-time face detection
+A single producer thread captures, detects and encodes each frame once and
+publishes it to a shared ring buffer that any number of viewers stream from
 """
+import os
 import cv2
+import logging
 import threading
 import time
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# One encoded frame as published by the producer thread
+EncodedFrame = namedtuple('EncodedFrame', ['seq', 'data', 'face_detected', 'timestamp'])
+
+
+class FrameBuffer:
+    """
+    Fixed-size ring buffer of encoded frames shared by all subscribers
+
+    Subscribers always receive the newest frame; a consumer that falls
+    behind skips the frames it missed instead of slowing the producer.
+    """
+
+    def __init__(self, size=4):
+        self._frames = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self._seq = 0
+
+    def publish(self, data, face_detected):
+        with self._condition:
+            self._seq += 1
+            self._frames.append(EncodedFrame(self._seq, data, face_detected, time.time()))
+            self._condition.notify_all()
+
+    def latest(self):
+        with self._condition:
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_next(self, after_seq, timeout=1.0):
+        """Return the newest frame with seq > after_seq, or None on timeout"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frames and self._frames[-1].seq > after_seq,
+                timeout=timeout
+            )
+            if self._frames and self._frames[-1].seq > after_seq:
+                return self._frames[-1]
+            return None
+
+
+class PresenceTracker:
+    """
+    Debounced face-presence state derived from per-frame detections
+
+    Raw detections flicker (a blink, a turned head); the stable state only
+    flips to absent after no face has been seen for `absent_after` seconds,
+    and back to present after a face has been seen continuously for
+    `present_after` seconds. Each flip is recorded as a timestamped
+    transition that subscribers can wait for.
+    """
+
+    def __init__(self, absent_after=1.5, present_after=0.5, history=256):
+        self.absent_after = absent_after
+        self.present_after = present_after
+        self.present = True
+        self._candidate_since = None  # when raw detections started disagreeing with the state
+        self._transitions = deque(maxlen=history)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    def update(self, face_detected, timestamp):
+        """Feed one raw detection result; returns True if the stable state flipped"""
+        with self._condition:
+            if face_detected == self.present:
+                self._candidate_since = None
+                return False
+
+            if self._candidate_since is None:
+                self._candidate_since = timestamp
+            hold = self.present_after if face_detected else self.absent_after
+            if timestamp - self._candidate_since < hold:
+                return False
+
+            # Date the transition from when the change actually started
+            self.present = face_detected
+            self._seq += 1
+            self._transitions.append({
+                "seq": self._seq,
+                "face_detected": face_detected,
+                "timestamp": self._candidate_since,
+            })
+            self._candidate_since = None
+            self._condition.notify_all()
+            return True
+
+    def wait_for_transition(self, after_seq, timeout=15.0):
+        """Return transitions newer than after_seq, waiting up to `timeout` for one"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq, timeout=timeout)
+            return [t for t in self._transitions if t["seq"] > after_seq]
+
+    def snapshot(self):
+        with self._condition:
+            return {"face_detected": self.present, "seq": self._seq, "timestamp": time.time()}
+
+
+class DetectionScheduler:
+    """
+    Decides how each frame is analysed so the full-frame cascade does not run
+    on every frame
+
+    A full-frame detection runs every `detect_every` frames, whenever the scene
+    changes by more than `motion_threshold` (mean absolute difference of a
+    small grayscale thumbnail), or when tracking loses the face. In between,
+    the last face box is tracked by re-running the cascade only inside a
+    region of interest around it.
+
+    With `scale` below 1 the cascade runs on a downscaled copy of the image
+    (or ROI) and boxes are mapped back to full-resolution coordinates; an
+    interview candidate's face is large, so little recall is lost.
+    """
+
+    # Smallest face (full-resolution pixels) searched for in full-frame mode
+    MIN_FACE_SIZE = 30
+
+    def __init__(self, cascade, detect_every=5, motion_threshold=8.0, roi_margin=0.5, scale=1.0):
+        self.cascade = cascade
+        self.detect_every = max(1, detect_every)
+        self.motion_threshold = motion_threshold
+        self.roi_margin = roi_margin  # ROI padding as a fraction of the face box size
+        self.scale = min(1.0, max(0.1, scale))
+
+        self.last_faces = []
+        self._previous_thumbnail = None
+        self._frames_since_full = 0
+
+        self.started = time.monotonic()
+        self.frames = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+
+    def _motion(self, gray):
+        """Mean absolute difference against the previous frame's thumbnail"""
+        thumbnail = cv2.resize(gray, (80, 60), interpolation=cv2.INTER_AREA)
+        previous, self._previous_thumbnail = self._previous_thumbnail, thumbnail
+        if previous is None:
+            return float('inf')
+        return float(cv2.absdiff(thumbnail, previous).mean())
+
+    def _run_cascade(self, gray, min_size, offset=(0, 0)):
+        """
+        Run the cascade on `gray`, downscaled by self.scale
+        Returns boxes in full-resolution coordinates, shifted by `offset`
+        """
+        scale = self.scale
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        min_w, min_h = min_size
+
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(max(1, int(min_w * scale)), max(1, int(min_h * scale)))
+        )
+        off_x, off_y = offset
+        return [
+            (int(x / scale) + off_x, int(y / scale) + off_y, int(w / scale), int(h / scale))
+            for (x, y, w, h) in faces
+        ]
+
+    def _detect_full(self, gray):
+        self.full_detections += 1
+        self._frames_since_full = 0
+        return self._run_cascade(gray, (self.MIN_FACE_SIZE, self.MIN_FACE_SIZE))
+
+    def _detect_in_roi(self, gray, box):
+        """Re-detect inside a padded window around the previous face box"""
+        self.roi_detections += 1
+        x, y, w, h = box
+        pad_x, pad_y = int(w * self.roi_margin), int(h * self.roi_margin)
+        height, width = gray.shape[:2]
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+
+        min_size = (max(self.MIN_FACE_SIZE, w // 2), max(self.MIN_FACE_SIZE, h // 2))
+        return self._run_cascade(gray[y0:y1, x0:x1], min_size, offset=(x0, y0))
+
+    def detect(self, gray):
+        """Return face boxes (x, y, w, h) for this grayscale frame"""
+        self.frames += 1
+        self._frames_since_full += 1
+        motion = self._motion(gray)
+
+        if (not self.last_faces
+                or self._frames_since_full >= self.detect_every
+                or motion > self.motion_threshold):
+            faces = self._detect_full(gray)
+        else:
+            faces = self._detect_in_roi(gray, self.last_faces[0])
+            if not faces:
+                # Tracking lost: fall back to a full search this frame
+                faces = self._detect_full(gray)
+
+        self.last_faces = faces
+        return faces
+
+    def get_stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            "frames": self.frames,
+            "full_detections": self.full_detections,
+            "roi_detections": self.roi_detections,
+            "frames_per_second": round(self.frames / elapsed, 2),
+            "full_detections_per_second": round(self.full_detections / elapsed, 2),
+            "roi_detections_per_second": round(self.roi_detections / elapsed, 2),
+            "detect_every": self.detect_every,
+            "scale": self.scale,
+        }
+
+
+class StreamController:
+    """
+    Adapts JPEG quality, output resolution and frame pacing of the MJPEG stream
+
+    Every `window` frames it compares the average capture-to-encode time with
+    the frame budget (1 / target_fps) and checks how many frames viewers had
+    to skip. When over budget or viewers fall behind it degrades quality
+    first, then resolution, then frame rate; with ample headroom it restores
+    them in the reverse order.
+    """
+
+    QUALITY_STEP = 10
+    SCALES = (1.0, 0.75, 0.5)
+
+    def __init__(self, target_fps=20, min_fps=5, max_quality=85, min_quality=45, window=20):
+        self.target_fps = target_fps
+        self.min_fps = min(min_fps, target_fps)
+        self.max_quality = max_quality
+        self.min_quality = min(min_quality, max_quality)
+        self.window = window
+
+        self.fps = target_fps
+        self.quality = max_quality
+        self._scale_index = 0
+        self._lock = threading.Lock()
+
+        # Current adjustment window
+        self._window_frames = 0
+        self._window_process = 0.0
+        self._window_delivered = 0
+        self._window_skipped = 0
+
+        # Totals for metrics
+        self.started = time.monotonic()
+        self.frames = 0
+        self.bytes = 0
+        self.encode_seconds = 0.0
+        self.skipped = 0
+        self.adjustments = 0
+
+    @property
+    def scale(self):
+        return self.SCALES[self._scale_index]
+
+    @property
+    def frame_interval(self):
+        return 1.0 / self.fps
+
+    def record_frame(self, process_seconds, encode_seconds, size):
+        """Account one produced frame; may adjust the settings for the next ones"""
+        with self._lock:
+            self.frames += 1
+            self.bytes += size
+            self.encode_seconds += encode_seconds
+            self._window_frames += 1
+            self._window_process += process_seconds
+            if self._window_frames >= self.window:
+                self._adjust()
+
+    def record_delivery(self, skipped):
+        """A viewer received a frame after missing `skipped` newer-than-last ones"""
+        with self._lock:
+            self._window_delivered += 1
+            self._window_skipped += skipped
+            self.skipped += skipped
+
+    def _adjust(self):
+        budget = 1.0 / self.target_fps
+        average = self._window_process / self._window_frames
+        offered = self._window_delivered + self._window_skipped
+        skip_ratio = self._window_skipped / offered if offered else 0.0
+        before = (self.quality, self._scale_index, self.fps)
+
+        if average > 0.9 * budget or skip_ratio > 0.3:
+            if self.quality > self.min_quality:
+                self.quality = max(self.min_quality, self.quality - self.QUALITY_STEP)
+            elif self._scale_index < len(self.SCALES) - 1:
+                self._scale_index += 1
+            elif skip_ratio > 0.3:
+                # Viewers can't keep up even with small frames: send fewer of them
+                self.fps = max(self.min_fps, self.fps - 2)
+        elif average < 0.6 * budget and skip_ratio < 0.05:
+            if self.fps < self.target_fps:
+                self.fps = min(self.target_fps, self.fps + 2)
+            elif self._scale_index > 0:
+                self._scale_index -= 1
+            elif self.quality < self.max_quality:
+                self.quality = min(self.max_quality, self.quality + self.QUALITY_STEP)
+
+        if (self.quality, self._scale_index, self.fps) != before:
+            self.adjustments += 1
+        self._window_frames = 0
+        self._window_process = 0.0
+        self._window_delivered = 0
+        self._window_skipped = 0
+
+    def get_stats(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            return {
+                "achieved_fps": round(self.frames / elapsed, 2),
+                "paced_fps": self.fps,
+                "jpeg_quality": self.quality,
+                "output_scale": self.scale,
+                "avg_encode_ms": round(1000 * self.encode_seconds / self.frames, 2) if self.frames else 0.0,
+                "bytes_per_second": round(self.bytes / elapsed),
+                "skipped_by_viewers": self.skipped,
+                "adjustments": self.adjustments,
+            }
+
 
 class FaceDetector:
-    def __init__(self):
+    def __init__(self, target_fps=20, idle_timeout=5.0, detect_every=None):
         # Load Haar Cascade classifier for face detection
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
+        self.scheduler = DetectionScheduler(
+            self.face_cascade,
+            detect_every=detect_every or int(os.environ.get('FACE_DETECT_EVERY', '5')),
+            motion_threshold=float(os.environ.get('FACE_MOTION_THRESHOLD', '8.0')),
+            scale=float(os.environ.get('FACE_DETECT_SCALE', '1.0'))
+        )
         self.camera = None
         self.lock = threading.Lock()
         self.last_frame = None
         self.face_detected = False
-        
+
+        # Broadcast state: one producer, many subscribers
+        self.target_fps = target_fps
+        self.idle_timeout = idle_timeout  # seconds without viewers before the camera is released
+        self.frames = FrameBuffer()
+        self.controller = StreamController(
+            target_fps=target_fps,
+            min_fps=int(os.environ.get('FACE_STREAM_MIN_FPS', '5')),
+            max_quality=int(os.environ.get('FACE_STREAM_MAX_QUALITY', '85')),
+            min_quality=int(os.environ.get('FACE_STREAM_MIN_QUALITY', '45'))
+        )
+        self.presence = PresenceTracker(
+            absent_after=float(os.environ.get('FACE_ABSENT_AFTER_SECONDS', '1.5')),
+            present_after=float(os.environ.get('FACE_PRESENT_AFTER_SECONDS', '0.5'))
+        )
+        self._producer = None
+        self._running = False
+        self._subscribers = 0
+        self._viewers = 0  # video viewers only; status watchers don't need annotated frames
+        self._last_subscriber_seen = time.monotonic()
+
+        # Camera failures: the producer backs off between attempts and gives up
+        # (setting camera_error) after this many in a row
+        self.max_camera_failures = int(os.environ.get('FACE_CAMERA_MAX_FAILURES', '8'))
+        self.camera_retry_max_delay = float(os.environ.get('FACE_CAMERA_RETRY_MAX_SECONDS', '5'))
+        self.camera_error = None
+
     def initialize_camera(self):
         """Initialize the camera if not already initialized"""
         if self.camera is None or not self.camera.isOpened():
@@ -27,32 +387,29 @@ class FaceDetector:
             self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             self.camera.set(cv2.CAP_PROP_FPS, 30)
-    
-    def detect_faces(self, frame):
+
+    def detect_faces(self, frame, annotate=True):
         """
-        Detect faces in a frame and draw rectangles
+        Detect faces in a frame and draw rectangles (unless annotate is False)
         Returns: processed frame and face detection status
         """
         # Convert to grayscale for detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Detect faces
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
+
+        # Detect faces (full-frame only every few frames, tracked in between)
+        faces = self.scheduler.detect(gray)
+
         face_detected = len(faces) > 0
-        
+        if not annotate:
+            return frame, face_detected
+
         # Draw rectangles and labels
         for (x, y, w, h) in faces:
             # Green rectangle for detected face
             cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 3)
             cv2.putText(frame, 'Face Detected', (x, y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
+
         # If no face detected, show warning
         if not face_detected:
             h, w = frame.shape[:2]
@@ -60,72 +417,228 @@ class FaceDetector:
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
             # Red border
             cv2.rectangle(frame, (5, 5), (w-5, h-5), (0, 0, 255), 5)
-        
+
         return frame, face_detected
-    
-    def get_frame(self):
+
+    def capture_frame(self):
         """
-        Get a single frame with face detection
-        Returns: JPEG encoded frame bytes
+        Read, detect and encode one camera frame
+        Returns: JPEG encoded frame bytes and face detection status
         """
-        try:
+        with self.lock:
             self.initialize_camera()
-            
-            with self.lock:
-                ret, frame = self.camera.read()
-                
-                if not ret:
-                    return None, False
-                
-                # Flip frame horizontally for mirror effect
-                frame = cv2.flip(frame, 1)
-                
-                # Detect faces and draw rectangles
-                frame, face_detected = self.detect_faces(frame)
-                
-                # Encode frame as JPEG
-                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                
-                if not ret:
-                    return None, False
-                
-                self.last_frame = buffer.tobytes()
-                self.face_detected = face_detected
-                
-                return self.last_frame, self.face_detected
-                
-        except Exception as e:
-            print(f"Error getting frame: {e}")
+            ret, frame = self.camera.read()
+            # read() blocks until the camera's next frame, so its wait is not
+            # processing time the controller could reduce
+            started = time.monotonic()
+
+            if not ret:
+                return None, False
+
+            # Flip frame horizontally for mirror effect
+            frame = cv2.flip(frame, 1)
+
+            # Detect faces; annotations are only drawn when someone watches the video
+            frame, face_detected = self.detect_faces(frame, annotate=self._viewers > 0)
+
+            # Encode frame as JPEG at the controller's current resolution and quality
+            scale = self.controller.scale
+            if scale < 1.0:
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            encode_started = time.monotonic()
+            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.controller.quality])
+            finished = time.monotonic()
+
+            if not ret:
+                return None, False
+
+            self.last_frame = buffer.tobytes()
+            self.face_detected = face_detected
+            self.controller.record_frame(finished - started, finished - encode_started, len(self.last_frame))
+
+            return self.last_frame, self.face_detected
+
+    def _produce_frames(self):
+        """
+        Producer thread: capture/detect/encode once per frame for every viewer
+
+        Consecutive camera failures back off exponentially; after
+        max_camera_failures in a row the producer sets camera_error and exits.
+        """
+        failures = 0
+        while self._running:
+            started = time.monotonic()
+
+            if self._subscribers == 0 and started - self._last_subscriber_seen > self.idle_timeout:
+                break
+
+            try:
+                frame_data, face_detected = self.capture_frame()
+                error = None if frame_data is not None else "Camera returned no frame"
+            except Exception as e:
+                frame_data, face_detected = None, False
+                error = str(e)
+
+            if frame_data is None:
+                failures += 1
+                if failures == 1:
+                    logger.warning(f"Error getting frame: {error}")
+                if failures >= self.max_camera_failures:
+                    logger.error(f"Giving up on the camera after {failures} consecutive failures: {error}")
+                    with self.lock:
+                        self.camera_error = error
+                    break
+                time.sleep(min(self.camera_retry_max_delay, 0.1 * 2 ** (failures - 1)))
+                continue
+            failures = 0
+
+            self.frames.publish(frame_data, face_detected)
+            self.presence.update(face_detected, time.time())
+
+            # Pace to the controller's frame rate, accounting for processing time
+            elapsed = time.monotonic() - started
+            if elapsed < self.controller.frame_interval:
+                time.sleep(self.controller.frame_interval - elapsed)
+
+        with self.lock:
+            self._running = False
+            self._producer = None
+            self.release()
+
+    def start(self):
+        """Start the producer thread if it isn't already running (retrying a failed camera)"""
+        with self.lock:
+            self._last_subscriber_seen = time.monotonic()
+            if self._running:
+                return
+            self.camera_error = None
+            self._running = True
+            self._producer = threading.Thread(
+                target=self._produce_frames, name='face-detector-producer', daemon=True
+            )
+            self._producer.start()
+
+    def stop(self):
+        """Stop the producer thread; the camera is released when it exits"""
+        self._running = False
+
+    def _restart_producer(self):
+        """
+        Restart the producer if it exited while idle
+        Returns the camera error instead (without restarting) if it gave up on the camera
+        """
+        with self.lock:
+            error = self.camera_error
+        if error is None:
+            self.start()
+        return error
+
+    def get_frame(self):
+        """
+        Get the most recent processed frame
+        Returns: JPEG encoded frame bytes and face detection status
+        """
+        self.start()
+        frame = self.frames.wait_for_next(0, timeout=2.0)
+        if frame is None:
             return None, False
-    
+        return frame.data, frame.face_detected
+
+    def _subscribe(self):
+        self.start()
+        with self.lock:
+            self._subscribers += 1
+
+    def _unsubscribe(self):
+        with self.lock:
+            self._subscribers -= 1
+            self._last_subscriber_seen = time.monotonic()
+
     def generate_frames(self):
         """
         Generator function for video streaming
-        Yields JPEG frames in multipart format
+        Yields JPEG frames in multipart format from the shared buffer; if the
+        camera fails, ends the stream with a text/plain part holding the error
         """
-        while True:
-            frame_data, face_detected = self.get_frame()
-            
-            if frame_data is None:
-                time.sleep(0.1)
-                continue
-            
-            # Yield frame in multipart format
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n')
-            
-            # Control frame rate (~20 FPS)
-            time.sleep(0.05)
-    
+        self._subscribe()
+        with self.lock:
+            self._viewers += 1
+
+        last_seq = 0
+        try:
+            while True:
+                frame = self.frames.wait_for_next(last_seq, timeout=1.0)
+
+                if frame is None:
+                    error = self._restart_producer()
+                    if error is not None:
+                        yield (b'--frame\r\n'
+                               b'Content-Type: text/plain\r\n\r\n' +
+                               f"Camera unavailable: {error}".encode() + b'\r\n--frame--\r\n')
+                        return
+                    continue
+
+                if last_seq:
+                    # Frames published while this viewer was busy: backpressure signal
+                    self.controller.record_delivery(frame.seq - last_seq - 1)
+                last_seq = frame.seq
+
+                # Yield frame in multipart format
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame.data + b'\r\n')
+        finally:
+            # Runs when the client disconnects and the response is closed
+            with self.lock:
+                self._viewers -= 1
+            self._unsubscribe()
+
+    def watch_presence(self, keepalive=15.0):
+        """
+        Generator of debounced presence updates for a status stream
+        Yields the current state first, then each transition as it happens,
+        and None every `keepalive` seconds without a transition. A watcher
+        keeps the camera running just like a video viewer; the updates end
+        if the camera fails.
+        """
+        self._subscribe()
+        try:
+            current = self.presence.snapshot()
+            yield current
+            last_seq = current["seq"]
+            while True:
+                transitions = self.presence.wait_for_transition(last_seq, timeout=keepalive)
+                if not transitions:
+                    if self._restart_producer() is not None:
+                        return
+                    yield None
+                    continue
+                for transition in transitions:
+                    last_seq = transition["seq"]
+                    yield transition
+        finally:
+            self._unsubscribe()
+
     def get_face_status(self):
         """
         Get current face detection status
-        Returns: dict with face_detected boolean
+        Returns: dict with the raw per-frame face_detected boolean and the
+        debounced face_present state
         """
         return {
-            "face_detected": self.face_detected
+            "face_detected": self.face_detected,
+            "face_present": self.presence.present
         }
-    
+
+    def get_stats(self):
+        """
+        Detection cadence statistics (detections per second versus frames per
+        second) plus the stream controller's achieved FPS, encode time and bytes/sec
+        """
+        with self.lock:
+            stats = self.scheduler.get_stats()
+        stats["stream"] = self.controller.get_stats()
+        return stats
+
     def release(self):
         """Release camera resources"""
         if self.camera is not None:
@@ -0,0 +1,347 @@
+"""
+Per-Session Face Detection Module
+Analyzes frames captured in the candidate's browser instead of a camera on
+the server. Each interview session gets its own detector state (scheduler,
+presence tracker, lock), so concurrent candidates never share a face flag.
+Detection runs on a bounded worker pool and idle sessions are evicted;
+batches of frames are decoded and detected in a process pool.
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from face_detector import DetectionScheduler, PresenceTracker
+
+logger = logging.getLogger(__name__)
+
+CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+
+class DetectorBusyError(Exception):
+    """The worker pool already has as many frames queued as it accepts"""
+
+
+class InvalidFrameError(ValueError):
+    """The uploaded bytes could not be decoded as an image"""
+
+
+def decode_frame(data: bytes) -> np.ndarray:
+    """Decode JPEG/PNG bytes straight from memory into a grayscale image"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    gray = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE) if buffer.size else None
+    if gray is None:
+        raise InvalidFrameError("Frame is not a decodable image")
+    return gray
+
+
+def _scheduler_settings() -> Dict[str, Any]:
+    return {
+        "detect_every": int(os.environ.get('FACE_DETECT_EVERY', '5')),
+        "motion_threshold": float(os.environ.get('FACE_MOTION_THRESHOLD', '8.0')),
+        "scale": float(os.environ.get('FACE_DETECT_SCALE', '1.0')),
+    }
+
+
+# Cascade owned by each batch worker process (set by _init_batch_worker)
+_worker_cascade = None
+
+
+def _init_batch_worker() -> None:
+    global _worker_cascade
+    # Workers already run in parallel; OpenCV's own thread pool would oversubscribe cores
+    cv2.setNumThreads(1)
+    _worker_cascade = cv2.CascadeClassifier(CASCADE_PATH)
+
+
+def _detect_batch(
+    frames: Sequence[bytes],
+    last_faces: List[Tuple[int, int, int, int]],
+    settings: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, int, int, int]], Tuple[int, int]]:
+    """
+    Batch worker: decode and detect a session's frames in order
+
+    Tracking resumes from the session's last face box, so the ROI path
+    carries across batches. Returns per-frame results (faces or an error),
+    the final face boxes and the (full, roi) detection counts.
+    """
+    scheduler = DetectionScheduler(_worker_cascade, **settings)
+    scheduler.last_faces = list(last_faces)
+    results = []
+    for data in frames:
+        try:
+            gray = decode_frame(data)
+        except InvalidFrameError as e:
+            results.append({"error": str(e)})
+            continue
+        results.append({"faces": [list(face) for face in scheduler.detect(gray)]})
+    return results, scheduler.last_faces, (scheduler.full_detections, scheduler.roi_detections)
+
+
+class SessionDetector:
+    """
+    Detection state for one interview session
+
+    A CascadeClassifier must not be used from two threads at once, so every
+    session owns one; the per-session lock keeps its frames in order while
+    different sessions run in parallel on the pool. batch_lock is held for
+    a whole batch (snapshot, detection, apply) so a session's batches are
+    applied one at a time and in order.
+    """
+
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.batch_lock = threading.Lock()
+        self.scheduler = DetectionScheduler(cv2.CascadeClassifier(CASCADE_PATH), **_scheduler_settings())
+        self.presence = PresenceTracker(
+            absent_after=float(os.environ.get('FACE_ABSENT_AFTER_SECONDS', '1.5')),
+            present_after=float(os.environ.get('FACE_PRESENT_AFTER_SECONDS', '0.5'))
+        )
+        self.last_seen = time.monotonic()
+        self._reported_seq = 0
+
+    def take_transitions(self) -> List[Dict[str, Any]]:
+        """Presence transitions not yet handed out, e.g. for the proctoring log"""
+        with self.lock:
+            transitions = self.presence.wait_for_transition(self._reported_seq, timeout=0)
+            if transitions:
+                self._reported_seq = transitions[-1]["seq"]
+            return transitions
+
+    def analyze_gray(self, gray: np.ndarray, timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Detect faces in one grayscale frame and update the presence state"""
+        with self.lock:
+            faces = self.scheduler.detect(gray)
+            face_detected = len(faces) > 0
+            self.presence.update(face_detected, timestamp if timestamp is not None else time.time())
+            self.last_seen = time.monotonic()
+            return {
+                "face_detected": face_detected,
+                "face_present": self.presence.present,
+                "faces": [list(face) for face in faces],
+            }
+
+    def analyze(self, data: bytes, timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Decode and analyze one compressed frame"""
+        return self.analyze_gray(decode_frame(data), timestamp)
+
+    def apply_batch(
+        self,
+        results: List[Dict[str, Any]],
+        last_faces: List[Tuple[int, int, int, int]],
+        counts: Tuple[int, int],
+        timestamps: Sequence[float]
+    ) -> List[Dict[str, Any]]:
+        """Fold a batch worker's detections into this session's state, in frame order"""
+        with self.lock:
+            self.scheduler.last_faces = last_faces
+            self.scheduler.frames += len(results)
+            self.scheduler.full_detections += counts[0]
+            self.scheduler.roi_detections += counts[1]
+
+            frames = []
+            for index, (result, timestamp) in enumerate(zip(results, timestamps)):
+                if "error" in result:
+                    frames.append({"index": index, "error": result["error"]})
+                    continue
+                face_detected = len(result["faces"]) > 0
+                self.presence.update(face_detected, timestamp)
+                frames.append({
+                    "index": index,
+                    "face_detected": face_detected,
+                    "face_present": self.presence.present,
+                    "faces": result["faces"],
+                })
+            self.last_seen = time.monotonic()
+            return frames
+
+
+class DetectorRegistry:
+    """
+    Session id -> SessionDetector, with a shared bounded worker pool
+
+    OpenCV releases the GIL while decoding and detecting, so a thread pool
+    spreads sessions across cores. At most `max_pending` frames may be
+    queued or running; beyond that submit() fails fast with
+    DetectorBusyError instead of building an unbounded backlog. Sessions
+    with no frames for `idle_timeout` seconds are dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        idle_timeout: float = 300.0,
+        batch_processes: int = 2,
+        max_pending_batches: int = 16
+    ):
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='face-detect')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._batch_processes = batch_processes
+        self._batch_pool = None  # started on first batch
+        self._batch_slots = threading.BoundedSemaphore(max_pending_batches)
+        self._sessions: Dict[int, SessionDetector] = {}
+        self._lock = threading.Lock()
+        self._last_eviction = time.monotonic()
+        self.frames_processed = 0
+        self.batches_processed = 0
+        self.evicted = 0
+
+    def get(self, session_id: int) -> SessionDetector:
+        """Return the session's detector, creating it on first use"""
+        self._evict_idle()
+        with self._lock:
+            detector = self._sessions.get(session_id)
+            if detector is None:
+                detector = self._sessions[session_id] = SessionDetector(session_id)
+            detector.last_seen = time.monotonic()
+            return detector
+
+    def peek(self, session_id: int) -> Optional[SessionDetector]:
+        """Return the session's detector if it exists, without creating one"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def take_transitions(self, session_id: int) -> List[Dict[str, Any]]:
+        """New presence transitions for a session (empty if it has no detector)"""
+        detector = self.peek(session_id)
+        return detector.take_transitions() if detector else []
+
+    def remove(self, session_id: int) -> Optional[SessionDetector]:
+        """Drop a session's detector, e.g. when the interview completes"""
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def submit(self, session_id: int, data: bytes, timestamp: Optional[float] = None) -> Future:
+        """
+        Queue one compressed frame for analysis
+
+        Raises:
+            DetectorBusyError: when the pool is saturated
+        """
+        if not self._slots.acquire(blocking=False):
+            raise DetectorBusyError("Face detection is at capacity, try again shortly")
+        detector = self.get(session_id)
+
+        def run():
+            try:
+                return detector.analyze(data, timestamp)
+            finally:
+                self._slots.release()
+                with self._lock:
+                    self.frames_processed += 1
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _get_batch_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._batch_pool is None:
+                # spawn: forking a process that already runs OpenCV and Flask threads can deadlock
+                self._batch_pool = ProcessPoolExecutor(
+                    max_workers=self._batch_processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_batch_worker
+                )
+            return self._batch_pool
+
+    def process_batch(
+        self,
+        session_id: int,
+        frames: Sequence[bytes],
+        timestamps: Optional[Sequence[float]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Decode and analyze a batch of compressed frames in the process pool
+
+        Blocks the caller (not the pool) until the batch is done. One batch
+        runs in one worker so tracking stays sequential within a session,
+        and a session's batches run one after another (a concurrent upload
+        waits for the previous batch), while batches from different
+        sessions run on separate cores.
+
+        Raises:
+            DetectorBusyError: when too many batches are already queued, or
+                the session's previous batch is still running after `timeout`
+        """
+        if timestamps is None:
+            now = time.time()
+            timestamps = [now] * len(frames)
+        if not self._batch_slots.acquire(blocking=False):
+            raise DetectorBusyError("Face detection is at capacity, try again shortly")
+        pool = None
+        try:
+            detector = self.get(session_id)
+            if not detector.batch_lock.acquire(timeout=-1 if timeout is None else timeout):
+                raise DetectorBusyError("Previous batch for this session is still running")
+            try:
+                with detector.lock:
+                    last_faces = list(detector.scheduler.last_faces)
+                pool = self._get_batch_pool()
+                future = pool.submit(_detect_batch, list(frames), last_faces, _scheduler_settings())
+                results, last_faces, counts = future.result(timeout=timeout)
+                applied = detector.apply_batch(results, last_faces, counts, timestamps)
+            finally:
+                detector.batch_lock.release()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next batch
+            if pool is not None:
+                with self._lock:
+                    if self._batch_pool is pool:
+                        self._batch_pool = None
+                pool.shutdown(wait=False)
+            raise
+        finally:
+            self._batch_slots.release()
+
+        with self._lock:
+            self.batches_processed += 1
+            self.frames_processed += len(frames)
+        return applied
+
+    def _evict_idle(self) -> None:
+        """Drop idle sessions, checking at most once per second"""
+        now = time.monotonic()
+        if now - self._last_eviction < 1.0:
+            return
+        with self._lock:
+            self._last_eviction = now
+            idle = [sid for sid, d in self._sessions.items() if now - d.last_seen > self.idle_timeout]
+            for session_id in idle:
+                del self._sessions[session_id]
+            self.evicted += len(idle)
+        if idle:
+            logger.info(f"Evicted {len(idle)} idle face detector session(s)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "frames_processed": self.frames_processed,
+                "evicted_sessions": self.evicted,
+                "batches_processed": self.batches_processed,
+            }
+
+
+registry = DetectorRegistry(
+    max_workers=int(os.environ.get('FACE_DETECT_WORKERS', str(os.cpu_count() or 4))),
+    max_pending=int(os.environ.get('FACE_DETECT_MAX_PENDING', '64')),
+    idle_timeout=float(os.environ.get('FACE_SESSION_IDLE_SECONDS', '300')),
+    batch_processes=int(os.environ.get('FACE_BATCH_PROCESSES', str(os.cpu_count() or 2))),
+    max_pending_batches=int(os.environ.get('FACE_BATCH_MAX_PENDING', '16'))
+)
@@ -0,0 +1,405 @@
+"""
+LLM Batch Module
+Offline mode for bulk Gemini work (resume screening, feedback re-scoring):
+prompts are collected, submitted as one Batch API job with inlined requests,
+polled until the job finishes and the responses scattered back to the keys
+they were added under. Batch jobs are billed below interactive calls and do
+not count against the interactive rate limits, at the cost of latency
+Set LLM_BATCH_BACKEND=local to run jobs on LocalBatchClient, an in-process
+stand-in that needs no network or API key, e.g. to build and check a
+pipeline offline; its answers come from set_local_responder()
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from google.genai import types
+
+import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+# Requests per inlined batch job; larger collections are split across jobs
+MAX_REQUESTS_PER_JOB = int(os.environ.get('LLM_BATCH_MAX_REQUESTS', '500'))
+POLL_INTERVAL = float(os.environ.get('LLM_BATCH_POLL_SECONDS', '10'))
+MAX_POLL_INTERVAL = float(os.environ.get('LLM_BATCH_MAX_POLL_SECONDS', '60'))
+# 'gemini' submits to the Batch API, 'local' uses LocalBatchClient
+BATCH_BACKEND = os.environ.get('LLM_BATCH_BACKEND', 'gemini')
+
+SUCCEEDED = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_PARTIALLY_SUCCEEDED'}
+TERMINAL = SUCCEEDED | {'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+
+
+class BatchJobError(Exception):
+    """A batch job could not be submitted or did not finish"""
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one request in a batch: a value, or an error message"""
+    value: Any
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Request(NamedTuple):
+    key: Any
+    contents: Any
+    config: Any
+    parse: Optional[Callable[[str], Any]]
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    'jobs_submitted': 0,
+    'jobs_succeeded': 0,
+    'jobs_failed': 0,
+    'requests': 0,
+    'request_errors': 0,
+}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_stats() -> Dict[str, Any]:
+    """Snapshot of batch counters for /api/metrics"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _state(job) -> str:
+    state = job.state
+    return getattr(state, 'value', state) or 'JOB_STATE_UNSPECIFIED'
+
+
+class LLMBatch:
+    """
+    Prompts collected for one batch submission
+
+    add() requests under caller-chosen keys, then run() (or submit() and
+    wait()) returns {key: BatchResult}. `parse` is applied to each
+    response's text as in llm_gateway.generate; a parse failure becomes
+    that request's error instead of failing the batch.
+    """
+
+    def __init__(self, model: str = "gemini-2.5-flash", client: Any = None, display_name: str = 'interview-assistant'):
+        self.model = model
+        self.client = client or default_client()
+        self.display_name = display_name
+        self.requests: List[_Request] = []
+        self.job_names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def add(self, key: Any, contents: Any, config: Any = None, parse: Optional[Callable[[str], Any]] = None) -> None:
+        self.requests.append(_Request(key, contents, config, parse))
+
+    def _chunks(self) -> List[List[_Request]]:
+        size = max(1, MAX_REQUESTS_PER_JOB)
+        return [self.requests[i:i + size] for i in range(0, len(self.requests), size)]
+
+    def _create(self, chunk: List[_Request], part: int) -> str:
+        src = [
+            types.InlinedRequest(contents=r.contents, config=r.config, metadata={'index': str(i)})
+            for i, r in enumerate(chunk)
+        ]
+        last_error: Optional[Exception] = None
+        for attempt in range(1, llm_gateway.retry_policy.max_attempts + 1):
+            if attempt > 1:
+                time.sleep(llm_gateway.retry_policy.backoff(attempt - 1))
+            try:
+                job = self.client.batches.create(
+                    model=self.model,
+                    src=src,
+                    config=types.CreateBatchJobConfig(display_name=f'{self.display_name}-{part}')
+                )
+            except Exception as e:
+                if not llm_gateway.is_retryable(e):
+                    raise BatchJobError(f"Batch job was rejected: {e}") from e
+                last_error = e
+                logger.warning(f"Batch job submission failed (attempt {attempt}): {e}")
+                continue
+            _count('jobs_submitted')
+            _count('requests', len(chunk))
+            logger.info(f"Submitted batch job {job.name} with {len(chunk)} requests")
+            return job.name
+        raise BatchJobError(f"Batch job submission failed after retries: {last_error}")
+
+    def submit(self) -> List[str]:
+        """Submit every collected request (one job per MAX_REQUESTS_PER_JOB); returns the job names"""
+        if self.job_names:
+            raise BatchJobError("Batch was already submitted")
+        self.job_names = [self._create(chunk, part) for part, chunk in enumerate(self._chunks())]
+        return self.job_names
+
+    def attach(self, *job_names: str) -> None:
+        """
+        Resume waiting on jobs submitted earlier (e.g. by a process that exited)
+
+        The batch must hold the same requests, in the same order, as the one
+        that submitted them; only their keys and parsers are used.
+        """
+        if self.job_names:
+            raise BatchJobError("Batch was already submitted")
+        if len(job_names) != len(self._chunks()):
+            raise BatchJobError(f"{len(job_names)} jobs given for {len(self._chunks())} chunks of requests")
+        self.job_names = list(job_names)
+
+    def _poll(self, name: str, deadline: Optional[float], poll_interval: float):
+        interval = poll_interval
+        while True:
+            job = self.client.batches.get(name=name)
+            state = _state(job)
+            if state in TERMINAL:
+                return job
+            if deadline is not None and time.monotonic() + interval > deadline:
+                raise BatchJobError(f"Batch job {name} did not finish in time (state {state})")
+            time.sleep(interval)
+            interval = min(MAX_POLL_INTERVAL, interval * 1.5)
+
+    def _scatter(self, job, chunk: List[_Request], results: Dict[Any, BatchResult]) -> None:
+        state = _state(job)
+        if state not in SUCCEEDED:
+            _count('jobs_failed')
+            error = f"Batch job {job.name} ended in {state}"
+            if job.error and job.error.message:
+                error += f": {job.error.message}"
+            logger.error(error)
+            for request in chunk:
+                results[request.key] = BatchResult(None, error)
+            return
+
+        _count('jobs_succeeded')
+        responses = list((job.dest and job.dest.inlined_responses) or [])
+        # Responses echo the request's metadata index; without it, fall back to position
+        by_index = {}
+        for position, inlined in enumerate(responses):
+            index = (inlined.metadata or {}).get('index')
+            by_index[int(index) if index is not None and index.isdigit() else position] = inlined
+        for index, request in enumerate(chunk):
+            inlined = by_index.get(index)
+            if inlined is None or inlined.error or inlined.response is None:
+                message = inlined.error.message if inlined is not None and inlined.error else "No response"
+                results[request.key] = BatchResult(None, message or "Request failed")
+                continue
+            if request.parse is None:
+                results[request.key] = BatchResult(inlined.response)
+                continue
+            try:
+                if not inlined.response.text:
+                    raise ValueError("Empty response from model")
+                results[request.key] = BatchResult(request.parse(inlined.response.text))
+            except ValueError as e:
+                results[request.key] = BatchResult(None, f"Unparseable response: {e}")
+
+        _count('request_errors', sum(1 for r in chunk if not results[r.key].ok))
+
+    def wait(self, timeout: Optional[float] = None, poll_interval: Optional[float] = None) -> Dict[Any, BatchResult]:
+        """
+        Poll the submitted jobs until they finish and map results back to keys
+
+        A job that fails, expires or is cancelled turns each of its requests
+        into an error result.
+
+        Raises:
+            BatchJobError: when `timeout` seconds pass first
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        results: Dict[Any, BatchResult] = {}
+        for name, chunk in zip(self.job_names, self._chunks()):
+            job = self._poll(name, deadline, poll_interval or POLL_INTERVAL)
+            self._scatter(job, chunk, results)
+        return results
+
+    def run(self, timeout: Optional[float] = None, poll_interval: Optional[float] = None) -> Dict[Any, BatchResult]:
+        """submit() then wait(); an empty batch returns immediately"""
+        if not self.requests:
+            return {}
+        self.submit()
+        return self.wait(timeout=timeout, poll_interval=poll_interval)
+
+
+class BatchCollector:
+    """
+    Gathers requests from many callers into shared batch jobs
+
+    A batch is flushed once `max_size` requests are queued or the oldest
+    has waited `max_wait` seconds. The flushed batch is submitted, polled
+    and handed to `handler(key, BatchResult)` request by request on
+    `runner` (e.g. background.submit, so the handler has an app context).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any, BatchResult], None],
+        model: str = "gemini-2.5-flash",
+        max_size: int = 50,
+        max_wait: float = 300.0,
+        runner: Optional[Callable[..., Any]] = None,
+        client: Any = None
+    ):
+        self.handler = handler
+        self.model = model
+        self.client = client
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.runner = runner or self._run_in_thread
+        self._pending: List[_Request] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _run_in_thread(fn, *args):
+        threading.Thread(target=fn, args=args, daemon=True, name='llm-batch').start()
+
+    def add(self, key: Any, contents: Any, config: Any = None, parse: Optional[Callable[[str], Any]] = None) -> None:
+        with self._lock:
+            self._pending.append(_Request(key, contents, config, parse))
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Submit everything queued so far as one batch"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            self.runner(self._process, pending)
+
+    def _process(self, pending: List[_Request]) -> None:
+        batch = LLMBatch(self.model, client=self.client)
+        batch.requests = pending
+        try:
+            results = batch.run()
+        except BatchJobError as e:
+            logger.error(f"Batch of {len(pending)} requests failed: {e}")
+            results = {r.key: BatchResult(None, str(e)) for r in pending}
+        for request in pending:
+            try:
+                self.handler(request.key, results[request.key])
+            except Exception:
+                logger.exception(f"Batch result handler failed for {request.key!r}")
+
+
+class LocalBatchClient:
+    """
+    In-process stand-in for the Gemini Batch API
+
+    Exposes client.batches.create/get/cancel with the SDK's types. Each
+    job moves from queued to running to succeeded on a worker thread after
+    `delay` seconds, answering every request with `respond(model, contents,
+    config) -> text`; a responder that raises fails just that request.
+    Nothing is sent over the network, so there is no default responder:
+    create() raises BatchJobError until one is set. fail() ends a job in
+    a failed, expired or cancelled state, as the real service can.
+    """
+
+    def __init__(self, respond: Optional[Callable[[str, Any, Any], str]] = None, delay: float = 0.0):
+        self.respond = respond
+        self.delay = delay
+        self._jobs: Dict[str, types.BatchJob] = {}
+        self._lock = threading.Lock()
+        self.batches = self
+
+    def create(self, *, model: str, src: List[Any], config: Any = None) -> types.BatchJob:
+        if self.respond is None:
+            raise BatchJobError("LocalBatchClient has no responder (see llm_batch.set_local_responder)")
+        name = f'batches/local-{uuid.uuid4().hex[:12]}'
+        if isinstance(config, dict):
+            config = types.CreateBatchJobConfig(**config)
+        job = types.BatchJob(
+            name=name,
+            display_name=config.display_name if config else None,
+            model=model,
+            state=types.JobState.JOB_STATE_QUEUED
+        )
+        with self._lock:
+            self._jobs[name] = job
+        requests = [types.InlinedRequest.model_validate(r) if isinstance(r, dict) else r for r in src]
+        threading.Thread(target=self._execute, args=(name, model, requests, self.respond), daemon=True).start()
+        return job.model_copy()
+
+    def _execute(self, name: str, model: str, src: List[Any], respond: Callable[[str, Any, Any], str]) -> None:
+        time.sleep(self.delay / 2)
+        with self._lock:
+            if _state(self._jobs[name]) in TERMINAL:
+                return
+            self._jobs[name] = self._jobs[name].model_copy(update={'state': types.JobState.JOB_STATE_RUNNING})
+        responses = []
+        for request in src:
+            try:
+                text = respond(model, request.contents, request.config)
+                responses.append(types.InlinedResponse(metadata=request.metadata, response=types.GenerateContentResponse(
+                    candidates=[types.Candidate(content=types.Content(role='model', parts=[types.Part(text=text)]))]
+                )))
+            except Exception as e:
+                responses.append(types.InlinedResponse(metadata=request.metadata, error=types.JobError(message=str(e))))
+        time.sleep(self.delay / 2)
+        with self._lock:
+            if _state(self._jobs[name]) in TERMINAL:
+                return
+            self._jobs[name] = self._jobs[name].model_copy(update={
+                'state': types.JobState.JOB_STATE_SUCCEEDED,
+                'dest': types.BatchJobDestination(inlined_responses=responses),
+            })
+
+    def _set(self, name: str, **fields) -> None:
+        with self._lock:
+            self._jobs[name] = self._jobs[name].model_copy(update=fields)
+
+    def get(self, *, name: str, config: Any = None) -> types.BatchJob:
+        with self._lock:
+            if name not in self._jobs:
+                raise BatchJobError(f"Unknown batch job {name}")
+            return self._jobs[name].model_copy()
+
+    def cancel(self, *, name: str, config: Any = None) -> None:
+        self._set(name, state=types.JobState.JOB_STATE_CANCELLED)
+
+    def fail(self, name: str, state: str = 'JOB_STATE_FAILED', message: Optional[str] = None) -> None:
+        """End a job unsuccessfully (failed, expired or cancelled); its requests get no responses"""
+        self._set(name, state=types.JobState(state), error=types.JobError(message=message) if message else None)
+
+
+_local_client: Optional[LocalBatchClient] = None
+_local_lock = threading.Lock()
+
+
+def local_client() -> LocalBatchClient:
+    """The process-wide LocalBatchClient"""
+    global _local_client
+    with _local_lock:
+        if _local_client is None:
+            _local_client = LocalBatchClient()
+        return _local_client
+
+
+def set_local_responder(respond: Optional[Callable[[str, Any, Any], str]], delay: float = 0.0) -> None:
+    """Answer local batch requests with respond(model, contents, config) -> text (None to unset)"""
+    client = local_client()
+    client.respond = respond
+    client.delay = delay
+
+
+def default_client():
+    """The shared Gemini client, or the process-wide LocalBatchClient when LLM_BATCH_BACKEND=local"""
+    if BATCH_BACKEND == 'local':
+        return local_client()
+    return llm_gateway._default_client()
@@ -0,0 +1,298 @@
+"""
+LLM Response Cache Module
+Two-tier cache of Gemini response text in front of llm_gateway.generate:
+an in-process LRU (bounded by bytes) and a table in the application database
+shared by every worker process
+Entries are keyed on a hash of model, contents, config and temperature and
+expire after LLM_CACHE_TTL_SECONDS; the database tier is pruned back under
+LLM_CACHE_DB_BYTES, oldest-used first
+Callers whose output should vary between identical prompts pass cache=False
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from flask import has_app_context
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get('LLM_CACHE_ENABLED', '1') == '1'
+TTL_SECONDS = float(os.environ.get('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+MEMORY_BYTES = int(os.environ.get('LLM_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+DB_BYTES = int(os.environ.get('LLM_CACHE_DB_BYTES', str(256 * 1024 * 1024)))
+# The database tier is pruned once every this many stores
+PRUNE_EVERY = int(os.environ.get('LLM_CACHE_PRUNE_EVERY', '100'))
+# A single response larger than this is never cached
+MAX_ENTRY_BYTES = int(os.environ.get('LLM_CACHE_MAX_ENTRY_BYTES', str(1024 * 1024)))
+# Bump to invalidate every entry written by older code
+KEY_VERSION = 1
+
+
+class UncacheableRequest(TypeError):
+    """The request holds a value that cannot be hashed into a stable cache key"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        # Response schema classes: key on the schema itself so editing it invalidates entries
+        return {'__schema__': value.__qualname__, 'json_schema': value.model_json_schema()}
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=True)
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': hashlib.sha256(value).hexdigest()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if hasattr(value, 'value') and isinstance(getattr(value, 'value'), (str, int)):
+        return value.value  # Enums
+    raise UncacheableRequest(f"Cannot build a cache key from {type(value).__name__}")
+
+
+def cache_key(model: str, contents: Any, config: Any = None) -> str:
+    """SHA-256 of the request; raises UncacheableRequest for values without a stable form"""
+    temperature = getattr(config, 'temperature', None)
+    if isinstance(config, dict):
+        temperature = config.get('temperature')
+    payload = json.dumps(
+        {'v': KEY_VERSION, 'model': model, 'contents': contents, 'config': config, 'temperature': temperature},
+        default=_json_default, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU of text values bounded by total UTF-8 size, with per-entry expiry"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, int, datetime]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            text, size, expires_at = entry
+            if expires_at <= datetime.utcnow():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str, expires_at: datetime) -> int:
+        """Store a value; returns how many entries were evicted to make room"""
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (text, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, dropped, _) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+                evicted += 1
+        return evicted
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+memory = LRUCache(MEMORY_BYTES)
+
+_stats_lock = threading.Lock()
+_stats = {
+    'memory_hits': 0,
+    'db_hits': 0,
+    'misses': 0,
+    'stores': 0,
+    'bypassed': 0,
+    'invalidated': 0,
+    'memory_evictions': 0,
+    'db_evictions': 0,
+    'errors': 0,
+}
+_stores_since_prune = 0
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def count_bypassed() -> None:
+    """Record a generate call that skipped the cache"""
+    _count('bypassed')
+
+
+def get_stats() -> Dict[str, Any]:
+    """Snapshot of cache counters for /api/metrics"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+    stats['hit_rate'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 4) if lookups else 0.0
+    stats['memory_entries'] = len(memory)
+    stats['memory_bytes'] = memory.bytes
+    stats['enabled'] = ENABLED
+    return stats
+
+
+def _db_session():
+    """A session on its own connection, so cache writes never commit the caller's transaction"""
+    from sqlalchemy.orm import Session
+    from models import db
+    return Session(db.engine)
+
+
+def lookup(key: str) -> Optional[str]:
+    """Cached response text for key, from memory or the database tier"""
+    text = memory.get(key)
+    if text is not None:
+        _count('memory_hits')
+        return text
+
+    if has_app_context():
+        from models import LLMCacheEntry
+        try:
+            with _db_session() as session:
+                entry = session.query(LLMCacheEntry).filter_by(key=key).first()
+                now = datetime.utcnow()
+                if entry is not None and entry.expires_at > now:
+                    text = entry.response
+                    memory.put(key, text, entry.expires_at)
+                    _count('db_hits')
+                    try:
+                        # Usage bookkeeping for pruning; the hit stands even if this write fails
+                        entry.hits = (entry.hits or 0) + 1
+                        entry.last_used_at = now
+                        session.commit()
+                    except Exception as e:
+                        logger.debug(f"LLM cache hit not recorded: {e}")
+                    return text
+        except Exception as e:
+            _count('errors')
+            logger.warning(f"LLM cache lookup failed: {e}")
+
+    _count('misses')
+    return None
+
+
+def store(key: str, text: str, model: str) -> None:
+    """Cache response text in both tiers (the database tier needs an app context)"""
+    global _stores_since_prune
+    size = len(text.encode('utf-8'))
+    if not text or size > MAX_ENTRY_BYTES:
+        return
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=TTL_SECONDS)
+    _count('memory_evictions', memory.put(key, text, expires_at))
+    _count('stores')
+
+    if not has_app_context():
+        return
+    from models import LLMCacheEntry
+    try:
+        with _db_session() as session:
+            entry = session.query(LLMCacheEntry).filter_by(key=key).first()
+            if entry is None:
+                entry = LLMCacheEntry(key=key, created_at=now)
+                session.add(entry)
+            entry.model = model
+            entry.response = text
+            entry.size = size
+            entry.expires_at = expires_at
+            entry.last_used_at = now
+            session.commit()
+    except Exception as e:
+        # Most likely a concurrent store of the same key; memory still has it
+        _count('errors')
+        logger.warning(f"LLM cache store failed: {e}")
+        return
+
+    with _stats_lock:
+        _stores_since_prune += 1
+        due = _stores_since_prune >= PRUNE_EVERY
+        if due:
+            _stores_since_prune = 0
+    if due:
+        try:
+            prune()
+        except Exception as e:
+            _count('errors')
+            logger.warning(f"LLM cache prune failed: {e}")
+
+
+def invalidate(key: str) -> None:
+    """Drop an entry from both tiers (e.g. a cached response the caller could not parse)"""
+    memory.discard(key)
+    _count('invalidated')
+    if not has_app_context():
+        return
+    from models import LLMCacheEntry
+    try:
+        with _db_session() as session:
+            session.query(LLMCacheEntry).filter_by(key=key).delete()
+            session.commit()
+    except Exception as e:
+        _count('errors')
+        logger.warning(f"LLM cache invalidate failed: {e}")
+
+
+def prune(max_bytes: Optional[int] = None) -> int:
+    """Delete expired database entries, then least recently used ones over the byte budget"""
+    from sqlalchemy import func
+    from models import LLMCacheEntry
+
+    max_bytes = DB_BYTES if max_bytes is None else max_bytes
+    with _db_session() as session:
+        removed = session.query(LLMCacheEntry).filter(
+            LLMCacheEntry.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        excess = (session.query(func.coalesce(func.sum(LLMCacheEntry.size), 0)).scalar() or 0) - max_bytes
+        if excess > 0:
+            victims = []
+            rows = session.query(LLMCacheEntry.id, LLMCacheEntry.size).order_by(
+                LLMCacheEntry.last_used_at.asc()
+            ).yield_per(500)
+            for entry_id, size in rows:
+                if excess <= 0:
+                    break
+                victims.append(entry_id)
+                excess -= size
+            for start in range(0, len(victims), 500):
+                session.query(LLMCacheEntry).filter(
+                    LLMCacheEntry.id.in_(victims[start:start + 500])
+                ).delete(synchronize_session=False)
+            removed += len(victims)
+            _count('db_evictions', len(victims))
+        session.commit()
+    if removed:
+        logger.info(f"LLM cache pruned {removed} entries")
+    return removed
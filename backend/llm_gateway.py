@@ -0,0 +1,365 @@
+"""
+LLM Gateway Module
+Single entry point for every Gemini call: shares the gemini.client connection
+pool and applies a token-bucket rate limiter, a jittered retry policy and a
+circuit breaker that fails fast while Gemini is overloaded
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+from google.genai import errors
+
+import llm_cache
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes that signal a transient Gemini problem worth retrying
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(Exception):
+    """Gemini could not serve the call (breaker open, rate limited or retries exhausted)"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting at most `timeout` seconds; False if none became free"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker
+
+    After `failure_threshold` consecutive transient failures the breaker opens
+    and rejects calls for `reset_timeout` seconds, then lets a single probe
+    through; a successful probe closes it again. Calls whose outcome says
+    nothing about Gemini's health are recorded as neutral.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self.state = self.CLOSED
+
+    def record_neutral(self) -> None:
+        """Release a half-open probe without changing the state or failure count"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Gemini circuit breaker opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and a total deadline"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, deadline: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Classify an SDK/transport exception as transient"""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+rate_limiter = TokenBucket(
+    rate=float(os.environ.get('GEMINI_RATE_LIMIT_PER_SEC', '5')),
+    capacity=float(os.environ.get('GEMINI_RATE_BURST', '10'))
+)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get('GEMINI_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('GEMINI_BREAKER_RESET_SECONDS', '30'))
+)
+retry_policy = RetryPolicy(
+    max_attempts=int(os.environ.get('GEMINI_MAX_ATTEMPTS', '3')),
+    base_delay=float(os.environ.get('GEMINI_RETRY_BASE_DELAY', '0.5')),
+    max_delay=float(os.environ.get('GEMINI_RETRY_MAX_DELAY', '4')),
+    deadline=float(os.environ.get('GEMINI_CALL_DEADLINE', '60'))
+)
+# Longest a caller waits for a rate-limiter token before giving up
+RATE_LIMIT_WAIT = float(os.environ.get('GEMINI_RATE_LIMIT_WAIT', '10'))
+
+_stats_lock = threading.Lock()
+_stats = {
+    'calls': 0,
+    'successes': 0,
+    'retries': 0,
+    'transient_failures': 0,
+    'parse_failures': 0,
+    'rate_limited': 0,
+    'short_circuited': 0,
+}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats() -> Dict[str, Any]:
+    """Snapshot of gateway counters for /api/metrics"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['circuit_state'] = circuit_breaker.state
+    return stats
+
+
+def _default_client():
+    from gemini import client
+    return client
+
+
+def _cache_key(model: str, contents: Any, config: Any) -> Optional[str]:
+    """Response cache key, or None when caching is off or the request has no stable key"""
+    if not llm_cache.ENABLED:
+        return None
+    try:
+        return llm_cache.cache_key(model, contents, config)
+    except (llm_cache.UncacheableRequest, ValueError) as e:
+        logger.debug(f"Request not cacheable: {e}")
+        return None
+
+
+def _cached_result(key: str, parse: Callable[[str], Any]) -> Any:
+    """parse() of the cached response text for key, or None on a miss"""
+    text = llm_cache.lookup(key)
+    if text is None:
+        return None
+    try:
+        return parse(text)
+    except ValueError as e:
+        # Cached under an older parser or schema; the caller makes a fresh call
+        logger.warning(f"Discarding unparseable cached response: {e}")
+        llm_cache.invalidate(key)
+        return None
+
+
+def cached(
+    contents: Any,
+    parse: Callable[[str], Any],
+    model: str = "gemini-2.5-flash",
+    config: Any = None
+) -> Any:
+    """
+    The cached result generate() would return for this request, without
+    calling Gemini; None when nothing usable is cached
+    """
+    key = _cache_key(model, contents, config)
+    return None if key is None else _cached_result(key, parse)
+
+
+def generate(
+    contents: Any,
+    model: str = "gemini-2.5-flash",
+    config: Any = None,
+    parse: Optional[Callable[[str], Any]] = None,
+    client: Any = None,
+    max_attempts: Optional[int] = None,
+    cache: bool = True
+) -> Any:
+    """
+    Call generate_content through the response cache, rate limiter, breaker
+    and retry policy
+
+    Args:
+        contents/model/config: passed to client.models.generate_content
+        parse: optional function applied to response.text; a ValueError
+               (including JSON/pydantic errors) counts as a failed attempt
+               and is retried without tripping the breaker
+        client: genai client override (defaults to the shared gemini.client)
+        max_attempts: override the policy's attempt count
+        cache: serve and store the response text in llm_cache; pass False
+               where identical prompts must still produce fresh output or
+               never repeat (feedback, bank top-ups, prompts carrying a
+               user's avoid list). Only calls with a parse function are cached
+
+    Returns:
+        parse(response.text) when parse is given, otherwise the raw response
+
+    Raises:
+        LLMUnavailableError: when no attempt succeeded
+        errors.APIError: for non-retryable API errors (bad request, auth)
+    """
+    key = _cache_key(model, contents, config) if cache and parse is not None else None
+    if key is None:
+        llm_cache.count_bypassed()
+    else:
+        result = _cached_result(key, parse)
+        if result is not None:
+            return result
+
+    client = client or _default_client()
+    attempts = max_attempts or retry_policy.max_attempts
+    deadline = time.monotonic() + retry_policy.deadline
+    last_error: Optional[Exception] = None
+
+    _count('calls')
+    for attempt in range(1, attempts + 1):
+        if attempt > 1:
+            delay = retry_policy.backoff(attempt - 1)
+            if time.monotonic() + delay >= deadline:
+                break
+            _count('retries')
+            time.sleep(delay)
+
+        if not circuit_breaker.allow():
+            _count('short_circuited')
+            raise LLMUnavailableError("Gemini is temporarily overloaded (circuit open)")
+
+        if not rate_limiter.acquire(timeout=min(RATE_LIMIT_WAIT, max(0.0, deadline - time.monotonic()))):
+            circuit_breaker.record_neutral()
+            _count('rate_limited')
+            raise LLMUnavailableError("Gemini rate limit reached, try again shortly")
+
+        try:
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+        except Exception as e:
+            if not is_retryable(e):
+                # Caller errors say nothing about Gemini health
+                circuit_breaker.record_neutral()
+                raise
+            circuit_breaker.record_failure()
+            _count('transient_failures')
+            last_error = e
+            logger.warning(f"Gemini call failed (attempt {attempt}/{attempts}): {e}")
+            continue
+
+        circuit_breaker.record_success()
+
+        if parse is None:
+            _count('successes')
+            return response
+
+        try:
+            if not response.text:
+                raise ValueError("Empty response from model")
+            result = parse(response.text)
+        except ValueError as e:
+            _count('parse_failures')
+            last_error = e
+            logger.warning(f"Unparseable Gemini response (attempt {attempt}/{attempts}): {e}")
+            continue
+
+        _count('successes')
+        if key is not None:
+            llm_cache.store(key, response.text, model)
+        return result
+
+    raise LLMUnavailableError(f"Gemini call failed after retries: {last_error}")
+
+
+def stream(
+    contents: Any,
+    model: str = "gemini-2.5-flash",
+    config: Any = None,
+    client: Any = None
+) -> Iterator[str]:
+    """
+    Stream response text chunks through the rate limiter and breaker
+
+    Streams are not retried: text already handed to the caller can't be
+    taken back, so a failure mid-stream is raised to the caller.
+    """
+    client = client or _default_client()
+
+    _count('calls')
+    if not circuit_breaker.allow():
+        _count('short_circuited')
+        raise LLMUnavailableError("Gemini is temporarily overloaded (circuit open)")
+
+    if not rate_limiter.acquire(timeout=RATE_LIMIT_WAIT):
+        circuit_breaker.record_neutral()
+        _count('rate_limited')
+        raise LLMUnavailableError("Gemini rate limit reached, try again shortly")
+
+    try:
+        for chunk in client.models.generate_content_stream(model=model, contents=contents, config=config):
+            if chunk.text:
+                yield chunk.text
+    except GeneratorExit:
+        # Caller stopped reading early
+        circuit_breaker.record_neutral()
+        raise
+    except Exception as e:
+        if not is_retryable(e):
+            circuit_breaker.record_neutral()
+            raise
+        circuit_breaker.record_failure()
+        _count('transient_failures')
+        raise LLMUnavailableError(f"Gemini stream failed: {e}") from e
+
+    circuit_breaker.record_success()
+    _count('successes')
@@ -33,11 +33,177 @@ class InterviewSession(db.Model):
     resume_summary = db.Column(db.Text)  # AI-generated summary of resume
     
     questions = db.Column(db.Text)  # JSON string of questions
-    answers = db.Column(db.Text)  # JSON string of answers
+    answers = db.Column(db.Text)  # Legacy JSON string of answers; new answers live in InterviewAnswer
     feedback = db.Column(db.Text)  # JSON string of feedback
-    status = db.Column(db.String(20), default='active')  # 'active', 'completed'
+    status = db.Column(db.String(20), default='active')  # 'active', 'scoring', 'scoring_failed', 'completed'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime)  # When the candidate finished; feedback may come much later
     completed_at = db.Column(db.DateTime)
     
     def __repr__(self):
         return f'<InterviewSession {self.id} - {self.mode} - {self.status}>'
+
+
+class InterviewAnswer(db.Model):
+    """One answer per (session, question index); replaces the InterviewSession.answers blob"""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('interview_session.id'), nullable=False)
+    question_index = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # The unique index also serves "all answers for a session" lookups
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'question_index', name='uq_interview_answer_session_question'),
+    )
+    
+    @classmethod
+    def upsert(cls, session_id, question_index, text):
+        """Insert or overwrite a single answer in one statement (no read-modify-write)"""
+        values = {
+            'session_id': session_id,
+            'question_index': question_index,
+            'text': text,
+            'updated_at': datetime.utcnow()
+        }
+        dialect = db.engine.dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(cls).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=['session_id', 'question_index'],
+                set_={'text': statement.excluded.text, 'updated_at': statement.excluded.updated_at}
+            )
+            db.session.execute(statement)
+        else:
+            existing = cls.query.filter_by(session_id=session_id, question_index=question_index).first()
+            if existing is None:
+                db.session.add(cls(**values))
+            else:
+                existing.text = text
+                existing.updated_at = values['updated_at']
+    
+    def __repr__(self):
+        return f'<InterviewAnswer {self.session_id}#{self.question_index}>'
+
+
+class ResumeAnalysisJob(db.Model):
+    """Queued/background resume analysis, polled via /api/resume-analysis/<id>"""
+    id = db.Column(db.String(36), primary_key=True)  # uuid4 hex string
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)  # stored upload name
+    content_hash = db.Column(db.String(64))  # SHA-256 of the upload, for the analysis cache
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'running', 'completed', 'failed'
+    stage = db.Column(db.String(40))  # current analyzer stage
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    result = db.Column(db.Text)  # JSON string of analyze_resume_file result
+    error = db.Column(db.Text)
+    fallback_keywords = db.Column(db.Text)  # JSON list from basic keyword extraction, set when the job fails
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ResumeAnalysisJob {self.id} - {self.status}>'
+
+
+class ResumeAnalysisCache(db.Model):
+    """Resume analysis results keyed by SHA-256 of the uploaded PDF bytes"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # hex SHA-256 of file bytes
+    analyzer_version = db.Column(db.String(40), nullable=False)  # resume_analyzer.analyzer_version()
+    analysis = db.Column(db.Text, nullable=False)  # JSON string of analyze_resume_file result
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'analyzer_version', name='uq_resume_cache_hash_version'),
+    )
+    
+    def __repr__(self):
+        return f'<ResumeAnalysisCache {self.content_hash[:12]} v{self.analyzer_version}>'
+
+
+class ProctoringLog(db.Model):
+    """Face presence timeline of one interview, run-length encoded (see proctoring.PresenceTimeline)"""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('interview_session.id'), nullable=False, unique=True)
+    timeline = db.Column(db.LargeBinary, nullable=False)  # PresenceTimeline.to_bytes()
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ProctoringLog {self.session_id} ({len(self.timeline)} bytes)>'
+
+
+class BankQuestion(db.Model):
+    """Pre-generated role-mode question, shared by every session with the same (role, difficulty)"""
+    id = db.Column(db.Integer, primary_key=True)
+    role_key = db.Column(db.String(100), nullable=False)  # question_bank.normalize_role(role)
+    difficulty = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(40), nullable=False)  # 'hr_questions', 'technical_questions', 'cultural_questions'
+    text = db.Column(db.Text, nullable=False)
+    text_hash = db.Column(db.String(40), nullable=False)  # SHA-1 of the normalized text, for de-duplication
+    served_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('role_key', 'difficulty', 'category', 'text_hash', name='uq_bank_question_text'),
+    )
+    
+    def __repr__(self):
+        return f'<BankQuestion {self.id} {self.role_key}/{self.difficulty}/{self.category}>'
+
+
+class ServedQuestion(db.Model):
+    """A bank question already given to a user, so it is not drawn for them again"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('bank_question.id'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('interview_session.id'))
+    served_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # The unique index also serves "questions this user has seen" lookups
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='uq_served_question_user_question'),
+    )
+    
+    def __repr__(self):
+        return f'<ServedQuestion {self.user_id}:{self.question_id}>'
+
+
+class QuestionEmbedding(db.Model):
+    """Cached embedding of a question text from a remote embedder (see question_index)"""
+    id = db.Column(db.Integer, primary_key=True)
+    text_hash = db.Column(db.String(40), nullable=False)  # question_index.question_hash(text)
+    embedder = db.Column(db.String(40), nullable=False)
+    dim = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32, unit length
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('text_hash', 'embedder', 'dim', name='uq_question_embedding'),
+    )
+    
+    def __repr__(self):
+        return f'<QuestionEmbedding {self.embedder}/{self.dim} {self.text_hash[:8]}>'
+
+
+class LLMCacheEntry(db.Model):
+    """Cached Gemini response text, shared by every worker process (see llm_cache)"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), nullable=False, unique=True)  # llm_cache.cache_key(...)
+    model = db.Column(db.String(80))
+    response = db.Column(db.Text, nullable=False)
+    size = db.Column(db.Integer, nullable=False)  # UTF-8 bytes of response, for the size budget
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<LLMCacheEntry {self.key[:12]} ({self.size} bytes)>'
@@ -0,0 +1,572 @@
+"""
+PDF Text Extraction Module
+Page-level text extraction for resumes: pages are yielded in order as soon as
+they are extracted, long documents are split across a process pool, and
+extraction stops once a character budget is reached
+Extraction goes through pluggable backends (pdfplumber, pypdf and a raw
+content-stream fast path), chosen per document by file size and page count;
+the raw fast path only reads pages whose fonts are simple Latin-1 encodings
+Each page records how long it took, so slow documents can be diagnosed
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, NamedTuple, Optional, Type
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Documents with at least this many pages are extracted in the process pool
+PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '8'))
+# Pages handed to a worker per task
+PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', '4'))
+PDF_WORKERS = int(os.environ.get('PDF_EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Stop extracting once this many characters were collected (0 = no limit).
+# Skill matching scans all extracted text, so this is far above the 4000
+# characters sent to the LLM; it only bounds pathological documents.
+DEFAULT_CHAR_BUDGET = int(os.environ.get('PDF_TEXT_CHAR_BUDGET', '200000'))
+# 'auto' picks per document; or force 'pdfplumber', 'pypdf' or 'raw'
+DEFAULT_BACKEND = os.environ.get('PDF_EXTRACTION_BACKEND', 'auto')
+# In auto mode, documents at least this large (bytes) or long (pages) skip
+# pdfplumber's layout analysis and use FAST_PATH_BACKEND: 'pypdf' (decodes
+# every font) or, opt-in, 'raw' (faster; pages with fonts it cannot decode
+# still go through pypdf)
+FAST_PATH_MIN_BYTES = int(os.environ.get('PDF_FAST_PATH_MIN_BYTES', str(1024 * 1024)))
+FAST_PATH_MIN_PAGES = int(os.environ.get('PDF_FAST_PATH_MIN_PAGES', '4'))
+FAST_PATH_BACKEND = os.environ.get('PDF_FAST_PATH_BACKEND', 'pypdf')
+
+
+class PageText(NamedTuple):
+    """Text of one page"""
+    number: int  # 0-based page index
+    text: str
+    seconds: float  # extraction time for this page
+
+
+class ExtractionResult(NamedTuple):
+    """Joined text of a document plus per-page details"""
+    text: str
+    pages: List[PageText]
+    page_count: int  # pages in the document, including ones not extracted
+    truncated: bool  # stopped early at the character budget
+    seconds: float
+    backend: str  # backend selected for the document
+
+
+class ExtractionBackend(ABC):
+    """
+    One way of turning PDF pages into text
+
+    An instance is opened on one document. extract_page() may raise, in
+    which case the page is retried with the fallback backend.
+    """
+
+    name = ''
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+
+    @property
+    @abstractmethod
+    def page_count(self) -> int:
+        ...
+
+    @abstractmethod
+    def extract_page(self, number: int) -> str:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """Layout-aware extraction; best fidelity, slowest"""
+
+    name = 'pdfplumber'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        self._pdf = pdfplumber.open(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages)
+
+    def extract_page(self, number: int) -> str:
+        page = self._pdf.pages[number]
+        text = page.extract_text() or ""
+        # Drop the page's parsed layout objects; long documents otherwise keep them all
+        page.close()
+        return text
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+def _pdf_reader_class():
+    """pypdf if installed, else its predecessor PyPDF2 (same reader API)"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+    return PdfReader
+
+
+class PypdfBackend(ExtractionBackend):
+    """pypdf/PyPDF2 text extraction: decodes fonts, no layout analysis"""
+
+    name = 'pypdf'
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        self._reader = _pdf_reader_class()(pdf_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def extract_page(self, number: int) -> str:
+        return self._reader.pages[number].extract_text() or ""
+
+
+# Content-stream tokens other than literal strings, which nest and are parsed by hand
+_RAW_TOKEN = re.compile(rb'<[0-9A-Fa-f\s]*>|<<|>>|\[|\]|/[^\s/\[\]()<>{}%]*|[^\s/\[\]()<>{}%]+')
+_RAW_ESCAPES = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+
+
+def _read_literal(data: bytes, position: int):
+    """Parse a (literal string) starting after its '('; returns (bytes, next position)"""
+    out = bytearray()
+    depth = 1
+    length = len(data)
+    while position < length:
+        char = data[position]
+        position += 1
+        if char == 0x5C:  # backslash
+            if position >= length:
+                break
+            escaped = data[position]
+            position += 1
+            if escaped in _RAW_ESCAPES:
+                out += _RAW_ESCAPES[escaped]
+            elif 0x30 <= escaped <= 0x37:  # octal, up to 3 digits
+                digits = bytes([escaped])
+                while len(digits) < 3 and position < length and 0x30 <= data[position] <= 0x37:
+                    digits += bytes([data[position]])
+                    position += 1
+                out.append(int(digits, 8) & 0xFF)
+            elif escaped in (0x0A, 0x0D):  # line continuation
+                if escaped == 0x0D and position < length and data[position] == 0x0A:
+                    position += 1
+            else:
+                out.append(escaped)
+        elif char == 0x28:
+            depth += 1
+            out.append(char)
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                break
+            out.append(char)
+        else:
+            out.append(char)
+    return bytes(out), position
+
+
+def content_stream_text(data: bytes) -> str:
+    """
+    Text shown by a page content stream (Tj, TJ, ' and " operators)
+
+    Strings are decoded as Latin-1, which matches the standard/WinAnsi
+    encodings of simple fonts. Pages with any other font are not passed
+    here by RawStreamBackend (see _simple_fonts).
+    """
+    lines: List[str] = []
+    line: List[str] = []
+    operands: list = []
+    array: Optional[list] = None
+    position = 0
+    length = len(data)
+
+    def end_line():
+        if line:
+            lines.append(''.join(line))
+            line.clear()
+
+    while position < length:
+        char = data[position]
+        if char in b' \t\r\n\x0c\x00':
+            position += 1
+            continue
+        if char == 0x25:  # % comment
+            end = data.find(b'\n', position)
+            position = length if end < 0 else end + 1
+            continue
+        if char == 0x28:  # (
+            value, position = _read_literal(data, position + 1)
+            (array if array is not None else operands).append(value)
+            continue
+
+        match = _RAW_TOKEN.match(data, position)
+        if not match:
+            position += 1
+            continue
+        token = match.group()
+        position = match.end()
+
+        if token == b'[':
+            array = []
+        elif token == b']':
+            operands.append(array or [])
+            array = None
+        elif token in (b'<<', b'>>') or token.startswith(b'/'):
+            continue
+        elif token.startswith(b'<'):
+            hex_digits = re.sub(rb'\s', b'', token[1:-1])
+            if len(hex_digits) % 2:
+                hex_digits += b'0'
+            (array if array is not None else operands).append(bytes.fromhex(hex_digits.decode()))
+        elif token[:1] in b'+-.0123456789':
+            try:
+                (array if array is not None else operands).append(float(token))
+            except ValueError:
+                operands.clear()
+        else:
+            operator = token
+            if operator == b'Tj' and operands and isinstance(operands[-1], bytes):
+                line.append(operands[-1].decode('latin-1'))
+            elif operator in (b"'", b'"') and operands and isinstance(operands[-1], bytes):
+                end_line()
+                line.append(operands[-1].decode('latin-1'))
+            elif operator == b'TJ' and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        line.append(item.decode('latin-1'))
+                    elif item < -200:
+                        # Large negative kerning is a word gap
+                        line.append(' ')
+            elif operator in (b'T*', b'ET', b'Tm'):
+                end_line()
+            elif operator in (b'Td', b'TD') and operands and isinstance(operands[-1], float):
+                if operands[-1] != 0:
+                    end_line()
+                elif line:
+                    line.append(' ')
+            elif operator == b'BI':
+                # Skip inline image data
+                end = data.find(b'EI', position)
+                position = length if end < 0 else end + 2
+            operands.clear()
+
+    end_line()
+    return '\n'.join(text.strip() for text in lines if text.strip())
+
+
+def _looks_like_text(text: str) -> bool:
+    """Heuristic: mostly printable, mostly letters/digits/spaces, as resume text is"""
+    if not text:
+        return True
+    printable = sum(1 for c in text if c.isprintable() or c in '\n\t')
+    wordlike = sum(1 for c in text if c.isalnum() or c.isspace())
+    return printable / len(text) > 0.95 and wordlike / len(text) > 0.7
+
+
+# Fonts whose string bytes read correctly as Latin-1 without the font program
+_SIMPLE_SUBTYPES = {'/Type1', '/MMType1', '/TrueType'}
+_SIMPLE_ENCODINGS = {'/WinAnsiEncoding', '/StandardEncoding'}
+_STANDARD_FONTS = {
+    '/Helvetica', '/Helvetica-Bold', '/Helvetica-Oblique', '/Helvetica-BoldOblique',
+    '/Times-Roman', '/Times-Bold', '/Times-Italic', '/Times-BoldItalic',
+    '/Courier', '/Courier-Bold', '/Courier-Oblique', '/Courier-BoldOblique',
+}
+
+
+def _resolved(value):
+    return value.get_object() if hasattr(value, 'get_object') else value
+
+
+def _simple_fonts(page) -> bool:
+    """
+    Whether every font on a page can be decoded as Latin-1
+
+    False for composite (Type0/CID) and Type3 fonts, fonts with a ToUnicode
+    CMap or a custom /Encoding (e.g. subset fonts with /Differences), and
+    non-standard fonts relying on their built-in encoding. Pages drawing
+    form XObjects are also refused, since their text is not in the page stream.
+    """
+    resources = _resolved(page.get('/Resources')) or {}
+    for font in (_resolved(resources.get('/Font')) or {}).values():
+        font = _resolved(font)
+        if font.get('/Subtype') not in _SIMPLE_SUBTYPES or '/ToUnicode' in font:
+            return False
+        encoding = _resolved(font.get('/Encoding'))
+        if encoding is None:
+            if font.get('/BaseFont') not in _STANDARD_FONTS:
+                return False
+        elif not isinstance(encoding, str) or encoding not in _SIMPLE_ENCODINGS:
+            return False
+    for xobject in (_resolved(resources.get('/XObject')) or {}).values():
+        if _resolved(xobject).get('/Subtype') == '/Form':
+            return False
+    return True
+
+
+class RawStreamBackend(PypdfBackend):
+    """
+    Fast path: scan page content streams for text operators directly
+
+    Skips font decoding and layout analysis. Only pages whose fonts are
+    all simple Latin-1 encodings (_simple_fonts) are scanned; others are
+    extracted by pypdf. Scanned output that still doesn't look like text
+    raises, so the fallback backend handles it.
+    """
+
+    name = 'raw'
+
+    def extract_page(self, number: int) -> str:
+        page = self._reader.pages[number]
+        if not _simple_fonts(page):
+            return super().extract_page(number)
+        contents = page.get_contents()
+        if contents is None:
+            return ""
+        if hasattr(contents, 'get_data'):
+            data = contents.get_data()
+        else:
+            data = b'\n'.join(part.get_object().get_data() for part in contents)
+
+        text = content_stream_text(data)
+        if not _looks_like_text(text):
+            raise ValueError("content stream text needs font decoding")
+        return text
+
+
+BACKENDS: Dict[str, Type[ExtractionBackend]] = {
+    backend.name: backend for backend in (PdfplumberBackend, PypdfBackend, RawStreamBackend)
+}
+
+
+def select_backend(pdf_path: str, page_count: int) -> str:
+    """
+    Backend for a document in auto mode
+
+    Resumes of a few pages get pdfplumber's layout-aware text; large or
+    long documents skip layout analysis with FAST_PATH_BACKEND.
+    """
+    try:
+        size = os.path.getsize(pdf_path)
+    except OSError:
+        size = 0
+    if size >= FAST_PATH_MIN_BYTES or page_count >= FAST_PATH_MIN_PAGES:
+        return FAST_PATH_BACKEND
+    return PdfplumberBackend.name
+
+
+def _fallback_name(backend: str) -> Optional[str]:
+    return None if backend == PypdfBackend.name else PypdfBackend.name
+
+
+def open_document(pdf_path: str, backend: Optional[str] = None) -> ExtractionBackend:
+    """
+    Open a document with the requested backend ('auto' selects one)
+
+    A backend that cannot open the file at all is replaced by pypdf.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend != 'auto' and backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF extraction backend '{backend}'")
+
+    try:
+        if backend == 'auto':
+            # The raw backend's reader is cheap to open and counts pages for the selection
+            document = RawStreamBackend(pdf_path)
+            selected = select_backend(pdf_path, document.page_count)
+            if selected == document.name:
+                return document
+            document.close()
+            backend = selected
+        return BACKENDS[backend](pdf_path)
+    except Exception as e:
+        fallback = _fallback_name(backend)
+        if fallback is None:
+            raise
+        logger.error(f"Error opening PDF with {backend}, falling back to {fallback}: {e}")
+        return BACKENDS[fallback](pdf_path)
+
+
+class _Pages:
+    """An opened document plus a fallback backend, opened on first failure"""
+
+    def __init__(self, document: ExtractionBackend):
+        self.document = document
+        self._fallback_name = _fallback_name(document.name)
+        self._fallback = None
+
+    def extract(self, number: int) -> PageText:
+        started = time.perf_counter()
+        try:
+            text = self.document.extract_page(number)
+        except Exception as e:
+            text = ""
+            if self._fallback_name:
+                logger.debug(f"{self.document.name} failed on page {number + 1}, using {self._fallback_name}: {e}")
+                try:
+                    if self._fallback is None:
+                        self._fallback = BACKENDS[self._fallback_name](self.document.pdf_path)
+                    text = self._fallback.extract_page(number)
+                except Exception as e2:
+                    logger.error(f"{self._fallback_name} also failed on page {number + 1}: {e2}")
+            else:
+                logger.error(f"{self.document.name} failed on page {number + 1}: {e}")
+        return PageText(number, text, time.perf_counter() - started)
+
+    def close(self) -> None:
+        self.document.close()
+        if self._fallback is not None:
+            self._fallback.close()
+
+
+def _extract_page_range(pdf_path: str, backend: str, first: int, last: int) -> List[PageText]:
+    """Process pool task: extract pages [first, last) of one document"""
+    pages = _Pages(BACKENDS[backend](pdf_path))
+    try:
+        return [pages.extract(number) for number in range(first, last)]
+    finally:
+        pages.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the Flask process runs background threads that must not be forked
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died so the next document starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+class PageStream:
+    """
+    Iterate a document's pages in order as they are extracted
+
+    Short documents are read serially in this process; documents with
+    PARALLEL_MIN_PAGES or more pages are split into page ranges extracted
+    by the process pool and yielded in order as each range completes.
+    Iteration stops once `char_budget` characters were yielded (None uses
+    PDF_TEXT_CHAR_BUDGET, 0 disables the limit). After iterating,
+    result() returns the joined text and per-page timings.
+    """
+
+    def __init__(self, pdf_path: str, char_budget: Optional[int] = None, backend: Optional[str] = None):
+        self.pdf_path = pdf_path
+        self.char_budget = DEFAULT_CHAR_BUDGET if char_budget is None else char_budget
+        self.requested_backend = backend
+        self.backend = ''  # backend actually used, set once the document is opened
+        self.pages: List[PageText] = []
+        self.page_count = 0
+        self.truncated = False
+        self._chars = 0
+        self._started = None
+        self._finished = None
+
+    def __iter__(self) -> Iterator[PageText]:
+        self._started = time.perf_counter()
+        try:
+            for page in self._pages():
+                self.pages.append(page)
+                yield page
+                self._chars += len(page.text)
+                if self.char_budget and self._chars >= self.char_budget:
+                    self.truncated = page.number + 1 < self.page_count
+                    return
+        finally:
+            self._finished = time.perf_counter()
+
+    def _pages(self) -> Iterator[PageText]:
+        pages = _Pages(open_document(self.pdf_path, self.requested_backend))
+        self.backend = pages.document.name
+        self.page_count = total = pages.document.page_count
+
+        if total < PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+            try:
+                for number in range(total):
+                    yield pages.extract(number)
+            finally:
+                pages.close()
+            return
+        pages.close()
+
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_page_range, self.pdf_path, self.backend, first, min(first + PAGES_PER_TASK, total))
+            for first in range(0, total, PAGES_PER_TASK)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+        finally:
+            # Early exit or a consumer that stopped iterating: drop queued ranges
+            for future in futures:
+                future.cancel()
+
+    def result(self) -> ExtractionResult:
+        """Joined text of the pages extracted so far (empty pages are skipped)"""
+        text = "\n".join(page.text for page in self.pages if page.text).strip()
+        seconds = (self._finished or time.perf_counter()) - (self._started or time.perf_counter())
+        return ExtractionResult(text, list(self.pages), self.page_count, self.truncated, seconds, self.backend)
+
+    def log_timing(self) -> None:
+        result = self.result()
+        if not result.pages:
+            return
+        slowest = max(result.pages, key=lambda page: page.seconds)
+        logger.info(
+            f"Extracted {len(result.pages)}/{result.page_count} pages ({len(result.text)} chars) "
+            f"from {os.path.basename(self.pdf_path)} with {result.backend} in {result.seconds * 1000:.0f} ms; "
+            f"slowest page {slowest.number + 1}: {slowest.seconds * 1000:.0f} ms"
+            + (" (stopped at character budget)" if result.truncated else "")
+        )
+        logger.debug("Per-page extraction ms: " + ", ".join(
+            f"{page.number + 1}={page.seconds * 1000:.1f}" for page in result.pages
+        ))
+
+
+def extract_text(pdf_path: str, char_budget: Optional[int] = None, backend: Optional[str] = None) -> ExtractionResult:
+    """Extract a whole document (up to the character budget) with the given or auto-selected backend"""
+    stream = PageStream(pdf_path, char_budget, backend)
+    for _ in stream:
+        pass
+    stream.log_timing()
+    return stream.result()
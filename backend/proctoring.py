@@ -0,0 +1,183 @@
+"""
+Proctoring Timeline Module
+Stores each interview's face presence as run-length encoded intervals in one
+binary column instead of one row per frame, and summarizes it (percentage
+of time present, longest absence) for feedback generation
+An hour-long interview with a transition every few seconds stays within a
+few kilobytes
+"""
+
+import os
+import math
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models import ProctoringLog, db
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Absences shorter than this are not counted as separate absences in the summary
+MIN_ABSENCE_SECONDS = float(os.environ.get('PROCTORING_MIN_ABSENCE_SECONDS', '2'))
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+class PresenceTimeline:
+    """
+    Alternating present/absent runs starting at `start_ms` (epoch milliseconds)
+
+    Encoded as: version byte, varint start_ms, then one varint per run of
+    (duration_ms << 1 | present). The last run is still open; its duration
+    reaches up to the latest recorded event.
+    """
+
+    def __init__(self, start_ms: int, present: bool = True):
+        self.start_ms = start_ms
+        self.runs: List[List[int]] = [[int(present), 0]]  # [present, duration_ms]
+
+    @property
+    def end_ms(self) -> int:
+        return self.start_ms + sum(duration for _, duration in self.runs)
+
+    @property
+    def present(self) -> bool:
+        return bool(self.runs[-1][0])
+
+    def record(self, present: bool, timestamp: float) -> None:
+        """Append a presence change at `timestamp` (epoch seconds); stale or repeated states only extend time"""
+        at_ms = int(timestamp * 1000)
+        end_ms = self.end_ms
+        if at_ms > end_ms:
+            self.runs[-1][1] += at_ms - end_ms
+        if bool(present) != self.present:
+            if self.runs[-1][1] > 0:
+                self.runs.append([int(present), 0])
+            elif len(self.runs) > 1:
+                # Zero-length run: fold it back into the previous one
+                self.runs.pop()
+            else:
+                self.runs[-1][0] = int(present)
+
+    def extend_to(self, timestamp: float) -> None:
+        """Close the open run at `timestamp` without changing state"""
+        self.record(self.present, timestamp)
+
+    def to_bytes(self) -> bytes:
+        out = bytearray([FORMAT_VERSION])
+        _write_varint(self.start_ms, out)
+        for present, duration in self.runs:
+            _write_varint((duration << 1) | present, out)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PresenceTimeline':
+        if not data or data[0] != FORMAT_VERSION:
+            raise ValueError("Unsupported proctoring timeline format")
+        start_ms, position = _read_varint(data, 1)
+        timeline = cls(start_ms)
+        timeline.runs = []
+        while position < len(data):
+            value, position = _read_varint(data, position)
+            timeline.runs.append([value & 1, value >> 1])
+        if not timeline.runs:
+            timeline.runs = [[1, 0]]
+        return timeline
+
+    def intervals(self) -> Iterable[Tuple[bool, float, float]]:
+        """(present, start, end) in epoch seconds for every run"""
+        position = self.start_ms
+        for present, duration in self.runs:
+            yield bool(present), position / 1000, (position + duration) / 1000
+            position += duration
+
+    def summary(self, end_timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Aggregate presence statistics, treating the open run as lasting until end_timestamp"""
+        runs = [list(run) for run in self.runs]
+        if end_timestamp is not None:
+            runs[-1][1] += max(0, int(end_timestamp * 1000) - self.end_ms)
+
+        total_ms = sum(duration for _, duration in runs)
+        present_ms = sum(duration for present, duration in runs if present)
+        absences = [duration for present, duration in runs if not present]
+        return {
+            "duration_seconds": round(total_ms / 1000, 1),
+            "percent_present": round(100 * present_ms / total_ms, 1) if total_ms else 100.0,
+            "longest_absence_seconds": round(max(absences, default=0) / 1000, 1),
+            "absence_count": sum(1 for d in absences if d >= MIN_ABSENCE_SECONDS * 1000),
+        }
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime as stored by the models"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def record_events(session, events: Iterable[Dict[str, Any]]) -> Optional[PresenceTimeline]:
+    """
+    Append presence transitions ({'face_detected', 'timestamp'}) to a session's log
+
+    The timeline starts when the interview was created, with the candidate
+    assumed present (the same default the presence tracker uses).
+    Timestamps are clamped to the interview, from its creation to its
+    submission (or now, while it is in progress). The caller commits.
+    """
+    start = session.created_at or datetime.utcnow()
+    earliest, latest = _epoch(start), _epoch(session.submitted_at or datetime.utcnow())
+    events = sorted(
+        ({'face_detected': bool(e.get('face_detected')),
+          'timestamp': min(max(float(e['timestamp']), earliest), latest)}
+         for e in events
+         if isinstance(e.get('timestamp'), (int, float)) and math.isfinite(e['timestamp'])),
+        key=lambda e: e['timestamp']
+    )
+    if not events:
+        return None
+
+    log = ProctoringLog.query.filter_by(session_id=session.id).first()
+    if log is None:
+        timeline = PresenceTimeline(int(earliest * 1000))
+        log = ProctoringLog(session_id=session.id)
+        db.session.add(log)
+    else:
+        timeline = PresenceTimeline.from_bytes(log.timeline)
+
+    for event in events:
+        timeline.record(event['face_detected'], event['timestamp'])
+
+    log.timeline = timeline.to_bytes()
+    log.updated_at = datetime.utcnow()
+    return timeline
+
+
+def get_summary(session) -> Optional[Dict[str, Any]]:
+    """Presence summary for a session, or None if nothing was recorded"""
+    log = ProctoringLog.query.filter_by(session_id=session.id).first()
+    if log is None:
+        return None
+    try:
+        timeline = PresenceTimeline.from_bytes(log.timeline)
+    except (ValueError, IndexError) as e:
+        logger.error(f"Unreadable proctoring timeline for session {session.id}: {e}")
+        return None
+
+    # The candidate's time ends at submission, not when (batch) feedback is saved
+    end = session.submitted_at or session.completed_at or datetime.utcnow()
+    return timeline.summary(end_timestamp=_epoch(end))
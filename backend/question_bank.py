@@ -0,0 +1,396 @@
+"""
+Question Bank Module
+Role-mode interview questions depend only on (role, difficulty), so they are
+pre-generated into a shared pool per role, difficulty and category and each
+session start samples from that pool instead of calling Gemini. A user is
+never served the same bank question twice, and draws prefer questions that
+are not paraphrases of ones the user was already asked (question_index);
+when a pool runs low it is topped up on the background pool
+Pre-fill pools from backend/: python question_bank.py "Software Engineer" "Data Analyst" --batch
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from google.genai import types
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+import background
+import llm_gateway
+import question_index
+from models import BankQuestion, ServedQuestion, db
+from question_generator import InterviewQuestionSet
+
+logger = logging.getLogger(__name__)
+
+# Questions per category in one role-mode interview (same shape as generate_interview_questions)
+CATEGORY_COUNTS = {'hr_questions': 3, 'technical_questions': 4, 'cultural_questions': 3}
+CATEGORY_DESCRIPTIONS = {
+    'hr_questions': "behavioral/HR questions that assess soft skills and cultural fit",
+    'technical_questions': "technical questions that test the core competencies",
+    'cultural_questions': "situational questions that test problem-solving and experience",
+}
+# Pool size per (role, difficulty, category) that top-ups aim for
+TARGET_POOL_SIZE = int(os.environ.get('QUESTION_BANK_TARGET', '40'))
+# Top up when a user has fewer unseen questions than this many interviews' worth
+LOW_WATER_SESSIONS = int(os.environ.get('QUESTION_BANK_LOW_WATER_SESSIONS', '2'))
+# Questions requested per category in one generation call
+GENERATE_PER_CATEGORY = int(os.environ.get('QUESTION_BANK_GENERATE_PER_CATEGORY', '10'))
+# Existing questions quoted in the prompt so Gemini avoids repeating them
+AVOID_EXAMPLES = 30
+# Candidates sampled per question drawn, so near-repeats of what the user has seen can be skipped
+DRAW_OVERSAMPLE = int(os.environ.get('QUESTION_BANK_DRAW_OVERSAMPLE', '3'))
+# Nearest indexed questions (from every pool) searched for a banked paraphrase
+PARAPHRASE_CANDIDATES = 20
+
+
+class BankDraw(NamedTuple):
+    """Questions sampled for one session"""
+    questions: Dict[str, List[str]]
+    question_ids: List[int]
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'top_ups': 0,
+    'questions_added': 0,
+    'near_duplicates_skipped': 0,
+}
+# (role_key, difficulty) pairs with a top-up queued or running in this process
+_topping_up = set()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_stats() -> Dict[str, int]:
+    """Snapshot of bank counters for /api/metrics"""
+    with _stats_lock:
+        stats = dict(_stats)
+        stats['top_ups_in_flight'] = len(_topping_up)
+    return stats
+
+
+def normalize_role(role: Optional[str]) -> str:
+    """Pool key for a role: case and whitespace insensitive"""
+    return re.sub(r'\s+', ' ', (role or '').strip().lower())[:100] or 'general'
+
+
+def _text_hash(text: str) -> str:
+    normalized = re.sub(r'\s+', ' ', text.strip().lower())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def pool_sizes(role_key: str, difficulty: str) -> Dict[str, int]:
+    """Questions in the pool per category"""
+    rows = db.session.query(BankQuestion.category, func.count(BankQuestion.id)).filter_by(
+        role_key=role_key, difficulty=difficulty
+    ).group_by(BankQuestion.category).all()
+    sizes = dict.fromkeys(CATEGORY_COUNTS, 0)
+    sizes.update(rows)
+    return sizes
+
+
+def draw_questions(user_id: int, role: str, difficulty: str) -> Optional[BankDraw]:
+    """
+    Sample one interview's questions from the bank, skipping ones the user has seen
+
+    Returns None when any category has too few unseen questions (the caller
+    then generates with Gemini and banks the result). Either way a
+    background top-up is requested if the pool is running low. Call
+    mark_served() once the session exists.
+    """
+    role_key = normalize_role(role)
+    seen = db.session.query(ServedQuestion.question_id).filter(ServedQuestion.user_id == user_id)
+
+    candidates: Dict[str, Dict[str, BankQuestion]] = {}
+    shortest_unseen = None
+    for category, count in CATEGORY_COUNTS.items():
+        unseen = BankQuestion.query.filter_by(
+            role_key=role_key, difficulty=difficulty, category=category
+        ).filter(~BankQuestion.id.in_(seen))
+        rows = unseen.order_by(func.random()).limit(count * DRAW_OVERSAMPLE).all()
+        remaining = unseen.count() - min(count, len(rows))
+        shortest_unseen = remaining if shortest_unseen is None else min(shortest_unseen, remaining)
+        if len(rows) < count:
+            shortest_unseen = 0
+            candidates = None
+            break
+        candidates[category] = {row.text: row for row in rows}
+
+    if shortest_unseen < LOW_WATER_SESSIONS * max(CATEGORY_COUNTS.values()):
+        request_top_up(role, difficulty)
+
+    if candidates is None:
+        _count('misses')
+        return None
+
+    # Prefer questions that do not paraphrase anything the user was asked before
+    # (in resume-mode interviews too); spares fill in when there are too few
+    kept = question_index.drop_repeats(
+        user_id, {category: list(rows) for category, rows in candidates.items()}, CATEGORY_COUNTS
+    )
+    questions: Dict[str, List[str]] = {}
+    question_ids: List[int] = []
+    for category, count in CATEGORY_COUNTS.items():
+        rows = [candidates[category][text] for text in kept[category][:count]]
+        questions[category] = [row.text for row in rows]
+        question_ids.extend(row.id for row in rows)
+    _count('hits')
+    return BankDraw(questions, question_ids)
+
+
+def mark_served(user_id: int, question_ids: Iterable[int], session_id: Optional[int] = None) -> None:
+    """
+    Record questions as seen by the user; the caller commits
+
+    Repeated ids and ids already served to the user are skipped: a generated
+    paraphrase maps to the banked question it repeats, which the user may
+    have been served before.
+    """
+    question_ids = list(dict.fromkeys(question_ids))
+    if not question_ids:
+        return
+    already = {row.question_id for row in db.session.query(ServedQuestion.question_id).filter(
+        ServedQuestion.user_id == user_id, ServedQuestion.question_id.in_(question_ids)
+    )}
+    question_ids = [question_id for question_id in question_ids if question_id not in already]
+    if not question_ids:
+        return
+    for question_id in question_ids:
+        db.session.add(ServedQuestion(user_id=user_id, question_id=question_id, session_id=session_id))
+    BankQuestion.query.filter(BankQuestion.id.in_(question_ids)).update(
+        {BankQuestion.served_count: func.coalesce(BankQuestion.served_count, 0) + 1},
+        synchronize_session=False
+    )
+
+
+def add_questions(role: str, difficulty: str, questions: Dict[str, List[str]]) -> List[int]:
+    """
+    Add generated questions to the bank, skipping duplicates; the caller commits
+
+    A question that only paraphrases one already in its pool is not banked
+    either. Returns the ids of every given question (new, already banked, or
+    the banked question it paraphrases), in order.
+    """
+    role_key = normalize_role(role)
+    index = _pool_index()
+    ids = []
+    added = 0
+    for category, texts in questions.items():
+        if category not in CATEGORY_COUNTS:
+            continue
+        hashes = {_text_hash(text): text for text in texts if isinstance(text, str) and text.strip()}
+        if not hashes:
+            continue
+        existing = dict(db.session.query(BankQuestion.text_hash, BankQuestion.id).filter(
+            BankQuestion.role_key == role_key,
+            BankQuestion.difficulty == difficulty,
+            BankQuestion.category == category,
+            BankQuestion.text_hash.in_(list(hashes))
+        ).all())
+        group = question_index.pool_group(role_key, difficulty, category)
+        for text_hash, text in hashes.items():
+            if text_hash not in existing and index is not None:
+                match_id = _paraphrased_id(index, group, text)
+                if match_id is not None:
+                    _count('near_duplicates_skipped')
+                    existing[text_hash] = match_id
+            if text_hash not in existing:
+                row = BankQuestion(role_key=role_key, difficulty=difficulty, category=category,
+                                   text=text.strip(), text_hash=text_hash)
+                try:
+                    # A concurrent top-up may bank the same question first
+                    with db.session.begin_nested():
+                        db.session.add(row)
+                    added += 1
+                    existing[text_hash] = row.id
+                    if index is not None:
+                        index.add([row.text], group)
+                except IntegrityError:
+                    existing[text_hash] = db.session.query(BankQuestion.id).filter_by(
+                        role_key=role_key, difficulty=difficulty, category=category, text_hash=text_hash
+                    ).scalar()
+            ids.append(existing[text_hash])
+    _count('questions_added', added)
+    return ids
+
+
+def _pool_index() -> Optional[question_index.QuestionIndex]:
+    """The question index for pool near-duplicate checks, or None if it cannot be built"""
+    try:
+        return question_index.get_index()
+    except Exception as e:
+        logger.warning(f"Question index unavailable, banking without near-duplicate checks: {e}")
+        return None
+
+
+def _paraphrased_id(index: question_index.QuestionIndex, group: Tuple, text: str) -> Optional[int]:
+    """Id of the banked question in the pool that `text` paraphrases, if any"""
+    try:
+        matches = index.similar(text, k=PARAPHRASE_CANDIDATES, group=group)
+    except Exception as e:
+        logger.warning(f"Near-duplicate check failed: {e}")
+        return None
+    if not matches:
+        return None
+    match, _ = matches[0]
+    _, role_key, difficulty, category = group
+    # None when the match was indexed but its insert was rolled back
+    return db.session.query(BankQuestion.id).filter_by(
+        role_key=role_key, difficulty=difficulty, category=category, text_hash=_text_hash(match)
+    ).scalar()
+
+
+def generation_request(role: str, difficulty: str, avoid: List[str]) -> Tuple[str, types.GenerateContentConfig]:
+    """Prompt and config asking for a larger, varied set of questions for the bank"""
+    role = role or 'General'
+    categories = "\n".join(
+        f"- {key} ({GENERATE_PER_CATEGORY}): {description} for a {role}"
+        for key, description in CATEGORY_DESCRIPTIONS.items()
+    )
+    prompt = f"""You are an expert technical interviewer building a bank of questions for {difficulty} level interviews for a {role} position.
+
+Generate {GENERATE_PER_CATEGORY} distinct questions for each category:
+{categories}
+
+Make questions specific to {role} responsibilities and requirements. Cover different topics
+and phrasing so that candidates drawing from this bank get varied interviews."""
+    if avoid:
+        prompt += "\n\nDo not repeat or closely paraphrase these existing questions:\n" + "\n".join(f"- {q}" for q in avoid)
+
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=InterviewQuestionSet
+    )
+    return prompt, config
+
+
+def _parse_question_set(text: str) -> Dict[str, List[str]]:
+    return InterviewQuestionSet(**json.loads(text)).model_dump()
+
+
+def _avoid_examples(role_key: str, difficulty: str) -> List[str]:
+    rows = BankQuestion.query.with_entities(BankQuestion.text).filter_by(
+        role_key=role_key, difficulty=difficulty
+    ).order_by(func.random()).limit(AVOID_EXAMPLES).all()
+    return [row.text for row in rows]
+
+
+def rounds_needed(role_key: str, difficulty: str) -> int:
+    """Generation calls needed to bring the smallest category up to TARGET_POOL_SIZE"""
+    shortfall = TARGET_POOL_SIZE - min(pool_sizes(role_key, difficulty).values())
+    return max(0, math.ceil(shortfall / max(1, GENERATE_PER_CATEGORY)))
+
+
+def top_up(role: str, difficulty: str, rounds: Optional[int] = None) -> int:
+    """
+    Generate questions into the pool; returns how many were added
+
+    Runs until the pool reaches TARGET_POOL_SIZE, or for `rounds` calls
+    (at least one, so users who exhausted a full pool get new questions).
+    Stops early when a call adds nothing new.
+    """
+    from gemini import client
+
+    role_key = normalize_role(role)
+    rounds = rounds if rounds is not None else max(1, rounds_needed(role_key, difficulty))
+    added = 0
+    try:
+        for _ in range(rounds):
+            prompt, config = generation_request(role, difficulty, _avoid_examples(role_key, difficulty))
+            # Never cached: each round must come back with new questions
+            questions = llm_gateway.generate(prompt, config=config, parse=_parse_question_set,
+                                             client=client, cache=False)
+            before = sum(pool_sizes(role_key, difficulty).values())
+            add_questions(role, difficulty, questions)
+            db.session.commit()
+            new = sum(pool_sizes(role_key, difficulty).values()) - before
+            added += new
+            if new == 0:
+                break
+    finally:
+        _count('top_ups')
+        with _stats_lock:
+            _topping_up.discard((role_key, difficulty))
+    logger.info(f"Question bank top-up for {role_key}/{difficulty} added {added} questions")
+    return added
+
+
+def request_top_up(role: str, difficulty: str) -> bool:
+    """Queue a background top-up unless one is already pending for this pool"""
+    key = (normalize_role(role), difficulty)
+    with _stats_lock:
+        if key in _topping_up:
+            return False
+        _topping_up.add(key)
+    try:
+        background.submit(top_up, role, difficulty)
+    except Exception as e:
+        logger.error(f"Could not queue question bank top-up for {key}: {e}")
+        with _stats_lock:
+            _topping_up.discard(key)
+        return False
+    return True
+
+
+def prefill(pools: List[Tuple[str, str]], use_batch: bool = False) -> int:
+    """
+    Fill several (role, difficulty) pools up to TARGET_POOL_SIZE
+
+    With use_batch every generation call goes out in Gemini batch jobs
+    (cheaper, no interactive rate limits); otherwise calls run one by one.
+    Returns the number of questions added.
+    """
+    if not use_batch:
+        return sum(top_up(role, difficulty, rounds_needed(normalize_role(role), difficulty))
+                   for role, difficulty in pools)
+
+    import llm_batch
+    batch = llm_batch.LLMBatch(display_name='question-bank')
+    for role, difficulty in pools:
+        role_key = normalize_role(role)
+        avoid = _avoid_examples(role_key, difficulty)
+        for round_number in range(rounds_needed(role_key, difficulty)):
+            prompt, config = generation_request(role, difficulty, avoid)
+            batch.add((role, difficulty, round_number), prompt, config=config, parse=_parse_question_set)
+
+    added = 0
+    for (role, difficulty, _), result in batch.run().items():
+        if not result.ok:
+            logger.warning(f"Question bank batch request for {role}/{difficulty} failed: {result.error}")
+            continue
+        before = sum(pool_sizes(normalize_role(role), difficulty).values())
+        add_questions(role, difficulty, result.value)
+        db.session.commit()
+        added += sum(pool_sizes(normalize_role(role), difficulty).values()) - before
+    return added
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-generate role-mode interview questions into the bank")
+    parser.add_argument('roles', nargs='+', help="roles to fill, e.g. \"Software Engineer\"")
+    parser.add_argument('--difficulty', action='append', dest='difficulties',
+                        help="difficulty to fill (repeatable; default beginner, intermediate and advanced)")
+    parser.add_argument('--batch', action='store_true', help="generate through Gemini batch jobs")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        db.create_all()
+        difficulties = args.difficulties or ['beginner', 'intermediate', 'advanced']
+        pools = [(role, difficulty) for role in args.roles for difficulty in difficulties]
+        print(f"Added {prefill(pools, use_batch=args.batch)} questions to {len(pools)} pools")
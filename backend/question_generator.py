@@ -4,15 +4,80 @@ Generates targeted interview questions based on resume analysis
 Separates questions into: Technical Skills, HR/Soft Skills, and Project-based
 """
 
+import os
 import json
 import time
 import logging
-from typing import Dict, List, Any
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterator, List, Any, Tuple
 from google import genai
 from google.genai import types
+from pydantic import BaseModel
+
+import llm_gateway
+import question_index
 
 logger = logging.getLogger(__name__)
 
+# 'single' asks for every category in one structured call,
+# 'concurrent' fans three prompts out on a shared thread pool and
+# 'sequential' runs them back-to-back (the original behaviour)
+GENERATION_MODE = os.environ.get('QUESTION_GENERATION_MODE', 'single')
+CATEGORY_TIMEOUT = float(os.environ.get('QUESTION_CATEGORY_TIMEOUT', '45'))
+# Fewest questions per category kept when dropping repeats of earlier interviews
+RESUME_MINIMUMS = {'technical_questions': 4, 'hr_questions': 3, 'project_questions': 2}
+ROLE_MINIMUMS = {'hr_questions': 2, 'technical_questions': 3, 'cultural_questions': 2}
+
+# Bounded pool shared by every request so a traffic spike can't spawn
+# an unbounded number of threads all waiting on Gemini
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('QUESTION_GENERATOR_WORKERS', '8')),
+    thread_name_prefix='question-gen'
+)
+
+
+def _question_list_parser(min_count: int, max_count: int):
+    """Build a gateway parse function for a plain JSON array of questions"""
+    def parse(text: str) -> List[str]:
+        questions = json.loads(text)
+        if not isinstance(questions, list) or len(questions) < min_count:
+            raise ValueError(f"Expected at least {min_count} questions")
+        return questions[:max_count]
+    return parse
+
+
+def generate_avoiding(prompt: str, avoid: str, user_id: int = None, **kwargs) -> Any:
+    """
+    llm_gateway.generate for a question prompt, sharing cached answers across users
+
+    The response cache is keyed on `prompt` before the user's avoid list is
+    appended, so every candidate with the same skills or role at the same
+    difficulty shares one cached question set. A cached set that repeats
+    one of the user's earlier questions is passed over for a fresh,
+    uncached call carrying the avoid list.
+    """
+    if not avoid:
+        return llm_gateway.generate(prompt, **kwargs)
+    questions = llm_gateway.cached(prompt, kwargs['parse'], config=kwargs.get('config'))
+    if questions is not None and not question_index.has_repeats(user_id, questions):
+        return questions
+    return llm_gateway.generate(f"{prompt}\n\n{avoid}", **dict(kwargs, cache=False))
+
+
+class ResumeQuestionSet(BaseModel):
+    """Response schema for single-call resume-based generation"""
+    technical_questions: List[str]
+    hr_questions: List[str]
+    project_questions: List[str]
+
+
+class InterviewQuestionSet(BaseModel):
+    """Response schema for role/keyword-based generation"""
+    hr_questions: List[str]
+    technical_questions: List[str]
+    cultural_questions: List[str]
+
 
 class QuestionGenerator:
     """
@@ -23,8 +88,20 @@ class QuestionGenerator:
     3. Project-based questions based on extracted projects
     """
     
-    def __init__(self, gemini_client: genai.Client):
+    def __init__(
+        self,
+        gemini_client: genai.Client,
+        mode: str = None,
+        category_timeout: float = None,
+        user_id: int = None
+    ):
         self.client = gemini_client
+        self.mode = mode or GENERATION_MODE
+        self.category_timeout = category_timeout or CATEGORY_TIMEOUT
+        # When set, questions this user was already asked are avoided and filtered out
+        self.user_id = user_id
+        # Categories that failed or timed out during the last concurrent run
+        self.failed_categories: List[str] = []
     
     def generate_resume_based_questions(
         self,
@@ -59,29 +136,269 @@ class QuestionGenerator:
             }
             project_summaries.append(proj_summary)
         
-        # Generate three types of questions
-        technical_questions = self._generate_technical_questions(
-            tech_skill_names, difficulty
-        )
+        # Looked up here: the concurrent workers run outside the app context
+        avoid = self.avoid_context()
+        jobs = {
+            'technical_questions': (partial(self._generate_technical_questions, avoid=avoid), tech_skill_names),
+            'hr_questions': (partial(self._generate_hr_questions, avoid=avoid), soft_skill_names),
+            'project_questions': (partial(self._generate_project_questions, avoid=avoid), project_summaries),
+        }
         
-        hr_questions = self._generate_hr_questions(
-            soft_skill_names, difficulty
-        )
+        if self.mode == 'single':
+            questions = self._generate_combined_questions(
+                tech_skill_names, soft_skill_names, project_summaries, difficulty, avoid
+            )
+        elif self.mode == 'sequential':
+            questions = {
+                category: generate(context, difficulty)
+                for category, (generate, context) in jobs.items()
+            }
+        else:
+            questions = self._generate_concurrently(jobs, difficulty)
         
-        project_questions = self._generate_project_questions(
-            project_summaries, difficulty
-        )
+        return self.drop_repeats(questions, RESUME_MINIMUMS)
+    
+    def avoid_context(self) -> str:
+        """Prompt paragraph listing questions the user has already been asked ('' if none)"""
+        if self.user_id is None:
+            return ""
+        return question_index.avoid_instructions(self.user_id)
+    
+    def drop_repeats(self, questions: Dict[str, List[str]], minimums: Dict[str, int]) -> Dict[str, List[str]]:
+        """Remove near-duplicates of the user's earlier questions, keeping each category's minimum"""
+        if self.user_id is None:
+            return questions
+        return question_index.drop_repeats(self.user_id, questions, minimums)
+    
+    def stream_resume_based_questions(
+        self,
+        technical_skills: List[Dict[str, str]],
+        soft_skills: List[Dict[str, str]],
+        projects: List[Dict[str, Any]],
+        difficulty: str = "intermediate"
+    ) -> Iterator[Tuple[str, str]]:
+        """Streaming counterpart of generate_resume_based_questions"""
+        tech_skill_names = [s['name'] for s in technical_skills[:10]]
+        soft_skill_names = [s['skill'] for s in soft_skills[:8]]
+        project_summaries = [
+            {
+                'title': proj.get('title', 'Unnamed Project'),
+                'technologies': proj.get('technologies', [])[:5],
+                'description': proj.get('description', '')[:200]
+            }
+            for proj in projects[:5]
+        ]
         
-        return {
-            'technical_questions': technical_questions,
-            'hr_questions': hr_questions,
-            'project_questions': project_questions
+        context = f"""Candidate resume summary:
+Technical skills: {', '.join(tech_skill_names) or 'none listed'}
+Soft skills: {', '.join(soft_skill_names) or 'none listed'}
+Projects: {json.dumps(project_summaries) if project_summaries else 'none listed'}"""
+        
+        return self.stream_questions(context, {
+            'hr_questions': "exactly 4 behavioral/HR questions assessing communication, teamwork and professional growth, with at least 2 STAR method questions",
+            'technical_questions': "exactly 5 technical questions on the listed skills, mixing theory and practical application",
+            'project_questions': "exactly 3 open-ended questions probing the candidate's projects, technical decisions and challenges",
+        }, difficulty)
+    
+    def stream_questions(
+        self,
+        context: str,
+        categories: Dict[str, str],
+        difficulty: str
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Stream (category, question) pairs as soon as each one is generated
+        
+        The model writes one JSON object per line, so every completed line can
+        be parsed immediately. Categories are emitted in the order given; a
+        question for a category that has already been closed (because a later
+        category started) is dropped, which keeps arrival order identical to
+        the stored question order. With a user_id, questions repeating the
+        user's earlier interviews (or this one) are dropped as well, unless
+        that would leave their category empty.
+        
+        Args:
+            context: candidate/role description placed in the prompt
+            categories: category key -> instruction, in display order
+            difficulty: beginner, intermediate, or advanced
+        """
+        instructions = "\n".join(f"- {key}: {text}" for key, text in categories.items())
+        # The user's history is synced once for the prompt and every repeat check
+        history = question_index.UserHistory(self.user_id)
+        prompt = f"""You are an expert interviewer conducting a {difficulty} level interview.
+
+{context}
+
+Generate interview questions for these categories, in this order:
+{instructions}
+{history.avoid_instructions()}
+
+Output one JSON object per line and nothing else, e.g.
+{{"category": "{next(iter(categories))}", "question": "..."}}
+Finish every question of a category before starting the next one."""
+
+        order = list(categories)
+        current = 0
+        buffer = ""
+        emitted: List[str] = []
+        counts = dict.fromkeys(order, 0)
+        # First repeated question per category, used only if the category would otherwise be empty
+        held: Dict[str, str] = {}
+        def close(until: int) -> List[Tuple[str, str]]:
+            """Fall back to a held repeat for every empty category before position `until`"""
+            return [(category, held[category]) for category in order[current:until]
+                    if not counts[category] and category in held]
+        
+        def parse_line(line: str) -> List[Tuple[str, str]]:
+            nonlocal current
+            line = line.strip().rstrip(',')
+            if not line.startswith('{'):
+                return []
+            try:
+                item = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unparseable streamed line: {line[:80]}")
+                return []
+            category = item.get('category')
+            question = item.get('question')
+            if category not in categories or not question:
+                return []
+            position = order.index(category)
+            if position < current:
+                return []
+            if history.is_repeat(question, emitted):
+                logger.info(f"Skipping repeated question: {question[:80]}")
+                held.setdefault(category, question)
+                return []
+            parsed = close(position)
+            current = position
+            counts[category] += 1
+            emitted.append(question)
+            return parsed + [(category, question)]
+        
+        for chunk in llm_gateway.stream(prompt, client=self.client):
+            buffer += chunk
+            *lines, buffer = buffer.split('\n')
+            for line in lines:
+                yield from parse_line(line)
+        
+        yield from parse_line(buffer)
+        yield from close(len(order))
+    
+    def _generate_concurrently(
+        self,
+        jobs: Dict[str, Any],
+        difficulty: str
+    ) -> Dict[str, List[str]]:
+        """
+        Run every category on the shared pool at once so total latency is
+        roughly the slowest single call instead of the sum of all three.
+        
+        Each category gets `category_timeout` seconds measured from fan-out.
+        Categories that fail or time out are left out of the result and
+        recorded in `failed_categories`; an error is raised only when no
+        category succeeds.
+        """
+        self.failed_categories = []
+        deadline = time.monotonic() + self.category_timeout
+        
+        futures = {
+            category: _executor.submit(generate, context, difficulty)
+            for category, (generate, context) in jobs.items()
         }
+        
+        results = {}
+        for category, future in futures.items():
+            remaining = max(0.0, deadline - time.monotonic())
+            try:
+                results[category] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # The worker keeps running; its result is simply discarded
+                future.cancel()
+                logger.error(f"Timed out generating {category} after {self.category_timeout}s")
+                self.failed_categories.append(category)
+            except Exception as e:
+                logger.error(f"Failed generating {category}: {e}")
+                self.failed_categories.append(category)
+        
+        if not results:
+            raise Exception("Failed to generate any question category using LLM")
+        
+        if self.failed_categories:
+            logger.warning(f"Returning partial question set, missing: {', '.join(self.failed_categories)}")
+        
+        return results
+    
+    def _generate_combined_questions(
+        self,
+        skills: List[str],
+        soft_skills: List[str],
+        projects: List[Dict[str, Any]],
+        difficulty: str,
+        avoid: str = ""
+    ) -> Dict[str, List[str]]:
+        """Generate all three categories in one schema-constrained LLM call"""
+        
+        if skills:
+            tech_context = f"Technical skills: {', '.join(skills[:10])}"
+        else:
+            tech_context = "Technical skills: none listed - ask general software development, problem-solving and engineering practice questions"
+        
+        if soft_skills:
+            soft_context = f"Soft skills: {', '.join(soft_skills[:8])}"
+        else:
+            soft_context = "Soft skills: none listed - assess problem-solving, adaptability, teamwork and communication"
+        
+        if projects:
+            project_context = f"Projects:\n{json.dumps(projects, indent=2)}"
+        else:
+            project_context = "Projects: none listed - ask about general project experience, teamwork and the software development lifecycle"
+        
+        prompt = f"""You are an expert interviewer conducting a {difficulty} level interview.
+
+Candidate resume summary:
+{tech_context}
+{soft_context}
+{project_context}
+
+Generate three sets of questions appropriate for {difficulty} level:
+- technical_questions: exactly 5 questions on the technical skills, mixing theory and practical application, with at least 2 scenario-based questions
+- hr_questions: exactly 4 behavioral/HR questions assessing communication, teamwork and professional growth, with at least 2 STAR method questions
+- project_questions: exactly 3 open-ended questions probing the candidate's projects, technical decisions, challenges and depth of involvement
+
+All questions must be professional, realistic and focused on real-world scenarios."""
+
+        def parse(text: str) -> Dict[str, List[str]]:
+            question_set = ResumeQuestionSet(**json.loads(text))
+            if (len(question_set.technical_questions) < 4 or
+                    len(question_set.hr_questions) < 3 or
+                    len(question_set.project_questions) < 2):
+                raise ValueError("Too few questions in combined response")
+            return {
+                'technical_questions': question_set.technical_questions[:5],
+                'hr_questions': question_set.hr_questions[:4],
+                'project_questions': question_set.project_questions[:3]
+            }
+        
+        return generate_avoiding(
+            prompt,
+            avoid,
+            self.user_id,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=ResumeQuestionSet,
+                temperature=0.7
+            ),
+            parse=parse,
+            client=self.client,
+            max_attempts=2
+        )
     
     def _generate_technical_questions(
         self,
         skills: List[str],
-        difficulty: str
+        difficulty: str,
+        avoid: str = ""
     ) -> List[str]:
         """Generate technical questions based on skills - Always uses LLM, no fallbacks"""
         
@@ -106,35 +423,24 @@ Generate exactly 5 technical interview questions that are:
 Return ONLY a JSON array of 5 questions, nothing else:
 ["question1", "question2", "question3", "question4", "question5"]"""
 
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        temperature=0.7
-                    )
-                )
-                
-                if response.text:
-                    questions = json.loads(response.text)
-                    if isinstance(questions, list) and len(questions) >= 4:
-                        return questions[:5]
-            except Exception as e:
-                logger.error(f"Error generating technical questions (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-        
-        # If LLM fails completely, raise error instead of returning fallback
-        raise Exception("Failed to generate technical questions using LLM after retries")
+        return generate_avoiding(
+            prompt,
+            avoid,
+            self.user_id,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=0.7
+            ),
+            parse=_question_list_parser(min_count=4, max_count=5),
+            client=self.client,
+            max_attempts=2
+        )
     
     def _generate_hr_questions(
         self,
         soft_skills: List[str],
-        difficulty: str
+        difficulty: str,
+        avoid: str = ""
     ) -> List[str]:
         """Generate HR/culture fit questions - Always uses LLM, no fallbacks"""
         
@@ -159,35 +465,24 @@ Generate exactly 4 behavioral/HR interview questions that:
 Return ONLY a JSON array of 4 questions, nothing else:
 ["question1", "question2", "question3", "question4"]"""
 
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        temperature=0.7
-                    )
-                )
-                
-                if response.text:
-                    questions = json.loads(response.text)
-                    if isinstance(questions, list) and len(questions) >= 3:
-                        return questions[:4]
-            except Exception as e:
-                logger.error(f"Error generating HR questions (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-        
-        # If LLM fails completely, raise error instead of returning fallback
-        raise Exception("Failed to generate HR questions using LLM after retries")
+        return generate_avoiding(
+            prompt,
+            avoid,
+            self.user_id,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=0.7
+            ),
+            parse=_question_list_parser(min_count=3, max_count=4),
+            client=self.client,
+            max_attempts=2
+        )
     
     def _generate_project_questions(
         self,
         projects: List[Dict[str, Any]],
-        difficulty: str
+        difficulty: str,
+        avoid: str = ""
     ) -> List[str]:
         """Generate project-based questions - Always uses LLM, no fallbacks"""
         
@@ -212,30 +507,18 @@ Generate exactly 3 project-based interview questions that:
 Return ONLY a JSON array of 3 questions, nothing else:
 ["question1", "question2", "question3"]"""
 
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        temperature=0.7
-                    )
-                )
-                
-                if response.text:
-                    questions = json.loads(response.text)
-                    if isinstance(questions, list) and len(questions) >= 2:
-                        return questions[:3]
-            except Exception as e:
-                logger.error(f"Error generating project questions (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-                    continue
-        
-        # If LLM fails completely, raise error instead of returning fallback
-        raise Exception("Failed to generate project questions using LLM after retries")
+        return generate_avoiding(
+            prompt,
+            avoid,
+            self.user_id,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=0.7
+            ),
+            parse=_question_list_parser(min_count=2, max_count=3),
+            client=self.client,
+            max_attempts=2
+        )
     
     def generate_role_based_questions(
         self,
@@ -253,58 +536,25 @@ Generate a comprehensive set of interview questions specifically tailored for a
 - 3 situational questions that test problem-solving and experience in {role} scenarios
 
 Make questions specific to {role} responsibilities and requirements.
-Return the response as a JSON object with exactly these keys:
-{{
-    "hr_questions": [array of 3 HR/behavioral questions],
-    "technical_questions": [array of 4 technical questions],
-    "cultural_questions": [array of 3 situational/cultural fit questions]
-}}
+Return hr_questions (3), technical_questions (4) and cultural_questions (3).
 
 Ensure all questions are highly relevant to a {role} position."""
 
-        max_retries = 3
-        retry_delay = 1
-
-        for attempt in range(max_retries):
-            try:
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt
-                )
-
-                if response.text:
-                    # Try to extract JSON from response
-                    import re
-                    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                    if json_match:
-                        questions_data = json.loads(json_match.group())
-                        return questions_data
-                    else:
-                        logger.error(f"No JSON found in response: {response.text[:200]}")
-                        raise ValueError("Invalid response format from LLM")
-
-            except json.JSONDecodeError as je:
-                logger.error(f"JSON parse error (attempt {attempt + 1}/{max_retries}): {je}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                    continue
-                else:
-                    break
-            except Exception as e:
-                error_str = str(e).lower()
-                is_retryable = ('503' in error_str or
-                              'unavailable' in error_str or
-                              'overloaded' in error_str)
-
-                if is_retryable and attempt < max_retries - 1:
-                    logger.info(f"Gemini API temporarily unavailable (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                    continue
-                else:
-                    logger.error(f"Error generating role-based questions: {e}")
-                    break
+        try:
+            questions = generate_avoiding(
+                prompt,
+                self.avoid_context(),
+                self.user_id,
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=InterviewQuestionSet
+                ),
+                parse=lambda text: InterviewQuestionSet(**json.loads(text)).model_dump(),
+                client=self.client
+            )
+            return self.drop_repeats(questions, ROLE_MINIMUMS)
+        except Exception as e:
+            logger.error(f"Error generating role-based questions: {e}")
 
         # Return error if all attempts fail
         return {
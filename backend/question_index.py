@@ -0,0 +1,698 @@
+"""
+Question Index Module
+In-memory embedding index over every generated interview question, used to
+spot near-duplicates: questions a user has already been asked (so they are
+not asked again in other words) and paraphrases of questions already in a
+question bank pool
+Vectors live in one NumPy matrix and are compared by cosine similarity.
+Global top-k search switches from an exact scan to an inverted-file (IVF)
+index once the matrix is large, so lookups stay well under a millisecond at
+100k questions
+Embeddings come from a local feature-hashing embedder by default, or from
+Gemini embeddings with QUESTION_EMBEDDER=gemini (cached in the database)
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+EMBEDDER = os.environ.get('QUESTION_EMBEDDER', 'hashing')  # 'hashing' or 'gemini'
+EMBEDDING_DIM = int(os.environ.get('QUESTION_EMBEDDING_DIM', '256'))
+GEMINI_EMBEDDING_MODEL = os.environ.get('GEMINI_EMBEDDING_MODEL', 'text-embedding-004')
+# Cosine similarity at or above which two questions count as the same question
+DUPLICATE_THRESHOLD = float(os.environ.get(
+    'QUESTION_DUPLICATE_THRESHOLD', '0.85' if EMBEDDER == 'gemini' else '0.75'
+))
+# Below this many vectors an exact scan is already fast enough
+IVF_MIN_ROWS = int(os.environ.get('QUESTION_INDEX_IVF_MIN_ROWS', '20000'))
+IVF_NPROBE = int(os.environ.get('QUESTION_INDEX_NPROBE', '8'))
+# A user's most recent questions quoted in generation prompts as "do not repeat"
+AVOID_RECENT = int(os.environ.get('QUESTION_INDEX_AVOID_RECENT', '20'))
+
+_WORD = re.compile(r"[a-z0-9+#]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an the and or of to in on for with at by from as is are was were be been being it its this that these
+those you your yours we our us i me my do does did can could would should will shall may might must
+have has had how what when where which who whom why tell describe explain give walk through about
+within between time
+""".split())
+
+
+def question_hash(text: str) -> str:
+    """Key of a question text (case and whitespace insensitive)"""
+    return hashlib.sha1(re.sub(r'\s+', ' ', text.strip().lower()).encode('utf-8')).hexdigest()
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so 'queries'/'query' and 'threads'/'thread' match"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 5 and word.endswith(('sses', 'shes', 'ches', 'xes')):
+        return word[:-2]
+    for suffix in ('ing', 'ed', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix) and not word.endswith('ss'):
+            return word[:-len(suffix)]
+    return word
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedding: stemmed content words and word
+    bigrams are hashed into `dim` signed buckets, then L2-normalized
+
+    No model and no network; good at catching reworded or reordered
+    duplicates, not at deeper paraphrases.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> List[str]:
+        words = (w[:-2] if w.endswith("'s") else w for w in _WORD.findall(text.lower()))
+        words = [_stem(w) for w in words if w not in STOPWORDS]
+        return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                # Bigrams weigh less than single words
+                weight = 0.5 if ' ' in feature else 1.0
+                vectors[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        return _normalize(vectors)
+
+
+class GeminiEmbedder:
+    """Gemini text embeddings, requested in batches through the shared rate limiter"""
+
+    name = 'gemini'
+    BATCH_SIZE = 100
+
+    def __init__(self, dim: int = EMBEDDING_DIM, model: str = GEMINI_EMBEDDING_MODEL, client=None):
+        self.dim = dim
+        self.model = model
+        self.client = client
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        import llm_gateway
+        from google.genai import types
+
+        client = self.client or llm_gateway._default_client()
+        config = types.EmbedContentConfig(task_type='SEMANTIC_SIMILARITY', output_dimensionality=self.dim)
+        vectors = []
+        for start in range(0, len(texts), self.BATCH_SIZE):
+            if not llm_gateway.rate_limiter.acquire(timeout=llm_gateway.RATE_LIMIT_WAIT):
+                raise llm_gateway.LLMUnavailableError("Gemini rate limit reached while embedding questions")
+            response = client.models.embed_content(
+                model=self.model, contents=list(texts[start:start + self.BATCH_SIZE]), config=config
+            )
+            vectors.extend(embedding.values for embedding in response.embeddings)
+        return _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def create_embedder(name: str = EMBEDDER):
+    if name == 'gemini':
+        return GeminiEmbedder()
+    return HashingEmbedder()
+
+
+class VectorIndex:
+    """
+    Unit vectors in a growable float32 matrix with cosine top-k search
+
+    search() scans every row until the index holds IVF_MIN_ROWS vectors;
+    from then on rows are bucketed by their nearest k-means centroid
+    (about sqrt(n) buckets) and a query scans only the `nprobe` nearest
+    buckets. The centroids are retrained whenever the index has doubled
+    since the last training. Not thread-safe; QuestionIndex locks around it.
+    """
+
+    def __init__(self, dim: int, ivf_min_rows: int = IVF_MIN_ROWS, nprobe: int = IVF_NPROBE):
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._size = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._buckets: List[List[int]] = []
+        # Bucket -> (rows, their vectors copied contiguously), rebuilt after the bucket changes
+        self._bucket_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Append unit vectors; returns their row numbers"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        needed = self._size + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        rows = np.arange(self._size, needed)
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+
+        if self._centroids is not None:
+            self._assign(rows)
+        if self._size >= self.ivf_min_rows and self._size >= 2 * self._trained_size:
+            self.train()
+        return rows
+
+    def _nearest_centroids(self, vectors: np.ndarray, count: int = 1) -> np.ndarray:
+        scores = vectors @ self._centroids.T
+        if count == 1:
+            return scores.argmax(axis=1)[:, None]
+        return np.argpartition(-scores, count - 1, axis=1)[:, :count]
+
+    def _assign(self, rows: np.ndarray) -> None:
+        for start in range(0, len(rows), 8192):
+            chunk = rows[start:start + 8192]
+            for row, bucket in zip(chunk, self._nearest_centroids(self._vectors[chunk])[:, 0]):
+                self._buckets[bucket].append(int(row))
+                self._bucket_arrays.pop(int(bucket), None)
+
+    def train(self, iterations: int = 8, sample_size: int = 20000, seed: int = 0) -> None:
+        """Spherical k-means on a sample of the rows, then bucket every row"""
+        rng = np.random.default_rng(seed)
+        data = self.vectors
+        nlist = max(1, int(np.sqrt(self._size)))
+        sample = data[rng.choice(self._size, size=min(sample_size, self._size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty buckets from random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self._centroids = centroids
+        self._buckets = [[] for _ in range(nlist)]
+        self._bucket_arrays = {}
+        self._assign(np.arange(self._size))
+        self._trained_size = self._size
+        logger.info(f"Question index trained {nlist} buckets over {self._size} vectors")
+
+    def _bucket(self, bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._bucket_arrays.get(bucket)
+        if arrays is None:
+            rows = np.asarray(self._buckets[bucket], dtype=np.int64)
+            arrays = self._bucket_arrays[bucket] = (rows, self._vectors[rows])
+        return arrays
+
+    def search(self, query: np.ndarray, k: int = 10, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (rows, cosine scores) for one unit query vector, best first
+
+        `rows` restricts an exact search to those rows (e.g. one user's
+        questions); otherwise the whole index is searched.
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        if rows is not None:
+            candidates = np.asarray(rows, dtype=np.int64)
+            scores = self._vectors[candidates] @ query
+        elif self._centroids is None:
+            candidates = np.arange(self._size)
+            scores = self.vectors @ query
+        else:
+            probe = self._nearest_centroids(query[None, :], min(self.nprobe, len(self._centroids)))[0]
+            buckets = [self._bucket(int(b)) for b in probe]
+            candidates = np.concatenate([rows for rows, _ in buckets])
+            scores = np.concatenate([vectors @ query for _, vectors in buckets])
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "vectors": self._size,
+            "ivf_buckets": 0 if self._centroids is None else len(self._centroids),
+        }
+
+
+def user_group(user_id: int) -> Tuple:
+    """Group of the questions one user has been asked"""
+    return ('user', user_id)
+
+
+def pool_group(role_key: str, difficulty: str, category: str) -> Tuple:
+    """Group of the questions in one question bank pool"""
+    return ('pool', role_key, difficulty, category)
+
+
+class QuestionIndex:
+    """
+    Every distinct question text, embedded once, plus named groups of rows
+
+    Groups are the questions a user has been asked (user_group) and the
+    questions in a bank pool (pool_group); repeat checks compare against one
+    group with an exact scan, global similar() lookups use the vector index.
+    Thread-safe. Texts are de-duplicated by question_hash before embedding.
+    """
+
+    def __init__(self, embedder=None, threshold: float = DUPLICATE_THRESHOLD):
+        self.embedder = embedder or create_embedder()
+        self.threshold = threshold
+        self.index = VectorIndex(self.embedder.dim)
+        self._rows: Dict[str, int] = {}  # question_hash -> row
+        self._texts: List[str] = []
+        self._groups: Dict[Hashable, List[int]] = {}
+        self._group_sets: Dict[Hashable, set] = {}
+        # Interview session id -> length of its questions JSON when last recorded
+        self._sessions: Dict[int, int] = {}
+        # User id -> highest session id recorded, and recorded sessions still active
+        self._user_marks: Dict[int, int] = {}
+        self._open_sessions: Dict[int, set] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit vectors for texts; remote embeddings are cached in the database"""
+        if self.embedder.name == 'hashing' or not has_app_context():
+            return self.embedder.embed(list(texts))
+        return _cached_vectors(self.embedder, list(texts))
+
+    def add(self, texts: Iterable[str], group: Optional[Hashable] = None,
+            vectors: Optional[np.ndarray] = None) -> List[int]:
+        """Index question texts (known ones are not re-embedded), optionally into a group; returns their rows"""
+        texts = [t.strip() for t in texts if isinstance(t, str) and t.strip()]
+        with self._lock:
+            new = {}
+            for position, text in enumerate(texts):
+                key = question_hash(text)
+                if key not in self._rows and key not in new:
+                    new[key] = position
+        if new and vectors is None:
+            # Embed outside the lock; a remote embedder can take a while
+            vectors = self.embed([texts[p] for p in new.values()])
+            positions = range(len(new))
+        else:
+            positions = list(new.values())
+
+        with self._lock:
+            fresh = [(key, position, i) for (key, position), i in zip(new.items(), positions)
+                     if key not in self._rows]
+            if fresh:
+                rows = self.index.add(vectors[[i for _, _, i in fresh]])
+                for (key, position, _), row in zip(fresh, rows):
+                    self._rows[key] = int(row)
+                    self._texts.append(texts[position])
+            rows = [self._rows[question_hash(text)] for text in texts]
+            if group is not None:
+                members = self._group_sets.setdefault(group, set())
+                ordered = self._groups.setdefault(group, [])
+                for row in rows:
+                    if row not in members:
+                        members.add(row)
+                        ordered.append(row)
+            return rows
+
+    def record_session(self, user_id: int, session_id: int, questions_json: Optional[str],
+                       active: bool = False) -> None:
+        """
+        Add an interview session's questions to its user's group (no-op if unchanged since last time)
+
+        Active sessions may still gain questions, so sync_point keeps
+        returning them until they are recorded as inactive.
+        """
+        size = len(questions_json or '')
+        with self._lock:
+            changed = self._sessions.get(session_id) != size
+        if changed:
+            self.add(_session_texts(questions_json), user_group(user_id))
+        with self._lock:
+            self._sessions[session_id] = size
+            self._user_marks[user_id] = max(self._user_marks.get(user_id, 0), session_id)
+            open_sessions = self._open_sessions.setdefault(user_id, set())
+            if active:
+                open_sessions.add(session_id)
+            else:
+                open_sessions.discard(session_id)
+
+    def sync_point(self, user_id: int) -> Tuple[int, List[int]]:
+        """The highest session id recorded for the user and their recorded sessions still active"""
+        with self._lock:
+            return self._user_marks.get(user_id, 0), sorted(self._open_sessions.get(user_id, ()))
+
+    def group_texts(self, group: Hashable, limit: Optional[int] = None) -> List[str]:
+        """Texts in a group, oldest first (the last `limit` if given)"""
+        with self._lock:
+            rows = self._groups.get(group, [])
+            return [self._texts[row] for row in (rows[-limit:] if limit else rows)]
+
+    def nearest_in_group(self, group: Hashable, texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """For each text, the most similar text in the group and its cosine similarity"""
+        if not texts:
+            return []
+        vectors = self.embed(texts)
+        with self._lock:
+            rows = self._groups.get(group)
+            if not rows:
+                return [(None, 0.0)] * len(texts)
+            rows = np.asarray(rows)
+            members = self.index.vectors[rows]
+        scores = vectors @ members.T
+        best = scores.argmax(axis=1)
+        return [(self._texts[rows[b]], float(scores[i, b])) for i, b in enumerate(best)]
+
+    def similar(self, text: str, k: int = 5, threshold: Optional[float] = None,
+                group: Optional[Hashable] = None) -> List[Tuple[str, float]]:
+        """
+        Indexed questions closest to `text` across every user and pool, best first
+
+        With `group`, the k nearest are narrowed to the group's members; a
+        member crowded out of the top k by closer questions elsewhere is
+        missed, so ask for a generous k.
+        """
+        query = self.embed([text])[0]
+        with self._lock:
+            rows, scores = self.index.search(query, k)
+            members = self._group_sets.get(group, set()) if group is not None else None
+            limit = self.threshold if threshold is None else threshold
+            return [(self._texts[r], float(s)) for r, s in zip(rows, scores)
+                    if s >= limit and (members is None or int(r) in members)]
+
+    def drop_repeats(
+        self,
+        group: Hashable,
+        questions: Dict[str, List[str]],
+        minimums: Union[int, Dict[str, int]] = 1
+    ) -> Dict[str, List[str]]:
+        """
+        Remove questions that repeat something in the group, or each other
+
+        A category never drops below its minimum (`minimums` is one count
+        for every category, or a per-category dict): if too many of its
+        questions are repeats, the least similar ones are kept.
+        """
+        result = {}
+        for category, texts in questions.items():
+            texts = [t for t in texts if isinstance(t, str) and t.strip()] if isinstance(texts, list) else texts
+            if not isinstance(texts, list) or not texts:
+                result[category] = texts
+                continue
+            minimum = minimums.get(category, 1) if isinstance(minimums, dict) else minimums
+            scores = [score for _, score in self.nearest_in_group(group, texts)]
+            vectors = self.embed(texts)
+            internal = vectors @ vectors.T
+            kept = []
+            for i, score in enumerate(scores):
+                # Within one set, a later near-copy of an earlier question is a repeat too
+                if score < self.threshold and all(internal[i, j] < self.threshold for j in kept):
+                    kept.append(i)
+            if len(kept) < min(minimum, len(texts)):
+                spare = sorted((i for i in range(len(texts)) if i not in kept), key=lambda i: scores[i])
+                kept = sorted(kept + spare[:minimum - len(kept)])
+            _count('repeats_rejected', len(texts) - len(kept))
+            result[category] = [texts[i] for i in kept]
+        return result
+
+    def is_repeat(self, group: Hashable, text: str, previous: Sequence[str] = ()) -> bool:
+        """Whether text repeats something in the group or one of `previous`"""
+        if self.nearest_in_group(group, [text])[0][1] >= self.threshold:
+            return True
+        if previous:
+            vectors = self.embed([text] + list(previous))
+            return bool((vectors[1:] @ vectors[0] >= self.threshold).any())
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.index.get_stats())
+            stats.update({
+                "embedder": self.embedder.name,
+                "groups": len(self._groups),
+                "sessions": len(self._sessions),
+            })
+            return stats
+
+
+def _session_texts(questions_json: Optional[str]) -> List[str]:
+    try:
+        questions = json.loads(questions_json) if questions_json else {}
+    except ValueError:
+        return []
+    if not isinstance(questions, dict):
+        return []
+    return [q for texts in questions.values() if isinstance(texts, list) for q in texts if isinstance(q, str)]
+
+
+def _cached_vectors(embedder, texts: List[str]) -> np.ndarray:
+    """Embeddings for texts, reusing and filling the QuestionEmbedding table"""
+    from models import QuestionEmbedding, db
+
+    keys = [question_hash(t) for t in texts]
+    cached = {}
+    unique = list(dict.fromkeys(keys))
+    for start in range(0, len(unique), 500):
+        for row in QuestionEmbedding.query.filter(
+            QuestionEmbedding.embedder == embedder.name,
+            QuestionEmbedding.dim == embedder.dim,
+            QuestionEmbedding.text_hash.in_(unique[start:start + 500])
+        ):
+            cached[row.text_hash] = np.frombuffer(row.vector, dtype=np.float32)
+
+    missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+    if missing:
+        fresh = embedder.embed(list(missing.values()))
+        try:
+            # Savepoint: the caller's transaction must survive a concurrent insert of the same vector
+            with db.session.begin_nested():
+                for key, vector in zip(missing, fresh):
+                    db.session.add(QuestionEmbedding(
+                        text_hash=key, embedder=embedder.name, dim=embedder.dim, vector=vector.tobytes()
+                    ))
+        except IntegrityError:
+            pass
+        cached.update(zip(missing, fresh))
+    if not keys:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    return np.stack([cached[key] for key in keys])
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    'builds': 0,
+    'repeat_checks': 0,
+    'repeats_rejected': 0,
+    'errors': 0,
+}
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def build_index(embedder=None) -> QuestionIndex:
+    """Index every bank question and every question asked in past sessions (needs an app context)"""
+    from models import BankQuestion, InterviewSession, db
+
+    index = QuestionIndex(embedder)
+    pools: Dict[Tuple, List[str]] = {}
+    for row in db.session.query(BankQuestion.role_key, BankQuestion.difficulty,
+                                BankQuestion.category, BankQuestion.text):
+        pools.setdefault(pool_group(row.role_key, row.difficulty, row.category), []).append(row.text)
+    sessions = db.session.query(InterviewSession.id, InterviewSession.user_id,
+                                InterviewSession.questions, InterviewSession.status).all()
+
+    # Embed all distinct texts in one pass before filling the groups
+    texts = [t for group in pools.values() for t in group]
+    texts.extend(q for session in sessions for q in _session_texts(session.questions))
+    unique = list({question_hash(t): t.strip() for t in texts if t.strip()}.values())
+    if unique:
+        index.add(unique, vectors=index.embed(unique))
+    for group, group_texts in pools.items():
+        index.add(group_texts, group)
+    for session in sessions:
+        index.record_session(session.user_id, session.id, session.questions, session.status == 'active')
+    db.session.commit()  # Persist newly cached remote embeddings
+
+    _count('builds')
+    logger.info(f"Question index built: {len(index)} questions, {len(pools)} pools, {len(sessions)} sessions")
+    return index
+
+
+_index: Optional[QuestionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> QuestionIndex:
+    """The process-wide index, built from the database on first use (needs an app context)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_index()
+    return _index
+
+
+def sync_user(index: QuestionIndex, user_id: int) -> None:
+    """
+    Pull the user's new sessions into their group
+
+    Sessions written by other worker processes, or since the index was
+    built, are only known to the database. Only sessions newer than the
+    user's high-water mark, plus recorded ones still active (their
+    questions may have grown), are read.
+    """
+    from sqlalchemy import or_
+    from models import InterviewSession, db
+
+    mark, open_sessions = index.sync_point(user_id)
+    newer = InterviewSession.id > mark
+    for session in db.session.query(
+        InterviewSession.id, InterviewSession.questions, InterviewSession.status
+    ).filter(
+        InterviewSession.user_id == user_id,
+        or_(newer, InterviewSession.id.in_(open_sessions)) if open_sessions else newer
+    ).order_by(InterviewSession.id):
+        index.record_session(user_id, session.id, session.questions, session.status == 'active')
+
+
+def _user_index(user_id: Optional[int]) -> Optional[QuestionIndex]:
+    """The index synced for this user, or None when there is no user or the index is unavailable"""
+    if user_id is None:
+        return None
+    try:
+        index = get_index()
+        sync_user(index, user_id)
+        return index
+    except Exception as e:
+        # Repeat checks are best effort; generation must not fail because of them
+        _count('errors')
+        logger.warning(f"Question index unavailable: {e}")
+        return None
+
+
+def drop_repeats(
+    user_id: Optional[int],
+    questions: Dict[str, List[str]],
+    minimums: Union[int, Dict[str, int]] = 1
+) -> Dict[str, List[str]]:
+    """Remove questions the user has effectively been asked before (see QuestionIndex.drop_repeats)"""
+    index = _user_index(user_id)
+    if index is None or not isinstance(questions, dict) or "error" in questions:
+        return questions
+    _count('repeat_checks')
+    try:
+        return index.drop_repeats(user_group(user_id), questions, minimums)
+    except Exception as e:
+        _count('errors')
+        logger.warning(f"Question repeat check failed: {e}")
+        return questions
+
+
+class UserHistory:
+    """
+    The questions one user has been asked, synced from the database once
+
+    For a stream of checks (e.g. one streamed question set), so the sync
+    is not repeated per question. Checks are best effort: with no user, or
+    no index, nothing counts as a repeat.
+    """
+
+    def __init__(self, user_id: Optional[int]):
+        self.user_id = user_id
+        self.index = _user_index(user_id)
+
+    def avoid_instructions(self, limit: int = AVOID_RECENT) -> str:
+        """Prompt paragraph listing the user's most recent questions, or '' if they have none"""
+        recent = self.index.group_texts(user_group(self.user_id), limit) if self.index else []
+        if not recent:
+            return ""
+        return ("The candidate has already been asked the questions below in earlier interviews. "
+                "Do not repeat or closely paraphrase any of them:\n" + "\n".join(f"- {q}" for q in recent))
+
+    def is_repeat(self, text: str, previous: Sequence[str] = ()) -> bool:
+        """Whether the user has effectively been asked `text` already, or it repeats one of `previous`"""
+        if self.index is None:
+            return False
+        _count('repeat_checks')
+        try:
+            repeat = self.index.is_repeat(user_group(self.user_id), text, previous)
+        except Exception as e:
+            _count('errors')
+            logger.warning(f"Question repeat check failed: {e}")
+            return False
+        if repeat:
+            _count('repeats_rejected')
+        return repeat
+
+
+def avoid_instructions(user_id: Optional[int], limit: int = AVOID_RECENT) -> str:
+    """Prompt paragraph listing the user's most recent questions, or '' if they have none"""
+    return UserHistory(user_id).avoid_instructions(limit)
+
+
+def is_repeat(user_id: Optional[int], text: str, previous: Sequence[str] = ()) -> bool:
+    """Whether the user has effectively been asked `text` already, or it repeats one of `previous`"""
+    return UserHistory(user_id).is_repeat(text, previous)
+
+
+def has_repeats(user_id: Optional[int], questions: Union[List[str], Dict[str, List[str]]]) -> bool:
+    """
+    Whether any question in a list or category dict repeats one the user was asked before
+
+    Also True when the check can't run (e.g. outside an app context), so
+    callers fall back to questions generated with the avoid list.
+    """
+    index = _user_index(user_id) if has_app_context() else None
+    if index is None:
+        return True
+    groups = questions.values() if isinstance(questions, dict) else [questions]
+    texts = [t for group in groups if isinstance(group, list) for t in group if isinstance(t, str) and t.strip()]
+    _count('repeat_checks')
+    try:
+        return any(score >= index.threshold for _, score in index.nearest_in_group(user_group(user_id), texts))
+    except Exception as e:
+        _count('errors')
+        logger.warning(f"Question repeat check failed: {e}")
+        return True
+
+
+def get_stats() -> Dict[str, Any]:
+    """Snapshot of index counters for /api/metrics"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['threshold'] = DUPLICATE_THRESHOLD
+    stats['loaded'] = _index is not None
+    if _index is not None:
+        stats.update(_index.get_stats())
+    return stats
@@ -8,18 +8,31 @@ import os
 import re
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from collections import Counter
 
-import pdfplumber
 from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
+import llm_gateway
+import pdf_extraction
+from skill_matcher import SkillMatch
+from skill_taxonomy import get_taxonomy
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever extraction logic or the LLM prompt change so cached analyses
+# produced by older code are no longer served
+ANALYZER_VERSION = "3"
+
+
+def analyzer_version() -> str:
+    """Cache version tag: analyzer code version plus the loaded taxonomy version"""
+    return f"{ANALYZER_VERSION}-{get_taxonomy().version}"
+
 
 class TechnicalSkill(BaseModel):
     """Model for technical skills"""
@@ -50,6 +63,7 @@ class ResumeAnalysis(BaseModel):
     projects: List[Dict[str, Any]] = Field(default_factory=list)
     summary: str = ""
     experience_level: str = "entry"  # entry, mid, senior
+    llm_enriched: bool = False  # True when the Gemini extraction succeeded
 
 
 class ResumeAnalyzer:
@@ -60,148 +74,124 @@ class ResumeAnalyzer:
     3. LLM (Gemini) for intelligent extraction
     """
     
-    # Comprehensive technical skills database
-    TECHNICAL_SKILLS = {
-        'programming_languages': [
-            'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 
-            'ruby', 'go', 'rust', 'swift', 'kotlin', 'scala', 'r', 'matlab',
-            'perl', 'shell', 'bash', 'powershell', 'dart', 'objective-c'
-        ],
-        'web_frameworks': [
-            'react', 'angular', 'vue', 'svelte', 'next.js', 'nuxt', 'gatsby',
-            'node.js', 'express', 'django', 'flask', 'fastapi', 'spring', 
-            'spring boot', 'laravel', 'rails', 'asp.net', 'blazor'
-        ],
-        'mobile': [
-            'react native', 'flutter', 'android', 'ios', 'xamarin', 'ionic',
-            'swiftui', 'jetpack compose'
-        ],
-        'databases': [
-            'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
-            'cassandra', 'dynamodb', 'oracle', 'sql server', 'sqlite', 'firebase',
-            'mariadb', 'neo4j', 'couchdb'
-        ],
-        'cloud_devops': [
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'gitlab ci',
-            'github actions', 'terraform', 'ansible', 'circleci', 'travis ci',
-            'heroku', 'netlify', 'vercel', 'cloud functions', 'lambda'
-        ],
-        'data_ai_ml': [
-            'machine learning', 'deep learning', 'data science', 'ai', 
-            'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 
-            'numpy', 'opencv', 'nlp', 'computer vision', 'data analysis',
-            'big data', 'hadoop', 'spark', 'tableau', 'power bi'
-        ],
-        'tools_technologies': [
-            'git', 'github', 'gitlab', 'bitbucket', 'jira', 'confluence',
-            'agile', 'scrum', 'kanban', 'ci/cd', 'microservices', 'rest api',
-            'graphql', 'websocket', 'oauth', 'jwt', 'unit testing', 'jest',
-            'pytest', 'junit', 'selenium', 'cypress'
-        ],
-        'frontend': [
-            'html', 'html5', 'css', 'css3', 'sass', 'scss', 'less', 'bootstrap',
-            'tailwind', 'material ui', 'styled components', 'webpack', 'vite',
-            'babel', 'responsive design', 'ui/ux'
-        ]
-    }
-    
-    # Soft skills to look for
-    SOFT_SKILLS = [
-        'leadership', 'teamwork', 'communication', 'problem solving',
-        'critical thinking', 'creativity', 'adaptability', 'time management',
-        'collaboration', 'presentation', 'analytical', 'detail-oriented',
-        'initiative', 'mentoring', 'conflict resolution', 'negotiation',
-        'project management', 'stakeholder management', 'agile mindset',
-        'customer focus', 'innovation', 'strategic thinking'
-    ]
-    
-    # Project keywords
-    PROJECT_KEYWORDS = [
-        'project', 'developed', 'built', 'created', 'implemented', 'designed',
-        'architected', 'led', 'managed', 'contributed', 'worked on'
-    ]
+    # Skill lists, aliases and the compiled matchers live in the shared,
+    # hot-reloadable taxonomy (see skill_taxonomy.py)
     
-    def __init__(self, gemini_api_key: str = None):
-        """Initialize the analyzer with Gemini API"""
+    def __init__(self, gemini_api_key: str = None, extraction_backend: Optional[str] = None):
+        """
+        Initialize the analyzer with Gemini API
+        
+        Args:
+            extraction_backend: 'pdfplumber', 'pypdf', 'raw' or 'auto' (per-document
+                                choice, see pdf_extraction); defaults to PDF_EXTRACTION_BACKEND
+        """
+        self.extraction_backend = extraction_backend
         api_key = gemini_api_key or os.environ.get("GEMINI_API_KEY", "")
-        if api_key:
-            self.client = genai.Client(api_key=api_key)
-        else:
+        if not api_key:
             self.client = None
             logger.warning("No Gemini API key provided. LLM-based extraction disabled.")
+        elif api_key == os.environ.get("GEMINI_API_KEY"):
+            # Reuse the process-wide client and its connection pool
+            from gemini import client
+            self.client = client
+        else:
+            self.client = genai.Client(api_key=api_key)
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF using pdfplumber (more robust than PyPDF2)"""
+        """Extract text from PDF page by page with the configured extraction backend"""
         try:
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
+            return pdf_extraction.extract_text(pdf_path, backend=self.extraction_backend).text
         except Exception as e:
-            logger.error(f"Error extracting PDF text with pdfplumber: {e}")
-            # Fallback to PyPDF2
-            try:
-                import PyPDF2
-                text = ""
-                with open(pdf_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                return text.strip()
-            except Exception as e2:
-                logger.error(f"Error with PyPDF2 fallback: {e2}")
-                return ""
+            logger.error(f"Error extracting PDF text: {e}")
+            return ""
     
-    def extract_technical_skills(self, text: str) -> List[Dict[str, str]]:
-        """Extract technical skills using pattern matching"""
-        text_lower = text.lower()
-        found_skills = []
-        
-        # Search for skills from each category
-        for category, skills in self.TECHNICAL_SKILLS.items():
-            for skill in skills:
-                # Use word boundaries for accurate matching
-                pattern = r'\b' + re.escape(skill) + r'\b'
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    found_skills.append({
-                        'name': skill,
-                        'category': category.replace('_', ' ').title(),
-                        'proficiency': 'mentioned'
-                    })
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_skills = []
-        for skill in found_skills:
-            if skill['name'] not in seen:
-                seen.add(skill['name'])
-                unique_skills.append(skill)
-        
-        return unique_skills
+    def scan_pdf(self, pdf_path: str) -> Tuple[str, List[SkillMatch], List[SkillMatch]]:
+        """
+        Extract text and match skills while pages are still being extracted
+        
+        Each page is run through the taxonomy matchers as soon as it arrives;
+        the first occurrence of every skill is kept with its offset in the
+        joined text, exactly as if the whole text had been scanned at once.
+        
+        Returns:
+            (text, technical matches, soft matches), matches in taxonomy order
+        """
+        taxonomy = get_taxonomy()
+        technical: Dict[str, SkillMatch] = {}
+        soft: Dict[str, SkillMatch] = {}
+        offset = 0
+        
+        stream = pdf_extraction.PageStream(pdf_path, backend=self.extraction_backend)
+        try:
+            for page in stream:
+                if not page.text:
+                    continue
+                for found, matcher in ((technical, taxonomy.technical_matcher), (soft, taxonomy.soft_matcher)):
+                    for match in matcher.find_all(page.text):
+                        if match.payload.name not in found:
+                            found[match.payload.name] = match._replace(
+                                start=match.start + offset, end=match.end + offset
+                            )
+                offset += len(page.text) + 1  # pages are joined with '\n'
+        except Exception as e:
+            logger.error(f"Error extracting PDF text: {e}")
+            return "", [], []
+        stream.log_timing()
+        
+        result = stream.result()
+        # result.text is stripped; shift offsets past any leading whitespace removed
+        joined_start = next((page.text for page in result.pages if page.text), "")
+        lead = len(joined_start) - len(joined_start.lstrip())
+        
+        def ordered(found):
+            return [
+                match._replace(start=match.start - lead, end=match.end - lead)
+                for match in sorted(found.values(), key=lambda m: m.index)
+            ]
+        
+        return result.text, ordered(technical), ordered(soft)
+    
+    def extract_technical_skills(self, text: str, matches: Optional[List[SkillMatch]] = None) -> List[Dict[str, str]]:
+        """
+        Extract technical skills using the shared taxonomy matcher
+        `matches` may supply precomputed unique matches (see scan_pdf)
+        """
+        # Aliases collapse onto their canonical name; output keeps taxonomy order
+        if matches is None:
+            matches = get_taxonomy().technical_matcher.find_unique(
+                text, key=lambda match: match.payload.name
+            )
+        return [
+            {
+                'name': match.payload.name,
+                'category': match.payload.category.replace('_', ' ').title(),
+                'proficiency': 'mentioned'
+            }
+            for match in matches
+        ]
     
-    def extract_soft_skills(self, text: str) -> List[Dict[str, str]]:
-        """Extract soft skills using pattern matching"""
-        text_lower = text.lower()
+    def extract_soft_skills(self, text: str, matches: Optional[List[SkillMatch]] = None) -> List[Dict[str, str]]:
+        """
+        Extract soft skills using the shared taxonomy matcher
+        `matches` may supply precomputed unique matches (see scan_pdf)
+        """
         found_soft_skills = []
         
-        for skill in self.SOFT_SKILLS:
-            pattern = r'\b' + re.escape(skill) + r'\b'
-            matches = re.finditer(pattern, text_lower, re.IGNORECASE)
+        # Only the first instance of each skill is kept
+        if matches is None:
+            matches = get_taxonomy().soft_matcher.find_unique(
+                text, key=lambda match: match.payload.name
+            )
+        for match in matches:
+            # Get context (50 chars before and after)
+            start = max(0, match.start - 50)
+            end = min(len(text), match.end + 50)
+            context = text[start:end].strip()
             
-            for match in matches:
-                # Get context (50 chars before and after)
-                start = max(0, match.start() - 50)
-                end = min(len(text), match.end() + 50)
-                context = text[start:end].strip()
-                
-                found_soft_skills.append({
-                    'skill': skill.title(),
-                    'context': context
-                })
-                break  # Only one instance per skill
+            found_soft_skills.append({
+                'skill': match.payload.name.title(),
+                'context': context
+            })
         
         return found_soft_skills
     
@@ -249,25 +239,19 @@ class ResumeAnalyzer:
             projects.append(current_project)
         
         # Extract technologies from each project description
+        technical_matcher = get_taxonomy().technical_matcher
         for project in projects:
-            desc_lower = project['description'].lower()
-            techs = []
-            for category, skills in self.TECHNICAL_SKILLS.items():
-                for skill in skills:
-                    if skill in desc_lower:
-                        techs.append(skill)
-            project['technologies'] = list(set(techs))[:5]  # Limit to 5
+            matches = technical_matcher.find_unique(
+                project['description'], key=lambda match: match.payload.name
+            )
+            techs = [match.payload.name for match in matches]
+            project['technologies'] = techs[:5]  # Limit to 5
         
         return projects[:5]  # Return max 5 projects
     
-    def llm_extract_resume_details(self, text: str) -> Dict[str, Any]:
-        """Use Gemini LLM to intelligently extract resume details"""
-        if not self.client:
-            logger.warning("LLM extraction skipped - no API key")
-            return {}
-        
-        try:
-            prompt = f"""You are an expert resume analyzer. Analyze the following resume text and extract detailed information.
+    def extraction_request(self, text: str) -> Tuple[str, types.GenerateContentConfig]:
+        """Prompt and generation config of the LLM extraction (also used for batch jobs)"""
+        prompt = f"""You are an expert resume analyzer. Analyze the following resume text and extract detailed information.
 
 Resume Text:
 {text[:4000]}  # Limit to 4000 chars for API efficiency
@@ -300,59 +284,65 @@ Focus on:
 4. Overall experience level based on years and complexity
 
 Be thorough but concise. Return ONLY valid JSON."""
-
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    temperature=0.3
-                )
-            )
-            
-            if response.text:
-                result = json.loads(response.text)
-                return result
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            temperature=0.3
+        )
+        return prompt, config
+    
+    def llm_extract_resume_details(self, text: str) -> Dict[str, Any]:
+        """Use Gemini LLM to intelligently extract resume details"""
+        if not self.client:
+            logger.warning("LLM extraction skipped - no API key")
+            return {}
+        
+        try:
+            prompt, config = self.extraction_request(text)
+            return llm_gateway.generate(prompt, config=config, parse=json.loads, client=self.client)
             
         except Exception as e:
             logger.error(f"LLM extraction error: {e}")
         
         return {}
     
-    def analyze_resume(self, pdf_path: str) -> ResumeAnalysis:
-        """
-        Complete resume analysis using hybrid approach
-        Combines pattern matching + LLM extraction
+    def parse_resume(self, pdf_path: str) -> Optional[Dict[str, Any]]:
         """
-        logger.info(f"Analyzing resume: {pdf_path}")
+        CPU-bound half of the analysis: text extraction and pattern matching
         
-        # Extract text
-        text = self.extract_text_from_pdf(pdf_path)
+        Returns a plain, picklable dict (text, technical_skills, soft_skills,
+        projects) that merge_analysis() completes, or None if no text could
+        be extracted. Batch screening runs this in worker processes.
+        """
+        text, technical_matches, soft_matches = self.scan_pdf(pdf_path)
         if not text:
             logger.error("Failed to extract text from resume")
-            return ResumeAnalysis()
+            return None
         
         logger.info(f"Extracted {len(text)} characters from resume")
         
         # Pattern-based extraction (fast, reliable)
-        technical_skills = self.extract_technical_skills(text)
-        soft_skills = self.extract_soft_skills(text)
-        projects_basic = self.extract_projects_basic(text)
-        
-        logger.info(f"Pattern matching found: {len(technical_skills)} tech skills, "
-                   f"{len(soft_skills)} soft skills, {len(projects_basic)} projects")
-        
-        # LLM-based extraction (intelligent, context-aware)
-        llm_result = self.llm_extract_resume_details(text)
+        parsed = {
+            'text': text,
+            'technical_skills': self.extract_technical_skills(text, technical_matches),
+            'soft_skills': self.extract_soft_skills(text, soft_matches),
+            'projects': self.extract_projects_basic(text),
+        }
+        logger.info(f"Pattern matching found: {len(parsed['technical_skills'])} tech skills, "
+                   f"{len(parsed['soft_skills'])} soft skills, {len(parsed['projects'])} projects")
+        return parsed
+    
+    def merge_analysis(self, parsed: Dict[str, Any], llm_result: Dict[str, Any]) -> ResumeAnalysis:
+        """Combine pattern-matching results with the LLM extraction"""
+        technical_skills = parsed['technical_skills']
+        soft_skills = parsed['soft_skills']
         
         # Merge results: prefer LLM for projects, combine skills
-        final_technical_skills = technical_skills  # Start with pattern matching
-        final_soft_skills = soft_skills
-        final_projects = projects_basic
+        final_technical_skills = list(technical_skills)  # Start with pattern matching
+        final_soft_skills = list(soft_skills)
+        final_projects = parsed['projects']
         
         if llm_result:
             # Add LLM-found skills not in pattern matching
-            llm_tech_names = {s.get('name', '').lower() for s in llm_result.get('technical_skills', [])}
             pattern_tech_names = {s['name'].lower() for s in technical_skills}
             
             for llm_skill in llm_result.get('technical_skills', []):
@@ -386,7 +376,8 @@ Be thorough but concise. Return ONLY valid JSON."""
             soft_skills=final_soft_skills[:10],
             projects=final_projects[:5],
             summary=summary,
-            experience_level=experience_level
+            experience_level=experience_level,
+            llm_enriched=bool(llm_result)
         )
         
         logger.info(f"Final analysis: {len(result.technical_skills)} tech skills, "
@@ -394,6 +385,33 @@ Be thorough but concise. Return ONLY valid JSON."""
         
         return result
     
+    def analyze_resume(
+        self,
+        pdf_path: str,
+        progress: Optional[Callable[[str, int], None]] = None
+    ) -> ResumeAnalysis:
+        """
+        Complete resume analysis using hybrid approach
+        Combines pattern matching + LLM extraction
+        
+        Args:
+            progress: optional callback(stage, percent) for background jobs
+        """
+        report = progress or (lambda stage, percent: None)
+        logger.info(f"Analyzing resume: {pdf_path}")
+        
+        # Extract text; skills are matched page by page as pages arrive
+        report('extracting_text', 10)
+        parsed = self.parse_resume(pdf_path)
+        if parsed is None:
+            return ResumeAnalysis()
+        
+        # LLM-based extraction (intelligent, context-aware)
+        report('llm_extraction', 50)
+        llm_result = self.llm_extract_resume_details(parsed['text'])
+        
+        return self.merge_analysis(parsed, llm_result)
+    
     def generate_keywords_from_analysis(self, analysis: ResumeAnalysis) -> List[str]:
         """Generate keyword list for backward compatibility"""
         keywords = []
@@ -411,23 +429,33 @@ Be thorough but concise. Return ONLY valid JSON."""
 
 
 # Convenience function for backward compatibility
-def analyze_resume_file(pdf_path: str, gemini_api_key: str = None) -> Dict[str, Any]:
+def analyze_resume_file(
+    pdf_path: str,
+    gemini_api_key: str = None,
+    progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, Any]:
     """
     Analyze a resume file and return detailed results
     
     Returns:
-        Dict with keys: technical_skills, soft_skills, projects, summary, experience_level, keywords
+        Dict with keys: technical_skills, soft_skills, projects, summary, experience_level,
+        keywords, llm_enriched
     """
     analyzer = ResumeAnalyzer(gemini_api_key)
-    analysis = analyzer.analyze_resume(pdf_path)
-    
+    analysis = analyzer.analyze_resume(pdf_path, progress=progress)
+    return analysis_to_dict(analyzer, analysis)
+
+
+def analysis_to_dict(analyzer: ResumeAnalyzer, analysis: ResumeAnalysis) -> Dict[str, Any]:
+    """The result dict returned by analyze_resume_file"""
     return {
         'technical_skills': analysis.technical_skills,
         'soft_skills': analysis.soft_skills,
         'projects': analysis.projects,
         'summary': analysis.summary,
         'experience_level': analysis.experience_level,
-        'keywords': analyzer.generate_keywords_from_analysis(analysis)
+        'keywords': analyzer.generate_keywords_from_analysis(analysis),
+        'llm_enriched': analysis.llm_enriched
     }
 
 
@@ -0,0 +1,521 @@
+"""
+Batch Resume Screening Module
+Analyzes a directory or zip archive of resumes: PDF parsing and skill
+matching run across a process pool, the Gemini extraction runs on a small
+thread pool so only a bounded number of LLM calls are in flight, and every
+result is appended to a JSONL file as soon as that resume finishes
+The JSONL file doubles as the checkpoint: re-running a batch against the
+same output skips resumes already recorded there, so a crashed run resumes
+where it stopped. With --llm-batch it also holds progress records ("parsed"
+with the parse result, "submitted" with the batch job name); the last
+record for a file is its current state
+Run from backend/: python resume_batch.py <directory-or-zip> -o results.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import zipfile
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PARSE_PROCESSES = int(os.environ.get('BATCH_PARSE_PROCESSES', str(os.cpu_count() or 2)))
+# Concurrent Gemini calls; the gateway's rate limiter still applies on top
+LLM_CONCURRENCY = int(os.environ.get('BATCH_LLM_CONCURRENCY', '4'))
+# Larger archive members are rejected instead of being extracted
+MAX_FILE_BYTES = int(os.environ.get('BATCH_MAX_FILE_BYTES', str(20 * 1024 * 1024)))
+# A resume whose parse crashed the worker pool this many times is recorded as failed
+MAX_PARSE_ATTEMPTS = 2
+# With llm_batch, parsed resumes are submitted in jobs of at most this many
+LLM_BATCH_JOB_SIZE = int(os.environ.get('BATCH_LLM_JOB_SIZE', '100'))
+
+# Batches started through the API at the same time; each one owns a process pool
+batch_slots = threading.BoundedSemaphore(int(os.environ.get('BATCH_MAX_CONCURRENT', '1')))
+
+
+class ResumeFile(NamedTuple):
+    """One resume in a batch"""
+    name: str  # path relative to the batch source, the checkpoint key
+    path: str  # readable file on disk
+    sha256: str
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_bounded(archive: zipfile.ZipFile, member: zipfile.ZipInfo, path: str) -> bool:
+    """Extract one member to path; False (and nothing left on disk) once it inflates past MAX_FILE_BYTES"""
+    written = 0
+    with archive.open(member) as src, open(path, 'wb') as dst:
+        for block in iter(lambda: src.read(1024 * 1024), b''):
+            written += len(block)
+            if written > MAX_FILE_BYTES:
+                break
+            dst.write(block)
+    if written > MAX_FILE_BYTES:
+        os.remove(path)
+        return False
+    return True
+
+
+class ResumeSource:
+    """
+    The resumes of a batch: PDFs under a directory or inside a zip archive
+
+    Archive members are extracted to a private temporary directory under
+    generated names (never the member path), so crafted paths cannot
+    escape it. Use as a context manager to remove that directory.
+    """
+
+    def __init__(self, source: str):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"No such file or directory: {source}")
+        self.source = source
+        self.rejected: List[Dict[str, str]] = []  # files skipped before parsing
+        self._tempdir: Optional[str] = None
+
+    def files(self) -> List[ResumeFile]:
+        if os.path.isdir(self.source):
+            return self._directory_files()
+        if zipfile.is_zipfile(self.source):
+            return self._archive_files()
+        raise ValueError("Batch source must be a directory or a zip archive")
+
+    def _directory_files(self) -> List[ResumeFile]:
+        files = []
+        for root, dirs, names in os.walk(self.source):
+            dirs.sort()
+            for filename in sorted(names):
+                if not filename.lower().endswith('.pdf'):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.source).replace(os.sep, '/')
+                files.append(ResumeFile(name, path, _sha256_file(path)))
+        return files
+
+    def _archive_files(self) -> List[ResumeFile]:
+        self._tempdir = tempfile.mkdtemp(prefix='resume-batch-')
+        files = []
+        with zipfile.ZipFile(self.source) as archive:
+            members = sorted(
+                (m for m in archive.infolist()
+                 if not m.is_dir() and m.filename.lower().endswith('.pdf')
+                 and not m.filename.startswith('__MACOSX/')),
+                key=lambda m: m.filename
+            )
+            for index, member in enumerate(members):
+                path = os.path.join(self._tempdir, f'{index:06d}.pdf')
+                # The header's file_size can be forged, so the bytes actually
+                # inflated are counted as well
+                if member.file_size > MAX_FILE_BYTES or not _extract_bounded(archive, member, path):
+                    self.rejected.append({"file": member.filename, "error": "File too large"})
+                    continue
+                files.append(ResumeFile(member.filename, path, _sha256_file(path)))
+        return files
+
+    def close(self) -> None:
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_checkpoint(output_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    file name -> last record already in the output file
+
+    A record cut off by a crash is dropped from the end of the file so the
+    next append starts on a clean line. Bulky fields are left out: a
+    "parsed" record carries the offset of its line as "parsed_offset"
+    instead, and a "submitted" record inherits it from the "parsed" record
+    before it.
+    """
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(output_path):
+        return records
+
+    with open(output_path, 'rb+') as f:
+        offset = 0
+        for line in iter(f.readline, b''):
+            if not line.endswith(b'\n'):
+                logger.warning(f"Dropping a partial record at the end of {output_path}")
+                f.truncate(offset)
+                break
+            line_offset, offset = offset, offset + len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or not record.get('file'):
+                continue
+            record.pop('analysis', None)
+            if record.pop('parsed', None) is not None:
+                record['parsed_offset'] = line_offset
+            elif record.get('status') == 'submitted':
+                previous = records.get(record['file']) or {}
+                if 'parsed_offset' not in previous:
+                    continue
+                record['parsed_offset'] = previous['parsed_offset']
+            records[record['file']] = record
+    return records
+
+
+def _max_requests_per_job() -> int:
+    import llm_batch
+    return llm_batch.MAX_REQUESTS_PER_JOB
+
+
+# Analyzer owned by each parse worker process (set by _init_parse_worker)
+_worker_analyzer = None
+
+
+def _init_parse_worker(extraction_backend: Optional[str]) -> None:
+    global _worker_analyzer
+    import pdf_extraction
+    from resume_analyzer import ResumeAnalyzer
+
+    # The batch already spreads resumes across processes; a per-document
+    # page pool inside every worker would oversubscribe the cores
+    pdf_extraction.PDF_WORKERS = 1
+    _worker_analyzer = ResumeAnalyzer(extraction_backend=extraction_backend)
+
+
+def _parse_resume(path: str) -> Optional[Dict[str, Any]]:
+    """Parse worker: text extraction and pattern matching for one PDF"""
+    start = time.perf_counter()
+    parsed = _worker_analyzer.parse_resume(path)
+    if parsed is not None:
+        parsed['parse_seconds'] = time.perf_counter() - start
+    return parsed
+
+
+class BatchScreening:
+    """
+    One batch run over a ResumeSource
+
+    Iterating yields one JSONL record per resume as it finishes (in
+    completion order); each is written and flushed to `output_path` first.
+    Records look like {"file", "sha256", "status": "completed"|"failed",
+    "analysis" | "error", "parse_seconds", "llm_seconds"}. Resumes already
+    in the output with the same content hash are skipped; failed ones are
+    retried when `retry_failed` is set. With `llm_batch`, parsed resumes are
+    checkpointed as they finish and submitted as batch jobs of
+    LLM_BATCH_JOB_SIZE; their records are emitted once parsing is done and
+    each job has finished. A restarted run neither re-parses checkpointed
+    resumes nor resubmits them, but waits on the jobs already submitted.
+    summary() reports throughput.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        output_path: str,
+        processes: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        use_llm: bool = True,
+        retry_failed: bool = False,
+        extraction_backend: Optional[str] = None,
+        gemini_api_key: Optional[str] = None,
+        llm_batch: bool = False
+    ):
+        self.source = source
+        self.output_path = output_path
+        self.processes = max(1, processes or PARSE_PROCESSES)
+        self.llm_concurrency = max(1, llm_concurrency or LLM_CONCURRENCY)
+        self.use_llm = use_llm
+        self.retry_failed = retry_failed
+        self.extraction_backend = extraction_backend
+        self.gemini_api_key = gemini_api_key
+        # Submit the LLM extractions as Batch API jobs instead of interactive calls
+        self.llm_batch = llm_batch
+        self.total = self.skipped = self.completed = self.failed = 0
+        self.seconds = 0.0
+
+    def _pending_files(self, source: ResumeSource, batch_mode: bool = False) -> Tuple[
+            List[ResumeFile], List[Tuple[ResumeFile, int]], Dict[str, Dict[int, Tuple[ResumeFile, int]]]]:
+        """
+        Resumes still to do: (to parse, parsed but not submitted, submitted by job name and index)
+
+        The last two are only filled in batch mode, from the checkpoint's
+        progress records.
+        """
+        done = load_checkpoint(self.output_path)
+        pending, parsed, submitted = [], [], {}
+        for resume in source.files():
+            previous = done.get(resume.name)
+            if not previous or previous.get('sha256') != resume.sha256:
+                pending.append(resume)
+            elif previous.get('status') == 'completed' or (
+                    previous.get('status') == 'failed' and not self.retry_failed):
+                self.skipped += 1
+            elif batch_mode and previous.get('status') == 'parsed':
+                parsed.append((resume, previous['parsed_offset']))
+            elif batch_mode and previous.get('status') == 'submitted':
+                submitted.setdefault(previous['job'], {})[previous['index']] = (resume, previous['parsed_offset'])
+            else:
+                pending.append(resume)
+        # Archive members rejected before parsing are recorded once
+        source.rejected = [r for r in source.rejected if r['file'] not in done]
+        return pending, parsed, submitted
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: forked workers would inherit the parent's threads and locks
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_parse_worker,
+            initargs=(self.extraction_backend,)
+        )
+
+    def _read_parsed(self, offset: int) -> Dict[str, Any]:
+        """The parse result of the "parsed" record written at `offset` in the output"""
+        with open(self.output_path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())['parsed']
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        from resume_analyzer import ResumeAnalyzer, analysis_to_dict
+
+        start = time.perf_counter()
+        analyzer = ResumeAnalyzer(self.gemini_api_key, extraction_backend=self.extraction_backend)
+        use_llm = self.use_llm and (self.llm_batch or analyzer.client is not None)
+        batch_mode = use_llm and self.llm_batch
+
+        def enrich(parsed):
+            llm_start = time.perf_counter()
+            llm_result = analyzer.llm_extract_resume_details(parsed['text']) if use_llm else {}
+            llm_seconds = time.perf_counter() - llm_start
+            return analysis_to_dict(analyzer, analyzer.merge_analysis(parsed, llm_result)), llm_seconds
+
+        with ResumeSource(self.source) as source, open(self.output_path, 'a', encoding='utf-8') as output:
+            def checkpoint(record) -> int:
+                """Append a record durably; returns its offset in the output"""
+                offset = output.tell()
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+                os.fsync(output.fileno())
+                return offset
+
+            def emit(record):
+                checkpoint(record)
+                if record['status'] == 'completed':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                return record
+
+            queue, unsubmitted, resumed_jobs = self._pending_files(source, batch_mode)
+            queue.reverse()  # pop() from the end keeps source order
+            resumed = len(unsubmitted) + sum(len(members) for members in resumed_jobs.values())
+            self.total = self.skipped + len(queue) + resumed + len(source.rejected)
+            for rejected in source.rejected:
+                yield emit({"file": rejected["file"], "status": "failed", "error": rejected["error"]})
+
+            # Batch mode: parsed resumes waiting to be submitted (resume, parse result or
+            # its checkpoint offset), then the submitted jobs (name, index -> same, submit time)
+            chunk: List[Tuple[ResumeFile, Any]] = list(unsubmitted)
+            jobs = [(name, members, start) for name, members in resumed_jobs.items()]
+
+            def submit_chunk() -> Iterator[Dict[str, Any]]:
+                import llm_batch
+
+                batch = llm_batch.LLMBatch(display_name='resume-screening')
+                for index, (_, parsed) in enumerate(chunk):
+                    if not isinstance(parsed, dict):
+                        parsed = self._read_parsed(parsed)
+                    prompt, config = analyzer.extraction_request(parsed['text'])
+                    batch.add(index, prompt, config=config, parse=json.loads)
+                try:
+                    name, = batch.submit()
+                except llm_batch.BatchJobError as e:
+                    logger.error(f"Resume extraction batch failed: {e}")
+                    yield from self._batch_records(analyzer, dict(enumerate(chunk)), {}, 0.0, emit)
+                else:
+                    for index, (resume, _) in enumerate(chunk):
+                        checkpoint({"file": resume.name, "sha256": resume.sha256, "status": "submitted",
+                                    "job": name, "index": index})
+                    jobs.append((name, dict(enumerate(chunk)), time.perf_counter()))
+                chunk.clear()
+
+            attempts: Dict[str, int] = {}
+            # Parsed resumes waiting on the LLM stage are held in memory, so
+            # parsing is only allowed to run this far ahead of it
+            max_in_flight = self.processes + 2 * self.llm_concurrency
+            job_size = max(1, min(LLM_BATCH_JOB_SIZE, _max_requests_per_job()))
+            pool = self._new_pool()
+            llm_pool = ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix='batch-llm')
+            in_flight: Dict[Any, Any] = {}  # future -> (stage, ResumeFile, parse seconds or pool)
+            try:
+                while queue or in_flight:
+                    while queue and len(in_flight) < max_in_flight:
+                        resume = queue.pop()
+                        in_flight[pool.submit(_parse_resume, resume.path)] = ('parse', resume, pool)
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, resume, extra = in_flight.pop(future)
+                        record = {"file": resume.name, "sha256": resume.sha256}
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            # A worker died (e.g. a PDF crashed the parser); it is not
+                            # known which resume did it, so every affected one is retried
+                            if extra is pool:
+                                pool.shutdown(wait=False)
+                                pool = self._new_pool()
+                            attempts[resume.name] = attempts.get(resume.name, 0) + 1
+                            if attempts[resume.name] < MAX_PARSE_ATTEMPTS:
+                                queue.append(resume)
+                            else:
+                                record.update(status='failed', error='Parser crashed')
+                                yield emit(record)
+                            continue
+                        except Exception as e:
+                            logger.error(f"Batch analysis of {resume.name} failed: {e}")
+                            record.update(status='failed', error=str(e))
+                            yield emit(record)
+                            continue
+
+                        if stage == 'parse':
+                            if result is None:
+                                record.update(status='failed', error='No text could be extracted')
+                                yield emit(record)
+                            elif batch_mode:
+                                # Only the checkpoint offset stays in memory
+                                record.update(status='parsed', parsed=result)
+                                chunk.append((resume, checkpoint(record)))
+                                if len(chunk) >= job_size:
+                                    yield from submit_chunk()
+                            else:
+                                in_flight[llm_pool.submit(enrich, result)] = (
+                                    'llm', resume, result.pop('parse_seconds')
+                                )
+                        else:
+                            analysis, llm_seconds = result
+                            record.update(status='completed', analysis=analysis,
+                                          parse_seconds=round(extra, 3),
+                                          llm_seconds=round(llm_seconds, 3))
+                            yield emit(record)
+
+                if chunk:
+                    yield from submit_chunk()
+                if jobs:
+                    pool.shutdown(wait=False)
+                for name, members, submitted_at in jobs:
+                    results = self._wait_for_job(name, max(members) + 1)
+                    yield from self._batch_records(
+                        analyzer, members, results, time.perf_counter() - submitted_at, emit
+                    )
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+                llm_pool.shutdown(wait=False, cancel_futures=True)
+                self.seconds = time.perf_counter() - start
+
+    def _wait_for_job(self, name: str, size: int) -> Dict[int, Any]:
+        """index -> BatchResult of a submitted extraction job ({} if it could not be waited on)"""
+        import llm_batch
+
+        batch = llm_batch.LLMBatch(display_name='resume-screening')
+        for index in range(size):
+            batch.add(index, None, parse=json.loads)
+        try:
+            batch.attach(name)
+            return batch.wait()
+        except Exception as e:
+            logger.error(f"Resume extraction batch {name} failed: {e}")
+            return {}
+
+    def _batch_records(self, analyzer, members: Dict[int, Tuple[ResumeFile, Any]], results: Dict[int, Any],
+                       llm_seconds: float, emit) -> Iterator[Dict[str, Any]]:
+        """Complete the records of one extraction job's resumes"""
+        from resume_analyzer import analysis_to_dict
+
+        for index, (resume, parsed) in sorted(members.items()):
+            if not isinstance(parsed, dict):
+                parsed = self._read_parsed(parsed)
+            parse_seconds = parsed.pop('parse_seconds', 0.0)
+            result = results.get(index)
+            if result is None or not result.ok:
+                # Same fallback as a failed interactive call: pattern matching only
+                logger.warning(f"No batch extraction for {resume.name}: {result.error if result else 'batch failed'}")
+            llm_result = result.value if result is not None and result.ok and isinstance(result.value, dict) else {}
+            analysis = analysis_to_dict(analyzer, analyzer.merge_analysis(parsed, llm_result))
+            yield emit({
+                "file": resume.name,
+                "sha256": resume.sha256,
+                "status": "completed",
+                "analysis": analysis,
+                "parse_seconds": round(parse_seconds, 3),
+                "llm_seconds": round(llm_seconds, 3),
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts and throughput of this run (skipped resumes are not counted as processed)"""
+        processed = self.completed + self.failed
+        return {
+            "total": self.total,
+            "processed": processed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 2),
+            "resumes_per_minute": round(60 * processed / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a directory or zip archive of PDF resumes")
+    parser.add_argument('source', help="directory of PDFs or a .zip archive")
+    parser.add_argument('-o', '--output', default='resume_batch.jsonl',
+                        help="JSONL results file, also the checkpoint (default: resume_batch.jsonl)")
+    parser.add_argument('-p', '--processes', type=int, default=PARSE_PROCESSES,
+                        help="parse worker processes")
+    parser.add_argument('-c', '--llm-concurrency', type=int, default=LLM_CONCURRENCY,
+                        help="concurrent Gemini calls")
+    parser.add_argument('--no-llm', action='store_true', help="pattern matching only")
+    parser.add_argument('--llm-batch', action='store_true',
+                        help="submit the LLM extractions as one Gemini batch job (cheaper, slower)")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="re-analyze resumes recorded as failed in the output")
+    parser.add_argument('--backend', default=None, help="PDF extraction backend (see pdf_extraction)")
+    args = parser.parse_args(argv)
+
+    batch = BatchScreening(
+        args.source, args.output,
+        processes=args.processes,
+        llm_concurrency=args.llm_concurrency,
+        use_llm=not args.no_llm,
+        retry_failed=args.retry_failed,
+        extraction_backend=args.backend,
+        llm_batch=args.llm_batch
+    )
+    for record in batch:
+        done = batch.completed + batch.failed + batch.skipped
+        print(f"[{done}/{batch.total}] {record['status']:9s} {record['file']}", file=sys.stderr)
+    print(json.dumps(batch.summary()))
+    return 0 if batch.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Resume Analysis Cache
+Content-addressed cache of analyze_resume_file results so re-uploading an
+identical PDF skips text extraction, skill matching and the Gemini call
+Entries are keyed by SHA-256 of the file bytes plus the analyzer/taxonomy version
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from models import ResumeAnalysisCache, db
+from resume_analyzer import analyzer_version
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = timedelta(days=int(os.environ.get('RESUME_CACHE_TTL_DAYS', '30')))
+CACHE_MAX_ENTRIES = int(os.environ.get('RESUME_CACHE_MAX_ENTRIES', '5000'))
+
+
+def hash_resume_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest used as the cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_cached_analysis(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Return the cached analysis for this file hash, or None on a miss/expired entry"""
+    entry = ResumeAnalysisCache.query.filter_by(
+        content_hash=content_hash,
+        analyzer_version=analyzer_version()
+    ).first()
+    
+    if entry is None:
+        return None
+    
+    now = datetime.utcnow()
+    if entry.created_at and entry.created_at < now - CACHE_TTL:
+        db.session.delete(entry)
+        db.session.commit()
+        return None
+    
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_accessed_at = now
+    db.session.commit()
+    
+    logger.info(f"Resume analysis cache hit: {content_hash[:12]}")
+    return json.loads(entry.analysis)
+
+
+def store_analysis(content_hash: str, analysis: Dict[str, Any]) -> None:
+    """Persist an analysis result and evict expired / least recently used entries"""
+    try:
+        version = analyzer_version()
+        entry = ResumeAnalysisCache.query.filter_by(
+            content_hash=content_hash,
+            analyzer_version=version
+        ).first()
+        
+        if entry is None:
+            entry = ResumeAnalysisCache()
+            entry.content_hash = content_hash
+            entry.analyzer_version = version
+            db.session.add(entry)
+        
+        entry.analysis = json.dumps(analysis)
+        entry.created_at = datetime.utcnow()
+        entry.last_accessed_at = entry.created_at
+        db.session.commit()
+        
+        evict_expired_entries()
+    except Exception as e:
+        # A cache write must never fail the upload itself
+        db.session.rollback()
+        logger.error(f"Failed to store resume analysis cache entry: {e}")
+
+
+def evict_expired_entries() -> int:
+    """Delete entries past their TTL, then trim the table to CACHE_MAX_ENTRIES"""
+    cutoff = datetime.utcnow() - CACHE_TTL
+    removed = ResumeAnalysisCache.query.filter(
+        db.or_(
+            ResumeAnalysisCache.created_at < cutoff,
+            ResumeAnalysisCache.analyzer_version != analyzer_version()
+        )
+    ).delete(synchronize_session=False)
+    
+    overflow = ResumeAnalysisCache.query.count() - CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = [
+            row.id for row in ResumeAnalysisCache.query
+            .with_entities(ResumeAnalysisCache.id)
+            .order_by(ResumeAnalysisCache.last_accessed_at.asc())
+            .limit(overflow)
+        ]
+        removed += ResumeAnalysisCache.query.filter(
+            ResumeAnalysisCache.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+    
+    db.session.commit()
+    if removed:
+        logger.info(f"Evicted {removed} resume analysis cache entries")
+    return removed
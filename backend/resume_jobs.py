@@ -0,0 +1,142 @@
+"""
+Resume Analysis Jobs
+Runs ResumeAnalyzer off the request thread: the upload endpoint stores the file
+and enqueues a job, the background pool analyzes it and records progress and
+the result in the ResumeAnalysisJob table
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+import background
+from models import ResumeAnalysisJob, db
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_resume_analysis(user_id: int, filename: str, filepath: str,
+                            content_hash: Optional[str] = None) -> ResumeAnalysisJob:
+    """Create a queued job row and hand it to the background pool"""
+    job = ResumeAnalysisJob()
+    job.id = uuid.uuid4().hex
+    job.user_id = user_id
+    job.filename = filename
+    job.content_hash = content_hash
+    job.status = 'queued'
+    job.progress = 0
+    db.session.add(job)
+    db.session.commit()
+    
+    background.submit(run_resume_analysis_job, job.id, filepath)
+    return job
+
+
+def _update_job(job_id: str, **fields) -> None:
+    job = db.session.get(ResumeAnalysisJob, job_id)
+    if job is None:
+        return
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def extract_resume_keywords(filepath: str) -> List[str]:
+    """Extract keywords from uploaded PDF resume (the fallback when full analysis fails)"""
+    try:
+        import PyPDF2
+        
+        with open(filepath, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text()
+        
+        # Same compiled taxonomy matcher as ResumeAnalyzer; aliases such as
+        # 'nodejs' are counted under their canonical name
+        from skill_taxonomy import get_taxonomy
+        text_lower = text.lower()
+        found_skills = [match.payload.name for match in get_taxonomy().technical_matcher.find_all(text_lower)]
+        
+        # Additional keyword extraction from common resume terms
+        words = re.findall(r'\b[a-zA-Z]{3,}\b', text_lower)
+        
+        # Filter common resume keywords
+        resume_keywords = ['experience', 'project', 'developed', 'designed', 'implemented', 
+                          'managed', 'created', 'built', 'led', 'collaborated', 'analyzed',
+                          'optimization', 'performance', 'testing', 'debugging', 'integration']
+        
+        found_keywords = [word for word in words if word in resume_keywords]
+        
+        # Combine and get most frequent
+        all_keywords = found_skills + found_keywords
+        if all_keywords:
+            keyword_counts = Counter(all_keywords)
+            return [keyword for keyword, count in keyword_counts.most_common(10)]
+        else:
+            # Fallback to basic skill detection
+            basic_skills = ['programming', 'development', 'software', 'engineering', 'technical']
+            return [skill for skill in basic_skills if skill in text_lower][:5]
+        
+    except Exception as e:
+        logger.error(f"Error extracting keywords: {e}")
+        return ['general programming', 'software development']
+
+
+def _fail_job(job_id: str, filepath: str, error: str) -> None:
+    """Mark a job failed, storing the basic keyword fallback its status polls return"""
+    _update_job(job_id, status='failed', stage='failed', error=error,
+                fallback_keywords=json.dumps(extract_resume_keywords(filepath)),
+                completed_at=datetime.utcnow())
+
+
+def run_resume_analysis_job(job_id: str, filepath: str) -> None:
+    """Worker entry point: analyze the stored PDF and persist the outcome"""
+    from resume_analyzer import analyze_resume_file
+    from resume_cache import store_analysis
+    
+    _update_job(job_id, status='running', stage='starting', progress=5)
+    
+    try:
+        analysis = analyze_resume_file(
+            filepath,
+            os.environ.get('GEMINI_API_KEY'),
+            progress=lambda stage, percent: _update_job(job_id, stage=stage, progress=percent)
+        )
+    except Exception as e:
+        logger.error(f"Resume analysis job {job_id} failed: {e}")
+        db.session.rollback()
+        _fail_job(job_id, filepath, str(e))
+        return
+    
+    job = db.session.get(ResumeAnalysisJob, job_id)
+    # Only cache complete results so a transient LLM failure isn't served forever
+    if job is not None and job.content_hash and analysis.get('llm_enriched'):
+        store_analysis(job.content_hash, analysis)
+    
+    _update_job(job_id, status='completed', stage='completed', progress=100,
+                result=json.dumps(analysis), completed_at=datetime.utcnow())
+
+
+def recover_pending_jobs(upload_folder: str) -> int:
+    """Re-enqueue jobs left queued/running by a previous process"""
+    pending = ResumeAnalysisJob.query.filter(
+        ResumeAnalysisJob.status.in_(['queued', 'running'])
+    ).all()
+    
+    for job in pending:
+        filepath = os.path.join(upload_folder, job.filename)
+        if os.path.exists(filepath):
+            background.submit(run_resume_analysis_job, job.id, filepath)
+        else:
+            _fail_job(job.id, filepath, 'Uploaded file no longer available')
+    
+    if pending:
+        logger.info(f"Recovered {len(pending)} pending resume analysis jobs")
+    return len(pending)
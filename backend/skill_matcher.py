@@ -0,0 +1,123 @@
+"""
+Skill Matcher Module
+Finds every occurrence of a fixed set of skill terms in one pass over the text
+Terms are compiled once into a character trie; matching walks the trie only
+from word-start positions, so cost grows with text length, not taxonomy size
+"""
+
+import re
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Tuple
+
+# Trie key holding the terms that end at a node
+_TERMINAL = '\0'
+
+
+class SkillMatch(NamedTuple):
+    """A single occurrence of a term in the scanned text"""
+    term: str  # taxonomy term as registered (lowercase)
+    payload: Any  # caller-supplied data, e.g. the skill category
+    index: int  # registration order of the term, for stable output ordering
+    start: int  # offset of the first matched character
+    end: int  # offset one past the last matched character
+
+
+def _is_word_char(char: str) -> bool:
+    """Same definition as the regex \\w class"""
+    return char.isalnum() or char == '_'
+
+
+class SkillMatcher:
+    """
+    Multi-term matcher with word-boundary semantics
+
+    A term that starts (or ends) with a word character only matches when it
+    is not glued to another word character on that side, mirroring
+    r'\\b' + re.escape(term) + r'\\b' for ordinary words while still matching
+    terms such as 'c++' or 'c#' that end in punctuation. Overlapping and
+    nested terms ('spring' inside 'spring boot') are all reported.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, Any]]):
+        """
+        Args:
+            terms: (term, payload) pairs; terms are lowercased and
+                   duplicates keep every payload
+        """
+        self._root: Dict[str, Any] = {}
+        self.term_count = 0
+
+        for index, (term, payload) in enumerate(terms):
+            term = term.lower()
+            if not term:
+                continue
+            node = self._root
+            for char in term:
+                node = node.setdefault(char, {})
+            node.setdefault(_TERMINAL, []).append((term, payload, index))
+            self.term_count += 1
+
+        self._start_pattern = self._compile_start_pattern()
+
+    def _compile_start_pattern(self) -> re.Pattern:
+        """Regex locating every position where some term could begin"""
+        word_starts = sorted(c for c in self._root if c != _TERMINAL and _is_word_char(c))
+        other_starts = sorted(c for c in self._root if c != _TERMINAL and not _is_word_char(c))
+
+        alternatives = []
+        if word_starts:
+            alternatives.append(r'(?<!\w)(?=[' + ''.join(re.escape(c) for c in word_starts) + '])')
+        if other_starts:
+            alternatives.append('(?=[' + ''.join(re.escape(c) for c in other_starts) + '])')
+
+        # A pattern that never matches when no terms were registered
+        return re.compile('|'.join(alternatives) or r'(?!)')
+
+    def find_all(self, text: str) -> List[SkillMatch]:
+        """
+        Return every term occurrence in text order
+
+        Matching is case-insensitive; offsets refer to text.lower(), which
+        has the same length as the input for ordinary resume text
+        """
+        text = text.lower()
+        length = len(text)
+        root = self._root
+        matches = []
+
+        for start_match in self._start_pattern.finditer(text):
+            start = start_match.start()
+            node = root
+            position = start
+            while position < length:
+                node = node.get(text[position])
+                if node is None:
+                    break
+                position += 1
+                entries = node.get(_TERMINAL)
+                if entries and (
+                    position == length
+                    or not _is_word_char(text[position - 1])
+                    or not _is_word_char(text[position])
+                ):
+                    for term, payload, index in entries:
+                        matches.append(SkillMatch(term, payload, index, start, position))
+
+        return matches
+
+    def find_unique(
+        self,
+        text: str,
+        key: Callable[[SkillMatch], Hashable] = None
+    ) -> List[SkillMatch]:
+        """
+        Return the first occurrence of each distinct term, in registration order
+
+        Args:
+            key: groups matches that count as the same skill, e.g. aliases
+                 resolving to one canonical name (defaults to the term)
+        """
+        key = key or (lambda match: match.term)
+        first_seen: Dict[Hashable, SkillMatch] = {}
+        for match in self.find_all(text):
+            first_seen.setdefault(key(match), match)
+        return sorted(first_seen.values(), key=lambda m: m.index)
@@ -0,0 +1,169 @@
+"""
+Skill Taxonomy Module
+Loads the versioned skill taxonomy (data/skill_taxonomy.json) into an index of
+canonical names, aliases and categories, plus the compiled skill matchers
+The file is re-read automatically when it changes on disk, so the taxonomy can
+be edited without restarting the Flask process
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from skill_matcher import SkillMatcher
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = os.environ.get(
+    'SKILL_TAXONOMY_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'skill_taxonomy.json')
+)
+# Minimum seconds between mtime checks of the taxonomy file
+RELOAD_CHECK_INTERVAL = float(os.environ.get('SKILL_TAXONOMY_CHECK_INTERVAL', '5'))
+
+
+class SkillEntry(NamedTuple):
+    """Canonical skill record shared by every alias that maps to it"""
+    name: str  # canonical lowercase name, e.g. 'node.js'
+    category: str  # e.g. 'web_frameworks'; 'soft' for soft skills
+    kind: str  # 'technical' or 'soft'
+
+
+class SkillTaxonomy:
+    """
+    In-memory index over one version of the taxonomy file
+
+    Every alias resolves to its SkillEntry in O(1), and the matchers are
+    built once per version and shared by all analyzers.
+    """
+
+    def __init__(self, data: Dict[str, Any], source: str = ""):
+        self.version = str(data.get('version', 'unversioned'))
+        self.source = source
+
+        # category -> canonical names, in file order
+        self.technical_skills: Dict[str, List[str]] = {}
+        self.soft_skills: List[str] = []
+        self.project_keywords: List[str] = [k.lower() for k in data.get('project_keywords', [])]
+
+        # any alias or canonical name (lowercase) -> SkillEntry
+        self._index: Dict[str, SkillEntry] = {}
+
+        technical_terms = []
+        for category, entries in data.get('technical', {}).items():
+            names = self.technical_skills.setdefault(category, [])
+            for raw in entries:
+                entry, terms = self._register(raw, category, 'technical')
+                names.append(entry.name)
+                technical_terms.extend((term, entry) for term in terms)
+
+        soft_terms = []
+        for raw in data.get('soft', []):
+            entry, terms = self._register(raw, 'soft', 'soft')
+            self.soft_skills.append(entry.name)
+            soft_terms.extend((term, entry) for term in terms)
+
+        # Aliases are registered right after their canonical name, so match
+        # indices keep the taxonomy's ordering
+        self.technical_matcher = SkillMatcher(technical_terms)
+        self.soft_matcher = SkillMatcher(soft_terms)
+
+    def _register(self, raw: Any, category: str, kind: str):
+        """Index one taxonomy entry ('name' or {'name', 'aliases'}) and return its terms"""
+        if isinstance(raw, str):
+            name, aliases = raw, []
+        else:
+            name, aliases = raw['name'], raw.get('aliases', [])
+
+        entry = SkillEntry(name.lower(), category, kind)
+        terms = []
+        for term in [entry.name] + [alias.lower() for alias in aliases]:
+            if term in self._index:
+                if self._index[term] != entry:
+                    logger.warning(f"Taxonomy term '{term}' already maps to '{self._index[term].name}', skipping")
+                continue
+            self._index[term] = entry
+            terms.append(term)
+        return entry, terms
+
+    def lookup(self, term: str) -> Optional[SkillEntry]:
+        """Resolve a skill name or alias to its canonical entry"""
+        return self._index.get(term.strip().lower())
+
+    def canonical_name(self, term: str) -> str:
+        """Canonical name for a term, or the lowercased term if unknown"""
+        entry = self.lookup(term)
+        return entry.name if entry else term.strip().lower()
+
+    def category_of(self, term: str) -> Optional[str]:
+        entry = self.lookup(term)
+        return entry.category if entry else None
+
+    @property
+    def technical_skill_count(self) -> int:
+        return sum(len(names) for names in self.technical_skills.values())
+
+
+def load_taxonomy(path: str = TAXONOMY_PATH) -> SkillTaxonomy:
+    """Parse a taxonomy file and build its index"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return SkillTaxonomy(data, source=path)
+
+
+_lock = threading.Lock()
+_taxonomy: Optional[SkillTaxonomy] = None
+_loaded_mtime: Optional[float] = None
+_last_check = 0.0
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """
+    Return the current taxonomy, reloading it if the file changed on disk
+
+    A broken edit keeps the previously loaded version in service.
+    """
+    global _taxonomy, _loaded_mtime, _last_check
+
+    now = time.monotonic()
+    if _taxonomy is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _taxonomy
+
+    with _lock:
+        _last_check = now
+        try:
+            mtime = os.path.getmtime(TAXONOMY_PATH)
+        except OSError as e:
+            if _taxonomy is None:
+                raise
+            logger.error(f"Cannot stat skill taxonomy file: {e}")
+            return _taxonomy
+
+        if _taxonomy is None or mtime != _loaded_mtime:
+            try:
+                taxonomy = load_taxonomy(TAXONOMY_PATH)
+            except Exception as e:
+                if _taxonomy is None:
+                    raise
+                logger.error(f"Failed to reload skill taxonomy, keeping version {_taxonomy.version}: {e}")
+                _loaded_mtime = mtime
+                return _taxonomy
+
+            _taxonomy = taxonomy
+            _loaded_mtime = mtime
+            logger.info(f"Loaded skill taxonomy version {taxonomy.version} "
+                        f"({taxonomy.technical_skill_count} technical, {len(taxonomy.soft_skills)} soft skills)")
+
+        return _taxonomy
+
+
+def reload_taxonomy() -> SkillTaxonomy:
+    """Force the next access to re-read the taxonomy file"""
+    global _loaded_mtime, _last_check
+    with _lock:
+        _loaded_mtime = None
+        _last_check = 0.0
+    return get_taxonomy()
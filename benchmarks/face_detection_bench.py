@@ -0,0 +1,142 @@
+"""
+Face Detection Benchmark
+Replays a recorded frame sequence through several detection configurations
+(downscale factor, full-detection cadence) and reports per-frame latency and
+recall against the reference full-resolution, every-frame cascade
+Run from project root:
+    python benchmarks/face_detection_bench.py <video file | directory of frames>
+    python benchmarks/face_detection_bench.py --record <directory> [frames]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+import cv2
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from face_detector import DetectionScheduler
+
+# (label, scale, detect_every) - the first entry is the reference path
+CONFIGURATIONS = [
+    ('full-frame (reference)', 1.0, 1),
+    ('full-frame, tracked', 1.0, 5),
+    ('scale 0.75', 0.75, 1),
+    ('scale 0.5', 0.5, 1),
+    ('scale 0.5, tracked', 0.5, 5),
+    ('scale 0.33, tracked', 0.33, 5),
+]
+# Minimum intersection-over-union for a box to count as the same face
+IOU_THRESHOLD = 0.5
+
+
+def load_frames(path):
+    """Grayscale frames from a video file or a directory of images (sorted by name)"""
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            image = cv2.imread(os.path.join(path, name))
+            if image is not None:
+                frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+        return frames
+
+    capture = cv2.VideoCapture(path)
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    capture.release()
+    return frames
+
+
+def record_frames(directory, count):
+    """Capture `count` webcam frames (mirrored, like the live stream) into a directory"""
+    os.makedirs(directory, exist_ok=True)
+    camera = cv2.VideoCapture(0)
+    if not camera.isOpened():
+        print("Could not open camera")
+        sys.exit(1)
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    recorded = 0
+    while recorded < count:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        cv2.imwrite(os.path.join(directory, f"frame_{recorded:05d}.png"), cv2.flip(frame, 1))
+        recorded += 1
+    camera.release()
+    print(f"Recorded {recorded} frames to {directory}")
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union else 0.0
+
+
+def run_configuration(cascade, frames, scale, detect_every):
+    """Detect every frame; returns (boxes per frame, latency per frame in seconds)"""
+    scheduler = DetectionScheduler(cascade, detect_every=detect_every, scale=scale)
+    results, latencies = [], []
+    for gray in frames:
+        start = time.perf_counter()
+        results.append(scheduler.detect(gray))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def recall(reference, candidate):
+    """Box recall (IoU match) and frame-level face presence agreement"""
+    matched = total = agreeing = 0
+    for expected, found in zip(reference, candidate):
+        total += len(expected)
+        matched += sum(1 for box in expected if any(iou(box, other) >= IOU_THRESHOLD for other in found))
+        agreeing += bool(expected) == bool(found)
+    box_recall = matched / total if total else 1.0
+    return box_recall, agreeing / len(reference)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == '--record':
+        record_frames(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 300)
+        sys.exit(0)
+
+    frames = load_frames(sys.argv[1])
+    if not frames:
+        print(f"No frames found in {sys.argv[1]}")
+        sys.exit(1)
+
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    height, width = frames[0].shape[:2]
+    print(f"Benchmarking face detection on {len(frames)} frames ({width}x{height})\n")
+    print(f"{'configuration':26s} {'mean (ms)':>10s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} "
+          f"{'box recall':>11s} {'presence':>9s}")
+
+    reference = None
+    for label, scale, detect_every in CONFIGURATIONS:
+        boxes, latencies = run_configuration(cascade, frames, scale, detect_every)
+        if reference is None:
+            reference = boxes
+        box_recall, presence = recall(reference, boxes)
+        print(f"{label:26s} {statistics.mean(latencies) * 1000:10.2f} "
+              f"{percentile(latencies, 50) * 1000:9.2f} {percentile(latencies, 99) * 1000:9.2f} "
+              f"{box_recall:11.1%} {presence:9.1%}")
@@ -0,0 +1,170 @@
+"""
+PDF Extraction Backend Benchmark
+Runs every extraction backend (pdfplumber, pypdf, raw content-stream fast
+path) over a corpus of synthetic resumes, plus any real PDFs in a directory,
+and reports throughput, peak Python memory and text fidelity against
+pdfplumber (word-level F1 and technical-skill agreement)
+Run from project root: python benchmarks/pdf_extraction_bench.py [resume_dir]
+"""
+
+import sys
+import os
+import time
+import zlib
+import random
+import tempfile
+import tracemalloc
+from collections import Counter
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import pdf_extraction
+from skill_taxonomy import get_taxonomy
+
+REFERENCE_BACKEND = 'pdfplumber'
+SYNTHETIC_PAGE_COUNTS = (1, 2, 5, 20, 60)
+REPEAT = 3
+
+SECTIONS = [
+    "EXPERIENCE",
+    "Senior Software Engineer, Acme Corp (2019 - present)",
+    "Designed microservices in Python and Go on AWS with Docker and Kubernetes.",
+    "Led a team of five; mentored junior engineers (leadership, communication).",
+    "Built React and Node.js frontends backed by PostgreSQL and Redis.",
+    "PROJECTS",
+    "Interview Assistant - Flask, React, Gemini: mock interviews with feedback.",
+    "Realtime analytics pipeline: Kafka, Spark and TensorFlow models.",
+    "SKILLS",
+    "Python, Java, C++, C#, TypeScript, SQL, Git, CI/CD, Terraform, Linux",
+]
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def synthetic_resume_pdf(pages, seed=0):
+    """A multi-page resume PDF with compressed content streams, Tj and kerned TJ text"""
+    rng = random.Random(seed)
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None]
+    font_id = 3 + 2 * pages
+    kids = []
+    for page in range(pages):
+        page_id, content_id = 3 + 2 * page, 4 + 2 * page
+        kids.append(f'{page_id} 0 R')
+        operations = ['BT', '/F1 10 Tf', '50 760 Td', '13 TL']
+        for _ in range(45):
+            line = rng.choice(SECTIONS)
+            if rng.random() < 0.3:
+                # Word gaps as kerning, the way many generators emit justified text
+                words = line.split(' ')
+                operations.append('[' + ' -350 '.join(f'({_escape(w)})' for w in words) + '] TJ T*')
+            else:
+                operations.append(f'({_escape(line)}) Tj T*')
+        operations.append('ET')
+        stream = zlib.compress('\n'.join(operations).encode('latin-1'))
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'.encode()
+        )
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {pages} >>'.encode()
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+def build_corpus(directory, resume_dir=None):
+    """(label, path) pairs: synthetic resumes plus real PDFs from resume_dir"""
+    corpus = []
+    for pages in SYNTHETIC_PAGE_COUNTS:
+        path = os.path.join(directory, f'synthetic_{pages}p.pdf')
+        with open(path, 'wb') as f:
+            f.write(synthetic_resume_pdf(pages, seed=pages))
+        corpus.append((f'synthetic {pages}p', path))
+    if resume_dir:
+        for name in sorted(os.listdir(resume_dir)):
+            if name.lower().endswith('.pdf'):
+                corpus.append((name[:20], os.path.join(resume_dir, name)))
+    return corpus
+
+
+def extract(path, backend):
+    """Extract with one backend serially (no process pool, no budget)"""
+    with pdf_extraction.BACKENDS[backend](path) as document:
+        pages = document.page_count
+        texts = []
+        for number in range(pages):
+            try:
+                texts.append(document.extract_page(number))
+            except Exception:
+                texts.append('')
+    return '\n'.join(t for t in texts if t), pages
+
+
+def word_f1(reference, candidate):
+    expected, found = Counter(reference.lower().split()), Counter(candidate.lower().split())
+    overlap = sum((expected & found).values())
+    if not expected and not found:
+        return 1.0
+    precision = overlap / max(1, sum(found.values()))
+    recall = overlap / max(1, sum(expected.values()))
+    return 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+
+def skill_agreement(reference, candidate):
+    matcher = get_taxonomy().technical_matcher
+    expected = {m.payload.name for m in matcher.find_all(reference)}
+    found = {m.payload.name for m in matcher.find_all(candidate)}
+    return len(expected & found) / len(expected | found) if expected | found else 1.0
+
+
+def measure(path, backend):
+    """(seconds per run, peak traced bytes, text, page count)"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        text, pages = extract(path, backend)
+    seconds = (time.perf_counter() - start) / REPEAT
+
+    tracemalloc.start()
+    extract(path, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, text, pages
+
+
+if __name__ == "__main__":
+    resume_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    backends = list(pdf_extraction.BACKENDS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = build_corpus(directory, resume_dir)
+        print(f"Benchmarking {len(backends)} backends on {len(corpus)} documents "
+              f"(fidelity vs {REFERENCE_BACKEND})\n")
+        print(f"{'document':22s} {'backend':11s} {'auto':>5s} {'ms':>9s} {'pages/s':>9s} {'MB/s':>7s} "
+              f"{'peak MB':>8s} {'word F1':>8s} {'skills':>7s}")
+
+        for label, path in corpus:
+            size_mb = os.path.getsize(path) / 1_000_000
+            with pdf_extraction.RawStreamBackend(path) as document:
+                selected = pdf_extraction.select_backend(path, document.page_count)
+            reference = None
+            for backend in [REFERENCE_BACKEND] + [b for b in backends if b != REFERENCE_BACKEND]:
+                seconds, peak, text, pages = measure(path, backend)
+                if reference is None:
+                    reference = text
+                print(f"{label:22s} {backend:11s} {'*' if backend == selected else '':>5s} "
+                      f"{seconds * 1000:9.1f} {pages / seconds:9.1f} {size_mb / seconds:7.2f} "
+                      f"{peak / 1_000_000:8.2f} {word_f1(reference, text):8.1%} "
+                      f"{skill_agreement(reference, text):7.1%}")
+            print()
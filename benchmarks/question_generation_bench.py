@@ -0,0 +1,65 @@
+"""
+Question Generation Benchmark
+Compares resume-mode generation strategies (single / concurrent / sequential)
+against the live Gemini API and reports latency percentiles per mode
+Run from project root: python benchmarks/question_generation_bench.py [runs]
+"""
+
+import sys
+import os
+import time
+import statistics
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from gemini import client
+from question_generator import QuestionGenerator
+
+SAMPLE_TECHNICAL = [{'name': s} for s in ['python', 'flask', 'react', 'postgresql', 'docker']]
+SAMPLE_SOFT = [{'skill': s} for s in ['Leadership', 'Communication', 'Teamwork']]
+SAMPLE_PROJECTS = [{
+    'title': 'Interview Assistant',
+    'technologies': ['python', 'flask', 'react'],
+    'description': 'LLM-powered mock interview platform with resume analysis'
+}]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_mode(mode, runs):
+    qg = QuestionGenerator(client, mode=mode)
+    latencies = []
+    failures = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            qg.generate_resume_based_questions(
+                SAMPLE_TECHNICAL, SAMPLE_SOFT, SAMPLE_PROJECTS, 'intermediate'
+            )
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            failures += 1
+            print(f"   ❌ {mode} run failed: {e}")
+    return latencies, failures
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if not os.environ.get('GEMINI_API_KEY'):
+        print("GEMINI_API_KEY is not set - this benchmark calls the live API")
+        sys.exit(1)
+
+    print(f"Benchmarking question generation ({runs} runs per mode)\n")
+    print(f"{'mode':12s} {'p50 (s)':>9s} {'p99 (s)':>9s} {'mean (s)':>9s} {'failures':>9s}")
+    for mode in ('single', 'concurrent', 'sequential'):
+        latencies, failures = run_mode(mode, runs)
+        if latencies:
+            print(f"{mode:12s} {percentile(latencies, 50):9.2f} {percentile(latencies, 99):9.2f} "
+                  f"{statistics.mean(latencies):9.2f} {failures:9d}")
+        else:
+            print(f"{mode:12s} {'-':>9s} {'-':>9s} {'-':>9s} {failures:9d}")
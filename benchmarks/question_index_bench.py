@@ -0,0 +1,105 @@
+"""
+Question Index Benchmark
+Fills the near-duplicate index with synthetic interview questions and reports
+embedding throughput, exact vs IVF top-k search latency with IVF recall@k,
+and the per-user repeat check used during generation
+Run from project root: python benchmarks/question_index_bench.py [questions]
+"""
+
+import sys
+import os
+import time
+import random
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from question_index import HashingEmbedder, QuestionIndex, VectorIndex, user_group
+
+DEFAULT_QUESTIONS = 100_000
+QUERIES = 500
+K = 10
+USER_HISTORY = 200
+
+OPENERS = [
+    "How would you", "Explain how you would", "Describe how you would", "Walk me through how you would",
+    "What is your approach to", "Tell me about a time you had to", "How do you", "What steps would you take to",
+]
+ACTIONS = [
+    "debug", "optimize", "scale", "secure", "test", "monitor", "design", "refactor", "deploy", "document",
+    "migrate", "benchmark", "review", "profile", "cache", "shard", "containerize", "version",
+]
+SUBJECTS = [
+    "a REST API", "a PostgreSQL schema", "a React dashboard", "a Kafka pipeline", "a Redis cache",
+    "a Kubernetes cluster", "a CI/CD workflow", "a machine learning model", "a payment service",
+    "a search feature", "a mobile app backend", "a legacy monolith", "a GraphQL gateway",
+    "an authentication flow", "a data warehouse", "a microservice", "a websocket server", "a cron job",
+]
+CONTEXTS = [
+    "under heavy load", "with a tight deadline", "for a global user base", "without downtime",
+    "on a small team", "with incomplete requirements", "after a production incident", "on a limited budget",
+    "for regulated customer data", "while onboarding new engineers", "across three time zones", "",
+]
+
+
+def synthetic_questions(count, seed=0):
+    """Distinct, template-built questions with plenty of near-duplicates among them"""
+    rng = random.Random(seed)
+    questions = set()
+    while len(questions) < count:
+        question = f"{rng.choice(OPENERS)} {rng.choice(ACTIONS)} {rng.choice(SUBJECTS)} {rng.choice(CONTEXTS)}"
+        questions.add(f"{question.strip()} (case {rng.randrange(count)})?")
+    return list(questions)
+
+
+def timed(fn, repeat):
+    """(median ms, p99 ms) of fn(i) for i in range(repeat)"""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_QUESTIONS
+    embedder = HashingEmbedder()
+    texts = synthetic_questions(count)
+
+    start = time.perf_counter()
+    vectors = embedder.embed(texts)
+    seconds = time.perf_counter() - start
+    print(f"Embedded {count} questions in {seconds:.2f}s ({count / seconds:,.0f}/s, dim {embedder.dim})")
+
+    rng = np.random.default_rng(1)
+    queries = embedder.embed([f"{q} Please explain." for q in rng.choice(texts, QUERIES)])
+
+    exact = VectorIndex(embedder.dim, ivf_min_rows=count + 1)
+    exact.add(vectors)
+    start = time.perf_counter()
+    ivf = VectorIndex(embedder.dim, ivf_min_rows=count + 1)
+    ivf.add(vectors)
+    ivf.train()
+    print(f"Trained {ivf.get_stats()['ivf_buckets']} IVF buckets in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'search':24s} {'median ms':>10s} {'p99 ms':>8s} {f'recall@{K}':>10s}")
+    # Template questions tie a lot, so a hit is any result scoring at least the true k-th best
+    kth_best = [exact.search(q, K)[1][-1] - 1e-5 for q in queries]
+    for label, index in ((f"exact ({count:,})", exact), (f"ivf nprobe={ivf.nprobe}", ivf)):
+        recall = np.mean([(index.search(q, K)[1] >= kth).sum() / K for q, kth in zip(queries, kth_best)])
+        median, p99 = timed(lambda i: index.search(queries[i], K), QUERIES)
+        print(f"{label:24s} {median:10.3f} {p99:8.3f} {recall:10.1%}")
+
+    # The repeat check during generation compares new questions with one user's history
+    question_index = QuestionIndex(embedder)
+    question_index.add(texts, vectors=vectors)
+    question_index.add(texts[:USER_HISTORY], user_group(1))
+    candidates = synthetic_questions(QUERIES, seed=2)
+    median, p99 = timed(lambda i: question_index.is_repeat(user_group(1), candidates[i]), QUERIES)
+    print(f"{f'user repeat check ({USER_HISTORY})':24s} {median:10.3f} {p99:8.3f}")
+    median, p99 = timed(lambda i: question_index.similar(candidates[i], K), QUERIES)
+    print(f"{'similar() incl. embed':24s} {median:10.3f} {p99:8.3f}")
@@ -0,0 +1,89 @@
+"""
+Skill Matcher Benchmark
+Compares the compiled single-pass SkillMatcher against the previous
+one-regex-per-skill scan, on large resumes and on a 10k-skill taxonomy
+Run from project root: python benchmarks/skill_matcher_bench.py
+"""
+
+import sys
+import os
+import re
+import random
+import string
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from skill_taxonomy import get_taxonomy
+from skill_matcher import SkillMatcher
+
+SAMPLE_PARAGRAPH = (
+    "Senior software engineer with 6 years of experience building Python and "
+    "JavaScript services. Designed microservices on AWS with Docker and Kubernetes, "
+    "developed React and Node.js frontends, and led a team of five. Strong "
+    "communication, leadership and problem solving skills. Worked with PostgreSQL, "
+    "Redis, Spring Boot, C++ and machine learning pipelines using TensorFlow and "
+    "pandas. Implemented CI/CD with GitHub Actions and Terraform.\n"
+)
+
+
+def legacy_scan(terms, text):
+    """The previous approach: one word-boundary regex search per term"""
+    text_lower = text.lower()
+    return [
+        term for term in terms
+        if re.search(r'\b' + re.escape(term) + r'\b', text_lower, re.IGNORECASE)
+    ]
+
+
+def time_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def random_taxonomy(size, seed=7):
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < size:
+        words = rng.randint(1, 3)
+        terms.add(' '.join(
+            ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(words)
+        ))
+    return sorted(terms)
+
+
+def report(label, text, legacy_seconds, matcher_seconds):
+    size_mb = len(text) / 1_000_000
+    print(f"{label:38s} legacy {legacy_seconds * 1000:9.2f} ms ({size_mb / legacy_seconds:7.2f} MB/s)   "
+          f"matcher {matcher_seconds * 1000:8.2f} ms ({size_mb / matcher_seconds:7.2f} MB/s)   "
+          f"x{legacy_seconds / matcher_seconds:.1f}")
+
+
+if __name__ == "__main__":
+    taxonomy = get_taxonomy()
+    repo_terms = [skill for skills in taxonomy.technical_skills.values() for skill in skills]
+    repo_matcher = taxonomy.technical_matcher
+
+    print(f"Repository taxonomy: {len(repo_terms)} technical skills\n")
+    for paragraphs in (10, 100, 1000):
+        text = SAMPLE_PARAGRAPH * paragraphs
+        repeat = max(1, 200 // paragraphs)
+        legacy = time_call(lambda: legacy_scan(repo_terms, text), repeat)
+        matcher = time_call(lambda: repo_matcher.find_unique(text), repeat)
+        report(f"resume {len(text) // 1000:>5d} KB", text, legacy, matcher)
+
+    big_terms = random_taxonomy(10_000)
+    big_matcher_build = time.perf_counter()
+    big_matcher = SkillMatcher((term, None) for term in big_terms + repo_terms)
+    big_matcher_build = time.perf_counter() - big_matcher_build
+
+    print(f"\nSynthetic taxonomy: {big_matcher.term_count} skills (trie built in {big_matcher_build * 1000:.0f} ms)\n")
+    for paragraphs in (10, 100):
+        text = SAMPLE_PARAGRAPH * paragraphs
+        legacy = time_call(lambda: legacy_scan(big_terms + repo_terms, text), 1)
+        matcher = time_call(lambda: big_matcher.find_unique(text), 5)
+        report(f"resume {len(text) // 1000:>5d} KB", text, legacy, matcher)
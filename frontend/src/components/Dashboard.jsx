@@ -66,7 +66,7 @@ function Dashboard({ user, setUser }) {
         return <InterviewSession interviewData={interviewData} setCurrentView={setCurrentView} setFeedbackData={setFeedbackData} />;
 
       case 'feedback':
-        return <FeedbackDashboard feedbackData={feedbackData} setCurrentView={setCurrentView} />;
+        return <FeedbackDashboard feedbackData={feedbackData} setFeedbackData={setFeedbackData} setCurrentView={setCurrentView} />;
 
       default:
         return <div>Unknown view</div>;
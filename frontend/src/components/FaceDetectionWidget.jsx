@@ -8,54 +8,63 @@ const FaceDetectionWidget = () => {
   const [toasts, setToasts] = useState([]);
   const imgRef = React.useRef(null);
 
+  const showAbsenceToasts = () => {
+    const timestamp = Date.now();
+    
+    // First toast: "Look at the camera"
+    const toast1 = {
+      id: `${timestamp}-1`,
+      message: '📹 Look at the camera',
+      icon: '📹'
+    };
+    
+    // Second toast: "Don't move away from the camera"
+    const toast2 = {
+      id: `${timestamp}-2`,
+      message: '🚫 Don\'t move away from the camera',
+      icon: '🚫'
+    };
+    
+    setToasts(prev => [...prev, toast1, toast2]);
+    
+    // Auto-remove toasts after 4 seconds
+    setTimeout(() => {
+      setToasts(prev => prev.filter(t => t.id !== toast1.id && t.id !== toast2.id));
+    }, 4000);
+  };
+
   useEffect(() => {
     const timer = setTimeout(() => setIsLoading(false), 1000);
     
-    // Poll face detection status every 2 seconds
-    const statusInterval = setInterval(async () => {
-      try {
-        const response = await fetch(getApiUrl('/api/face-status'), {
-          credentials: 'include'
-        });
-        if (response.ok) {
-          const data = await response.json();
-          const detected = data.face_detected;
-          setFaceDetected(detected);
-          
-          // Add toasts if face not detected
-          if (!detected) {
-            const timestamp = Date.now();
-            
-            // First toast: "Look at the camera"
-            const toast1 = {
-              id: `${timestamp}-1`,
-              message: '📹 Look at the camera',
-              icon: '📹'
-            };
-            
-            // Second toast: "Don't move away from the camera"
-            const toast2 = {
-              id: `${timestamp}-2`,
-              message: '🚫 Don\'t move away from the camera',
-              icon: '🚫'
-            };
-            
-            setToasts(prev => [...prev, toast1, toast2]);
-            
-            // Auto-remove toasts after 4 seconds
-            setTimeout(() => {
-              setToasts(prev => prev.filter(t => t.id !== toast1.id && t.id !== toast2.id));
-            }, 4000);
-          }
-        }
-      } catch (error) {
-        console.error('Error checking face status:', error);
+    // The server pushes debounced presence changes; nothing is polled.
+    // EventSource reconnects on its own if the connection drops.
+    const statusStream = new EventSource(getApiUrl('/api/face-status/stream'), {
+      withCredentials: true
+    });
+    
+    statusStream.addEventListener('status', (event) => {
+      const data = JSON.parse(event.data);
+      setFaceDetected(data.face_detected);
+      if (!data.face_detected) {
+        showAbsenceToasts();
       }
-    }, 2000); // Check every 2 seconds
+    });
+    
+    statusStream.addEventListener('transition', (event) => {
+      const data = JSON.parse(event.data);
+      setFaceDetected(data.face_detected);
+      if (!data.face_detected) {
+        showAbsenceToasts();
+      }
+    });
+    
+    statusStream.onerror = (error) => {
+      console.error('Face status stream error:', error);
+    };
 
     return () => {
       clearTimeout(timer);
-      clearInterval(statusInterval);
+      statusStream.close();
       // Stop video stream when component unmounts
       if (imgRef.current) {
         imgRef.current.src = '';
@@ -1,4 +1,6 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
+import LoadingAnimation from './LoadingAnimation';
+import { getApiUrl } from '../api';
 
 // Custom Pie Chart Component
 function PieChart({ percentage, size = 120, color = '#238636' }) {
@@ -49,7 +51,99 @@ function PieChart({ percentage, size = 120, color = '#238636' }) {
   );
 }
 
-function FeedbackDashboard({ feedbackData, setCurrentView }) {
+function FeedbackDashboard({ feedbackData, setFeedbackData, setCurrentView }) {
+  const [scoringError, setScoringError] = useState(null);
+  const [retrying, setRetrying] = useState(false);
+  const isScoring = feedbackData?.status === 'scoring';
+
+  // Completing the interview again re-queues scoring; polling then starts over
+  const retryScoring = async () => {
+    setRetrying(true);
+    try {
+      const response = await fetch(getApiUrl('/api/complete-interview'), {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        body: JSON.stringify({ session_id: feedbackData.session_id })
+      });
+      const result = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        setScoringError(result.error || 'Unable to retry feedback at this time. Please try again.');
+        return;
+      }
+      setScoringError(null);
+      setFeedbackData(response.status === 202
+        ? { status: 'scoring', session_id: result.session_id, status_url: result.status_url }
+        : result.feedback);
+    } catch (error) {
+      console.error('Error retrying feedback:', error);
+      setScoringError('Unable to reach the server. Please check your connection and try again.');
+    } finally {
+      setRetrying(false);
+    }
+  };
+
+  // Feedback is generated in the background; poll until scoring finishes
+  useEffect(() => {
+    if (!isScoring || scoringError) {
+      return undefined;
+    }
+
+    let cancelled = false;
+    const poll = async () => {
+      try {
+        const response = await fetch(getApiUrl(feedbackData.status_url), {
+          credentials: 'include'
+        });
+        const result = await response.json();
+        if (cancelled) {
+          return;
+        }
+        if (result.status === 'completed') {
+          setFeedbackData(result.feedback);
+          return;
+        }
+        if (result.status === 'scoring_failed' || !response.ok) {
+          setScoringError(result.error || 'Unable to generate feedback at this time. Please try again.');
+          return;
+        }
+      } catch (error) {
+        console.error('Error fetching feedback status:', error);
+      }
+      if (!cancelled) {
+        timer = setTimeout(poll, 2000);
+      }
+    };
+
+    let timer = setTimeout(poll, 1000);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [isScoring, scoringError, feedbackData, setFeedbackData]);
+
+  if (isScoring) {
+    if (scoringError) {
+      return (
+        <div className="feedback-container">
+          <div className="section-title">{scoringError}</div>
+          <button className="btn btn-primary gradient-btn" onClick={retryScoring} disabled={retrying}>
+            {retrying ? 'Retrying...' : 'Retry Feedback'}
+          </button>
+          <button className="btn btn-secondary gradient-btn" onClick={() => setCurrentView('mode-selection')}>
+            Start New Interview
+          </button>
+        </div>
+      );
+    }
+
+    return (
+      <div className="dashboard-main">
+        <LoadingAnimation message="Analyzing your answers and preparing feedback..." />
+      </div>
+    );
+  }
+
   if (!feedbackData) {
     return (
       <div className="feedback-container">
@@ -10,6 +10,7 @@ function InterviewSession({ interviewData, setCurrentView, setFeedbackData }) {
   const [currentAnswer, setCurrentAnswer] = useState('');
   const [sessionId, setSessionId] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [streaming, setStreaming] = useState(true);
   const [isRecording, setIsRecording] = useState(false);
   const [speechSupported, setSpeechSupported] = useState(false);
   const recognitionRef = useRef(null);
@@ -70,49 +71,81 @@ function InterviewSession({ interviewData, setCurrentView, setFeedbackData }) {
     generateQuestions();
   }, []);
 
+  const CATEGORY_LABELS = {
+    hr_questions: 'HR',
+    technical_questions: 'Technical',
+    cultural_questions: 'Cultural Fit',
+    project_questions: 'Project'
+  };
+
+  // Questions arrive over Server-Sent Events; the first one is shown as soon
+  // as it is parsed while the rest keep streaming in
   const generateQuestions = async () => {
     try {
-      const response = await fetch(getApiUrl('/api/generate-questions'), {
+      const response = await fetch(getApiUrl('/api/generate-questions/stream'), {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
         credentials: 'include',
         body: JSON.stringify(interviewData)
       });
 
-      if (response.ok) {
-        const result = await response.json();
-        setQuestions(getAllQuestions(result.questions));
-        setSessionId(result.session_id);
-        setAnswers(new Array(getAllQuestions(result.questions).length).fill(''));
-      } else {
+      if (!response.ok || !response.body) {
         alert('Failed to generate questions');
+        setLoading(false);
+        return;
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      const handleEvent = (event, data) => {
+        if (event === 'session') {
+          setSessionId(data.session_id);
+        } else if (event === 'question') {
+          setQuestions(prev => [...prev, { category: CATEGORY_LABELS[data.category] || data.category, text: data.question }]);
+          setAnswers(prev => [...prev, '']);
+          setLoading(false);
+        } else if (event === 'error') {
+          alert(data.error || 'Failed to generate questions');
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const message = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let event = 'message';
+          let data = '';
+          message.split('\n').forEach(line => {
+            if (line.startsWith('event: ')) {
+              event = line.slice(7);
+            } else if (line.startsWith('data: ')) {
+              data += line.slice(6);
+            }
+          });
+          if (data) {
+            handleEvent(event, JSON.parse(data));
+          }
+        }
       }
     } catch (error) {
       console.error('Error generating questions:', error);
       alert('Failed to generate questions');
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   };
 
-  const getAllQuestions = (questionData) => {
-    const allQuestions = [];
-    
-    questionData.hr_questions?.forEach(q => {
-      allQuestions.push({ category: 'HR', text: q });
-    });
-    
-    questionData.technical_questions?.forEach(q => {
-      allQuestions.push({ category: 'Technical', text: q });
-    });
-    
-    questionData.cultural_questions?.forEach(q => {
-      allQuestions.push({ category: 'Cultural Fit', text: q });
-    });
-    
-    return allQuestions;
-  };
-
   const handleAnswerSubmit = async () => {
     if (!currentAnswer.trim()) {
       alert('Please provide an answer before continuing');
@@ -162,7 +195,10 @@ function InterviewSession({ interviewData, setCurrentView, setFeedbackData }) {
 
       if (response.ok) {
         const result = await response.json();
-        setFeedbackData(result.feedback);
+        // 202 means scoring continues in the background; FeedbackDashboard polls for it
+        setFeedbackData(response.status === 202
+          ? { status: 'scoring', session_id: result.session_id, status_url: result.status_url }
+          : result.feedback);
         setCurrentView('feedback');
       } else {
         const errorData = await response.json().catch(() => ({}));
@@ -300,7 +336,11 @@ function InterviewSession({ interviewData, setCurrentView, setFeedbackData }) {
               </button>
             )}
             
-            <button className="btn btn-primary gradient-btn" onClick={handleAnswerSubmit}>
+            <button
+              className="btn btn-primary gradient-btn"
+              onClick={handleAnswerSubmit}
+              disabled={streaming && currentQuestionIndex === questions.length - 1}
+            >
               {currentQuestionIndex === questions.length - 1 ? 'Complete Interview' : 'Next Question'}
               <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">
                 <polyline points="9,18 15,12 9,6"/>
@@ -31,6 +31,23 @@ function ResumeUpload({ setCurrentView, setInterviewData }) {
     }
   };
 
+  // Analysis runs as a background job; poll its status until it finishes
+  const waitForAnalysis = async (statusUrl) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      const response = await fetch(getApiUrl(statusUrl), {
+        credentials: 'include'
+      });
+      if (!response.ok) {
+        throw new Error('Failed to fetch analysis status');
+      }
+      const status = await response.json();
+      if (status.status === 'completed' || status.status === 'failed') {
+        return status;
+      }
+    }
+  };
+
   const handleUpload = async () => {
     if (!selectedFile || !difficulty) {
       alert('Please select a file and difficulty level');
@@ -49,7 +66,10 @@ function ResumeUpload({ setCurrentView, setInterviewData }) {
       });
 
       if (response.ok) {
-        const result = await response.json();
+        let result = await response.json();
+        if (response.status === 202 && result.status_url) {
+          result = await waitForAnalysis(result.status_url);
+        }
         setKeywords(result.keywords);
         
         // Set interview data and proceed to interview
@@ -1,6 +1,6 @@
 """
 Database Migration Script
-Adds new columns to interview_session table for resume analysis feature
+Adds new columns to existing tables (interview_session, resume_analysis_job)
 Run this from project root: python migrate_database.py
 """
 
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 from app import app, db
 
 def migrate_database():
-    """Add new columns to interview_session table"""
+    """Add new columns to existing tables"""
     
     with app.app_context():
         try:
@@ -23,19 +23,21 @@ def migrate_database():
             
             # List of columns to add
             columns_to_add = [
-                ("resume_filename", "VARCHAR(255)"),
-                ("technical_skills", "TEXT"),
-                ("soft_skills", "TEXT"),
-                ("projects", "TEXT"),
-                ("experience_level", "VARCHAR(20)"),
-                ("resume_summary", "TEXT")
+                ("interview_session", "resume_filename", "VARCHAR(255)"),
+                ("interview_session", "technical_skills", "TEXT"),
+                ("interview_session", "soft_skills", "TEXT"),
+                ("interview_session", "projects", "TEXT"),
+                ("interview_session", "experience_level", "VARCHAR(20)"),
+                ("interview_session", "resume_summary", "TEXT"),
+                ("interview_session", "submitted_at", "TIMESTAMP"),
+                ("resume_analysis_job", "fallback_keywords", "TEXT")
             ]
             
             print("Starting database migration...")
             
-            for column_name, column_type in columns_to_add:
+            for table_name, column_name, column_type in columns_to_add:
                 try:
-                    sql = f"ALTER TABLE interview_session ADD COLUMN {column_name} {column_type};"
+                    sql = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"
                     cursor.execute(sql)
                     connection.commit()
                     print(f"✓ Added column: {column_name}")
@@ -0,0 +1,30 @@
+"""
+Shared test setup: backend modules are imported flat, as the app does, and
+every test that needs the database gets a fresh in-memory SQLite app
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+# gemini.client is created at import time and needs some key
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+
+@pytest.fixture
+def app():
+    from flask import Flask
+    from models import db
+    import question_index
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        question_index._index = None
+        yield app
+        db.session.remove()
+    question_index._index = None
@@ -0,0 +1,44 @@
+import threading
+
+from face_detector import PresenceTracker
+
+
+def test_brief_flicker_does_not_flip_the_state():
+    tracker = PresenceTracker(absent_after=1.5, present_after=0.5)
+    # A blink or a turned head: no face for under absent_after
+    for t, seen in [(0.0, True), (1.0, False), (2.0, False), (2.4, True), (3.0, False), (4.4, True)]:
+        assert not tracker.update(seen, t)
+    assert tracker.present and tracker.snapshot()['seq'] == 0
+
+
+def test_transitions_wait_for_their_hold_and_are_dated_from_the_start_of_the_change():
+    tracker = PresenceTracker(absent_after=1.5, present_after=0.5)
+
+    assert not tracker.update(False, 10.0)
+    assert not tracker.update(False, 11.4)
+    assert tracker.update(False, 11.5)
+    assert not tracker.present
+
+    # Coming back needs only present_after of continuous detections
+    assert not tracker.update(True, 20.0)
+    assert not tracker.update(False, 20.3)  # interrupted: the hold starts over
+    assert not tracker.update(True, 20.4)
+    assert not tracker.update(True, 20.8)
+    assert tracker.update(True, 20.9)
+
+    assert [(t['seq'], t['face_detected'], t['timestamp']) for t in tracker.wait_for_transition(0, timeout=0)] == [
+        (1, False, 10.0), (2, True, 20.4),
+    ]
+    assert [t['seq'] for t in tracker.wait_for_transition(1, timeout=0)] == [2]
+
+
+def test_waiters_are_woken_by_a_transition():
+    tracker = PresenceTracker(absent_after=0.0)
+    woken = []
+    waiter = threading.Thread(target=lambda: woken.extend(tracker.wait_for_transition(0, timeout=5)))
+    waiter.start()
+
+    tracker.update(False, 1.0)
+    waiter.join(5)
+
+    assert [t['face_detected'] for t in woken] == [False]
@@ -0,0 +1,133 @@
+import json
+import random
+import threading
+
+import pytest
+from google.genai import types
+
+import llm_batch
+from llm_batch import BatchCollector, BatchJobError, LLMBatch, LocalBatchClient
+
+
+def echo(model, contents, config):
+    """Answer every prompt with a JSON object naming it"""
+    if 'boom' in contents:
+        raise RuntimeError(f"refused {contents}")
+    return json.dumps({'prompt': contents})
+
+
+def parse(text):
+    value = json.loads(text)
+    if 'bad' in value['prompt']:
+        raise ValueError("not a question set")
+    return value['prompt']
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(llm_batch, 'POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(llm_batch, 'MAX_POLL_INTERVAL', 0.01)
+
+
+def test_large_batches_are_split_into_jobs_and_results_keep_their_keys(monkeypatch):
+    monkeypatch.setattr(llm_batch, 'MAX_REQUESTS_PER_JOB', 2)
+    client = LocalBatchClient(echo)
+    batch = LLMBatch(client=client)
+    for n in range(5):
+        batch.add(('session', n), f'prompt {n}', parse=parse)
+
+    results = batch.run(timeout=5)
+
+    assert len(batch.job_names) == 3
+    assert {key: r.value for key, r in results.items()} == {('session', n): f'prompt {n}' for n in range(5)}
+
+
+def test_scatter_matches_responses_by_metadata_index():
+    batch = LLMBatch(client=LocalBatchClient(echo))
+    for n in range(6):
+        batch.add(n, f'prompt {n}', parse=parse)
+    responses = [
+        types.InlinedResponse(metadata={'index': str(n)}, response=types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role='model', parts=[types.Part(text=echo('m', f'prompt {n}', None))]))]
+        ))
+        for n in range(6)
+    ]
+    random.Random(3).shuffle(responses)
+    job = types.BatchJob(name='batches/x', state=types.JobState.JOB_STATE_SUCCEEDED,
+                         dest=types.BatchJobDestination(inlined_responses=responses))
+
+    results = {}
+    batch._scatter(job, batch.requests, results)
+
+    assert {key: r.value for key, r in results.items()} == {n: f'prompt {n}' for n in range(6)}
+
+
+def test_failed_requests_and_unparseable_answers_do_not_fail_the_batch():
+    batch = LLMBatch(client=LocalBatchClient(echo))
+    batch.add('ok', 'prompt ok', parse=parse)
+    batch.add('refused', 'prompt boom', parse=parse)
+    batch.add('garbled', 'prompt bad', parse=parse)
+
+    results = batch.run(timeout=5)
+
+    assert results['ok'].ok and results['ok'].value == 'prompt ok'
+    assert results['refused'].error == 'refused prompt boom'
+    assert results['garbled'].error.startswith('Unparseable response')
+
+
+@pytest.mark.parametrize('state', ['JOB_STATE_FAILED', 'JOB_STATE_EXPIRED'])
+def test_jobs_that_end_unsuccessfully_fail_each_of_their_requests(state):
+    release = threading.Event()
+    client = LocalBatchClient(lambda model, contents, config: release.wait(5) and echo(model, contents, config))
+    batch = LLMBatch(client=client)
+    batch.add('a', 'prompt a', parse=parse)
+    batch.add('b', 'prompt b', parse=parse)
+
+    name, = batch.submit()
+    client.fail(name, state, message='quota exhausted')
+    release.set()
+    results = batch.wait(timeout=5)
+
+    assert not results['a'].ok and not results['b'].ok
+    assert state in results['a'].error and 'quota exhausted' in results['a'].error
+
+
+def test_local_client_without_a_responder_rejects_jobs():
+    batch = LLMBatch(client=LocalBatchClient())
+    batch.add('a', 'prompt a', parse=parse)
+    with pytest.raises(BatchJobError, match='no responder'):
+        batch.run(timeout=5)
+
+
+def test_collector_flushes_when_full_and_after_max_wait():
+    handled = {}
+    done = threading.Event()
+
+    def handler(key, result):
+        handled[key] = result
+        if len(handled) == 4:
+            done.set()
+
+    collector = BatchCollector(handler, max_size=3, max_wait=0.05,
+                               runner=lambda fn, *args: fn(*args), client=LocalBatchClient(echo))
+    for n in range(3):
+        collector.add(n, f'prompt {n}', parse=parse)
+    # The third add filled the batch, so it was flushed synchronously
+    assert sorted(handled) == [0, 1, 2]
+
+    collector.add(3, 'prompt 3', parse=parse)
+    assert 3 not in handled
+    assert done.wait(5)
+    assert handled[3].value == 'prompt 3'
+
+
+def test_default_client_is_the_offline_stand_in_for_the_local_backend(monkeypatch):
+    monkeypatch.setattr(llm_batch, 'BATCH_BACKEND', 'local')
+    monkeypatch.setattr(llm_batch, '_local_client', None)
+    llm_batch.set_local_responder(echo)
+
+    batch = LLMBatch()
+    batch.add('a', 'prompt a', parse=parse)
+
+    assert isinstance(batch.client, LocalBatchClient)
+    assert batch.run(timeout=5)['a'].value == 'prompt a'
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+from llm_cache import LRUCache, UncacheableRequest, cache_key
+
+LATER = datetime.utcnow() + timedelta(hours=1)
+
+
+class Answer(BaseModel):
+    score: int
+
+
+def test_lru_stays_under_its_byte_bound_and_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10)
+    cache.put('a', 'aaaa', LATER)
+    cache.put('b', 'bbbb', LATER)
+    assert cache.get('a') == 'aaaa'  # 'b' is now the least recently used
+
+    assert cache.put('c', 'cccc', LATER) == 1
+    assert cache.get('b') is None and cache.get('a') == 'aaaa' and cache.get('c') == 'cccc'
+    assert cache.bytes == 8
+
+    # Sizes are UTF-8 bytes, not characters; replacing a key frees its old size
+    cache.put('a', 'éé', LATER)
+    assert cache.bytes == 8 and len(cache) == 2
+    # A value larger than the whole cache is not stored and evicts nothing
+    assert cache.put('big', 'x' * 11, LATER) == 0
+    assert cache.get('big') is None and len(cache) == 2
+
+
+def test_expired_entries_are_dropped_on_read():
+    cache = LRUCache(max_bytes=100)
+    cache.put('old', 'value', datetime.utcnow() - timedelta(seconds=1))
+    assert cache.get('old') is None
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+def test_cache_key_is_stable_and_covers_what_changes_the_answer():
+    config = types.GenerateContentConfig(temperature=0.2, response_mime_type='application/json',
+                                         response_schema=Answer)
+    same = types.GenerateContentConfig(response_schema=Answer, response_mime_type='application/json',
+                                       temperature=0.2)
+    key = cache_key('gemini-2.5-flash', 'Rate this answer', config)
+
+    assert len(key) == 64
+    assert key == cache_key('gemini-2.5-flash', 'Rate this answer', same)
+    assert key == cache_key('gemini-2.5-flash', 'Rate this answer', config.model_copy())
+    assert len({
+        key,
+        cache_key('gemini-2.5-pro', 'Rate this answer', config),
+        cache_key('gemini-2.5-flash', 'Rate this answer.', config),
+        cache_key('gemini-2.5-flash', 'Rate this answer', config.model_copy(update={'temperature': 0.9})),
+        cache_key('gemini-2.5-flash', 'Rate this answer', None),
+    }) == 5
+    # Dict configs key on their contents, not their insertion order
+    assert cache_key('m', 'p', {'temperature': 0.2, 'top_p': 0.9}) == cache_key('m', 'p', {'top_p': 0.9, 'temperature': 0.2})
+
+
+def test_values_without_a_stable_form_are_uncacheable():
+    with pytest.raises(UncacheableRequest):
+        cache_key('gemini-2.5-flash', object())
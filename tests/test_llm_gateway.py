@@ -0,0 +1,54 @@
+import pytest
+from google.genai import errors
+
+import llm_gateway
+from llm_gateway import CircuitBreaker, LLMUnavailableError
+
+
+class FailingModels:
+    """generate_content raising the queued API errors in turn"""
+
+    def __init__(self, codes):
+        self.codes = list(codes)
+
+    def generate_content(self, **kwargs):
+        code = self.codes.pop(0)
+        raise errors.APIError(code, {'error': {'code': code, 'message': f'status {code}'}})
+
+
+class FakeClient:
+    def __init__(self, codes):
+        self.models = FailingModels(codes)
+
+
+def test_bad_requests_between_server_errors_do_not_reset_the_breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    monkeypatch.setattr(llm_gateway, 'circuit_breaker', breaker)
+    client = FakeClient([503, 400, 503, 400, 503])
+
+    for code in (503, 400, 503, 400):
+        with pytest.raises(LLMUnavailableError if code == 503 else errors.APIError):
+            llm_gateway.generate('prompt', client=client, max_attempts=1)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(LLMUnavailableError):
+        llm_gateway.generate('prompt', client=client, max_attempts=1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_bad_request_releases_a_half_open_probe(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(llm_gateway, 'circuit_breaker', breaker)
+    client = FakeClient([503, 400, 503])
+
+    with pytest.raises(LLMUnavailableError):
+        llm_gateway.generate('prompt', client=client, max_attempts=1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The probe's 400 neither closes the breaker nor leaves the probe slot taken
+    with pytest.raises(errors.APIError):
+        llm_gateway.generate('prompt', client=client, max_attempts=1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(LLMUnavailableError, match='503'):
+        llm_gateway.generate('prompt', client=client, max_attempts=1)
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,83 @@
+import zlib
+
+import pytest
+
+import pdf_extraction
+from pdf_extraction import RawStreamBackend, content_stream_text
+
+
+def test_tj_and_kerned_tj_strings_become_lines():
+    stream = b"""BT /F1 10 Tf 50 760 Td 13 TL
+    (Senior Engineer) Tj T*
+    [(Python) -350 (and) -350 (Go) 20 (lang)] TJ T*
+    (Acme ) Tj (Corp) Tj
+    0 -13 Td (2019 - present) Tj
+    ET"""
+
+    assert content_stream_text(stream) == "Senior Engineer\nPython and Golang\nAcme Corp\n2019 - present"
+
+
+def test_literal_string_escapes_and_nesting():
+    stream = rb"""BT
+    (C\+\+ \(advanced\) and \(nested (parens)\)) Tj T*
+    (caf\351 \134 tab\there) Tj T*
+    (split \
+    line) Tj
+    ET"""
+
+    assert content_stream_text(stream).split('\n') == [
+        "C++ (advanced) and (nested (parens))",
+        "café \\ tab\there",
+        "split     line",
+    ]
+
+
+def test_quote_operators_hex_strings_and_ignored_content():
+    stream = b"""% a comment with (Tj) inside
+    BT /F1 12 Tf
+    <4A617661> Tj
+    (first) ' 2 0 (second) "
+    ET
+    BI /W 2 /H 2 ID \x00\x01(not text) Tj EI
+    BT (after image) Tj ET"""
+
+    assert content_stream_text(stream) == "Java\nfirst\nsecond\nafter image"
+
+
+def _pdf(stream, font):
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        font,
+    ]
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+@pytest.mark.parametrize('font, raw', [
+    (b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>', True),
+    (b'<< /Type /Font /Subtype /Type1 /BaseFont /ABCDEF+Custom >>', False),
+])
+def test_raw_backend_only_scans_pages_with_simple_fonts(tmp_path, monkeypatch, font, raw):
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(_pdf(zlib.compress(b'BT /F1 10 Tf 50 760 Td [(Kubernetes) -400 (admin)] TJ ET'), font))
+    scanned = []
+    monkeypatch.setattr(pdf_extraction, 'content_stream_text',
+                        lambda data: scanned.append(data) or content_stream_text(data))
+
+    with RawStreamBackend(str(path)) as document:
+        text = document.extract_page(0)
+
+    assert bool(scanned) == raw
+    assert 'Kubernetes' in text
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import proctoring
+from models import InterviewSession, User, db
+
+
+def _interview(submitted_after=None):
+    user = User(username='candidate', email='candidate@example.com')
+    db.session.add(user)
+    db.session.commit()
+    created = datetime(2026, 3, 2, 10, 0, 0)
+    session = InterviewSession(user_id=user.id, mode='role', difficulty='beginner', status='scoring',
+                               created_at=created,
+                               submitted_at=created + submitted_after if submitted_after else None)
+    db.session.add(session)
+    db.session.commit()
+    return session, proctoring._epoch(created)
+
+
+def test_client_timestamps_are_clamped_to_the_interview(app):
+    session, start = _interview(submitted_after=timedelta(minutes=10))
+
+    timeline = proctoring.record_events(session, [
+        {'face_detected': False, 'timestamp': start - 3600},   # before the interview
+        {'face_detected': True, 'timestamp': start + 60},
+        {'face_detected': False, 'timestamp': start + 86400},  # long after submission
+        {'face_detected': True, 'timestamp': float('nan')},
+    ])
+    db.session.commit()
+
+    assert list(timeline.intervals()) == [
+        (False, start, start + 60),
+        (True, start + 60, start + 600),
+        (False, start + 600, start + 600),
+    ]
+    assert proctoring.get_summary(session)['duration_seconds'] == 600.0
+
+
+def test_timeline_round_trips_through_its_varint_encoding():
+    start = 1_700_000_000.0
+    timeline = proctoring.PresenceTimeline(int(start * 1000))
+    # Runs from 1 ms to over an hour exercise one- to four-byte varints
+    for present, offset in [(False, 0.001), (True, 0.2), (False, 130.5), (True, 4000.0), (True, 4001.0),
+                            (False, 4001.0), (True, 4003.25)]:
+        timeline.record(present, start + offset)
+
+    data = timeline.to_bytes()
+    restored = proctoring.PresenceTimeline.from_bytes(data)
+
+    assert data[0] == proctoring.FORMAT_VERSION
+    assert restored.start_ms == timeline.start_ms and restored.runs == timeline.runs
+    assert restored.to_bytes() == data
+    assert [(p, round(s - start, 3), round(e - start, 3)) for p, s, e in restored.intervals()] == [
+        (True, 0.0, 0.001), (False, 0.001, 0.2), (True, 0.2, 130.5), (False, 130.5, 4000.0),
+        (True, 4000.0, 4001.0), (False, 4001.0, 4003.25), (True, 4003.25, 4003.25),
+    ]
+
+
+def test_stale_and_repeated_events_only_extend_time():
+    timeline = proctoring.PresenceTimeline(0)
+    timeline.record(False, 10.0)
+    timeline.record(False, 12.0)  # same state
+    timeline.record(True, 11.0)   # older than the timeline's end
+    timeline.record(True, 11.0)
+
+    assert timeline.runs == [[1, 10000], [0, 2000], [1, 0]]
+    assert timeline.summary(end_timestamp=20.0) == {
+        "duration_seconds": 20.0, "percent_present": 90.0,
+        "longest_absence_seconds": 2.0, "absence_count": 1,
+    }
+
+
+def test_unknown_format_versions_are_rejected():
+    with pytest.raises(ValueError):
+        proctoring.PresenceTimeline.from_bytes(b'\x09\x00')
+    with pytest.raises(ValueError):
+        proctoring.PresenceTimeline.from_bytes(b'')
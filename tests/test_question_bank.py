@@ -0,0 +1,32 @@
+from models import ServedQuestion, User, db
+
+import question_bank
+
+
+def test_generated_paraphrase_of_served_question_is_not_served_twice(app):
+    user = User(username='candidate', email='candidate@example.com')
+    db.session.add(user)
+    db.session.commit()
+
+    served_ids = question_bank.add_questions('Developer', 'beginner', {
+        'hr_questions': ["How would you use Kafka for scaling a team's reporting?"]
+    })
+    question_bank.mark_served(user.id, served_ids)
+    db.session.commit()
+
+    # Gemini fallback after the pool ran dry: one paraphrase (twice) plus one new question
+    with db.session.begin_nested():
+        ids = question_bank.add_questions('Developer', 'beginner', {
+            'hr_questions': [
+                "How do you use Kafka for scaling a team's reporting?",
+                "How would you use kafka for scaling a team's reporting?",
+                "Describe a disagreement with a manager and how it was settled.",
+            ]
+        })
+        question_bank.mark_served(user.id, ids)
+    db.session.commit()
+
+    assert ids[0] == ids[1] == served_ids[0]
+    served = {row.question_id for row in ServedQuestion.query.filter_by(user_id=user.id)}
+    assert served == {served_ids[0], ids[2]}
+    assert ServedQuestion.query.count() == 2
@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from models import InterviewSession, User, db
+from question_generator import QuestionGenerator
+
+ROLE_SET = {
+    'hr_questions': ["Tell me about a time you resolved a conflict on your team.",
+                     "Describe how you keep stakeholders informed on a long project."],
+    'technical_questions': ["How would you design an index for a slow reporting query?",
+                            "Explain how you would roll back a failed schema migration.",
+                            "What trade-offs do you weigh when caching API responses?"],
+    'cultural_questions': ["How do you handle requirements that change mid-sprint?",
+                           "What do you do when a teammate misses a shared deadline?"],
+}
+FRESH_SET = {
+    'hr_questions': ["How do you give feedback to a peer who disagrees with you?",
+                     "Describe a goal you set for yourself and how you reached it."],
+    'technical_questions': ["How would you find a memory leak in a long-running service?",
+                            "Explain how you would partition a table that grows daily.",
+                            "How do you test code that depends on the current time?"],
+    'cultural_questions': ["How do you onboard yourself onto an unfamiliar codebase?",
+                           "What would you do if you disagreed with a design review?"],
+}
+
+
+class FakeModels:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents)
+        return SimpleNamespace(text=json.dumps(self.responses.pop(0)))
+
+
+@pytest.fixture
+def cache():
+    llm_cache.memory.clear()
+    yield llm_cache
+    llm_cache.memory.clear()
+
+
+def _user(name):
+    user = User(username=name, email=f'{name}@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _generator(user, responses):
+    client = SimpleNamespace(models=FakeModels(responses))
+    return QuestionGenerator(client, user_id=user.id), client.models
+
+
+def test_role_questions_are_shared_through_the_cache_until_the_user_has_seen_them(app, cache):
+    first, second = _user('first'), _user('second')
+    db.session.add(InterviewSession(user_id=second.id, mode='role', difficulty='beginner', status='completed',
+                                    questions=json.dumps({'hr_questions': ["Why do you want to work here?"]})))
+    db.session.commit()
+
+    generator, models = _generator(first, [ROLE_SET])
+    assert generator.generate_role_based_questions('Data Engineer', 'beginner') == ROLE_SET
+    db.session.add(InterviewSession(user_id=first.id, mode='role', difficulty='beginner', status='completed',
+                                    questions=json.dumps(ROLE_SET)))
+    db.session.commit()
+
+    # A returning user who hasn't seen the cached set gets it without a Gemini call
+    generator, models = _generator(second, [])
+    assert generator.generate_role_based_questions('Data Engineer', 'beginner') == ROLE_SET
+    assert models.prompts == []
+
+    # The user who was asked the cached set gets a fresh set generated with the avoid list
+    generator, models = _generator(first, [FRESH_SET])
+    assert generator.generate_role_based_questions('Data Engineer', 'beginner') == FRESH_SET
+    assert len(models.prompts) == 1
+    assert ROLE_SET['hr_questions'][0] in models.prompts[0]
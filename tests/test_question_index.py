@@ -0,0 +1,91 @@
+import json
+
+from models import InterviewSession, User, db
+
+import question_index
+from question_index import QuestionIndex, user_group
+
+
+def _session(user, questions, status='completed'):
+    session = InterviewSession(user_id=user.id, mode='role', difficulty='beginner', status=status,
+                               questions=json.dumps(questions))
+    db.session.add(session)
+    db.session.commit()
+    return session
+
+
+def test_sync_user_reads_only_new_and_active_sessions(app):
+    user = User(username='candidate', email='candidate@example.com')
+    db.session.add(user)
+    db.session.commit()
+    for n in range(5):
+        _session(user, {'hr_questions': [f"Tell me about project number {n} and its outcome."]})
+    active = _session(user, {}, status='active')
+
+    index = QuestionIndex()
+    question_index.sync_user(index, user.id)
+    assert len(index.group_texts(user_group(user.id))) == 5
+    assert index.sync_point(user.id) == (active.id, [active.id])
+
+    # The streamed session gains a question; a new session arrives
+    active.questions = json.dumps({'technical_questions': ["How do you profile a slow SQL query?"]})
+    active.status = 'completed'
+    newest = _session(user, {'cultural_questions': ["How do you handle unclear requirements?"]})
+    db.session.commit()
+
+    recorded = []
+    record_session = index.record_session
+    index.record_session = lambda user_id, session_id, *args: (
+        recorded.append(session_id), record_session(user_id, session_id, *args)
+    )
+    question_index.sync_user(index, user.id)
+
+    # The five finished sessions are below the high-water mark and not re-read
+    assert sorted(recorded) == [active.id, newest.id]
+    texts = index.group_texts(user_group(user.id))
+    assert texts[-2:] == ["How do you profile a slow SQL query?", "How do you handle unclear requirements?"]
+    assert index.sync_point(user.id) == (newest.id, [])
+
+
+def test_similar_narrowed_to_a_group_ignores_matches_elsewhere():
+    index = QuestionIndex()
+    index.add(["How would you design a rate limiter for a public API?"], ('pool', 'backend', 'beginner', 'technical'))
+    index.add(["How would you design a rate limiter for a public web API?"], user_group(1))
+
+    text = "How would you design a rate limiter for a public API service?"
+    assert len(index.similar(text)) == 2
+    assert [match for match, _ in index.similar(text, group=user_group(1))] == [
+        "How would you design a rate limiter for a public web API?"
+    ]
+    assert index.similar(text, group=user_group(2)) == []
+
+
+def test_streamed_questions_sync_the_users_history_once(app, monkeypatch):
+    from types import SimpleNamespace
+    from question_generator import QuestionGenerator
+
+    user = User(username='streamer', email='streamer@example.com')
+    db.session.add(user)
+    db.session.commit()
+    _session(user, {'hr_questions': ["Tell me about a time you missed a deadline."]})
+    syncs = []
+    sync_user = question_index.sync_user
+    monkeypatch.setattr(question_index, 'sync_user', lambda index, user_id: (syncs.append(user_id), sync_user(index, user_id)))
+
+    lines = [json.dumps({'category': 'hr_questions', 'question': q}) + '\n' for q in (
+        "Tell me about a time you missed a deadline.",
+        "Describe a disagreement with a manager and how it ended.",
+        "How do you prioritise when everything is urgent?",
+    )]
+    client = SimpleNamespace(models=SimpleNamespace(
+        generate_content_stream=lambda model, contents, config=None: (SimpleNamespace(text=line) for line in lines)
+    ))
+    streamed = list(QuestionGenerator(client, user_id=user.id).stream_questions(
+        "Role: Support Engineer", {'hr_questions': "three HR questions"}, 'beginner'
+    ))
+
+    assert [q for _, q in streamed] == [
+        "Describe a disagreement with a manager and how it ended.",
+        "How do you prioritise when everything is urgent?",
+    ]
+    assert syncs == [user.id]
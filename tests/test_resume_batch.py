@@ -0,0 +1,117 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+import llm_batch
+import resume_batch
+from llm_batch import LLMBatch
+from resume_batch import BatchScreening, ResumeSource, load_checkpoint
+
+
+def _pdf(text):
+    """A one-page PDF showing `text`"""
+    stream = f'BT /F1 12 Tf 50 700 Td ({text}) Tj ET'.encode('latin-1')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    ]
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+@pytest.fixture
+def responder(monkeypatch):
+    """Offline batch backend; returns the prompts it has answered"""
+    prompts = []
+
+    def respond(model, contents, config):
+        prompts.append(contents)
+        return json.dumps({'summary': 'Checked offline', 'experience_level': 'Mid-level'})
+
+    monkeypatch.setattr(llm_batch, 'BATCH_BACKEND', 'local')
+    monkeypatch.setattr(llm_batch, '_local_client', None)
+    monkeypatch.setattr(llm_batch, 'POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(llm_batch, 'MAX_POLL_INTERVAL', 0.01)
+    llm_batch.set_local_responder(respond)
+    return prompts
+
+
+def test_checkpoint_drops_a_partial_last_record(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    output.write_text(
+        json.dumps({'file': 'a.pdf', 'sha256': '1', 'status': 'failed', 'error': 'x'}) + '\n'
+        + json.dumps({'file': 'a.pdf', 'sha256': '1', 'status': 'completed', 'analysis': {}}) + '\n'
+        + '{"file": "b.pdf", "sha25'
+    )
+
+    records = load_checkpoint(str(output))
+
+    assert set(records) == {'a.pdf'} and records['a.pdf']['status'] == 'completed'
+    assert output.read_text().endswith('}\n')
+    assert len(output.read_text().splitlines()) == 2
+
+
+def test_llm_batch_run_resumes_without_reparsing_or_resubmitting(tmp_path, responder):
+    resumes = tmp_path / 'resumes'
+    resumes.mkdir()
+    (resumes / 'a.pdf').write_bytes(_pdf('Python developer with Docker experience'))
+    (resumes / 'b.pdf').write_bytes(_pdf('Java engineer who knows SQL'))
+    output = tmp_path / 'results.jsonl'
+
+    # A run that crashed while a.pdf's extraction job was in flight: the job
+    # carries a parse result the PDF itself would not produce
+    with ResumeSource(str(resumes)) as source:
+        a = next(r for r in source.files() if r.name == 'a.pdf')
+    parsed = {'text': 'Checkpointed resume text', 'technical_skills': [], 'soft_skills': [],
+              'projects': [], 'parse_seconds': 0.5}
+    batch = LLMBatch(display_name='resume-screening')
+    batch.add(0, f'Extract: {parsed["text"]}', parse=json.loads)
+    job, = batch.submit()
+    with open(output, 'w') as f:
+        f.write(json.dumps({'file': 'a.pdf', 'sha256': a.sha256, 'status': 'parsed', 'parsed': parsed}) + '\n')
+        f.write(json.dumps({'file': 'a.pdf', 'sha256': a.sha256, 'status': 'submitted', 'job': job, 'index': 0}) + '\n')
+
+    records = {r['file']: r for r in BatchScreening(str(resumes), str(output), processes=1, llm_batch=True)}
+
+    assert all(r['status'] == 'completed' and r['analysis']['llm_enriched'] for r in records.values())
+    assert records['a.pdf']['parse_seconds'] == 0.5
+    # a.pdf was answered by the job it was already submitted in; only b.pdf went out again
+    assert len(responder) == 2
+    assert 'Checkpointed resume text' in responder[0] and 'Java engineer' in responder[1]
+    statuses = [json.loads(line)['status'] for line in output.read_text().splitlines()]
+    assert statuses == ['parsed', 'submitted', 'parsed', 'submitted', 'completed', 'completed']
+
+    # Nothing is left to do on a second restart
+    screening = BatchScreening(str(resumes), str(output), processes=1, llm_batch=True)
+    assert list(screening) == [] and screening.skipped == 2
+
+
+def test_archive_extraction_stops_at_the_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(resume_batch, 'MAX_FILE_BYTES', 1000)
+    archive = tmp_path / 'resumes.zip'
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('small.pdf', _pdf('Short resume'))
+        z.writestr('large.pdf', b'%PDF-1.4\n' + b'0' * 100000)
+
+    with zipfile.ZipFile(archive) as z:
+        # Whatever the header claims, only the bytes written count
+        assert not resume_batch._extract_bounded(z, z.getinfo('large.pdf'), str(tmp_path / 'large.pdf'))
+    assert not (tmp_path / 'large.pdf').exists()
+
+    with ResumeSource(str(archive)) as source:
+        assert [f.name for f in source.files()] == ['small.pdf']
+        assert source.rejected == [{'file': 'large.pdf', 'error': 'File too large'}]
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+
+from skill_matcher import SkillMatcher
+
+TERMS = ['java', 'javascript', 'c', 'c++', 'c#', 'spring', 'spring boot', 'node.js', 'go', '.net', 'sql']
+
+
+def _regex_matches(terms, text):
+    """Reference semantics: \\b-bounded search for each term on its own"""
+    found = set()
+    for term in terms:
+        pattern = (r'\b' if term[0].isalnum() else '') + re.escape(term) + (r'\b' if term[-1].isalnum() else '')
+        found.update((term, m.start(), m.end()) for m in re.finditer(pattern, text.lower()))
+    return found
+
+
+def test_word_boundaries_and_punctuated_terms():
+    matcher = SkillMatcher((term, None) for term in TERMS)
+    text = "Java and JavaScript, C++/C# with Spring Boot on Node.js and .NET; MySQL, Golang"
+
+    terms = [m.term for m in matcher.find_all(text)]
+
+    assert terms == ['java', 'javascript', 'c', 'c++', 'c', 'c#', 'spring', 'spring boot', 'node.js', '.net']
+    assert 'sql' not in terms and 'go' not in terms
+
+
+@pytest.mark.parametrize('text', [
+    "Built services in Go, Java and SQL; led a C++ port of a C library.",
+    "spring-boot, springboot, Spring Boot and SPRING.",
+    "c c c++ c# .net node.js javascript java",
+])
+def test_matches_agree_with_per_term_regex_search(text):
+    matcher = SkillMatcher((term, None) for term in TERMS)
+
+    found = {(m.term, m.start, m.end) for m in matcher.find_all(text)}
+
+    assert found == _regex_matches(TERMS, text)
+
+
+def test_find_unique_keeps_first_occurrence_in_registration_order():
+    aliases = {'nodejs': 'Node.js', 'node.js': 'Node.js', 'python': 'Python'}
+    matcher = SkillMatcher(aliases.items())
+
+    unique = matcher.find_unique("python, nodejs and later node.js again", key=lambda m: m.payload)
+
+    assert [(m.term, m.payload) for m in unique] == [('nodejs', 'Node.js'), ('python', 'Python')]
+    assert unique[0].start == len("python, ")
+
+
+def test_duplicate_terms_keep_every_payload_and_empty_matcher_finds_nothing():
+    matcher = SkillMatcher([('react', 'frontend'), ('React', 'library')])
+    assert [m.payload for m in matcher.find_all("React")] == ['frontend', 'library']
+    assert SkillMatcher([]).find_all("anything at all") == []
@@ -33,10 +33,13 @@ except Exception as e:
 print("\n2. Checking Resume Analyzer...")
 try:
     from resume_analyzer import ResumeAnalyzer
+    from skill_taxonomy import get_taxonomy
     analyzer = ResumeAnalyzer()
+    taxonomy = get_taxonomy()
     print("   ✅ Resume Analyzer imported successfully")
-    print(f"   - Can detect {sum(len(v) for v in analyzer.TECHNICAL_SKILLS.values())} technical skills")
-    print(f"   - Can detect {len(analyzer.SOFT_SKILLS)} soft skills")
+    print(f"   - Skill taxonomy version {taxonomy.version}")
+    print(f"   - Can detect {taxonomy.technical_skill_count} technical skills")
+    print(f"   - Can detect {len(taxonomy.soft_skills)} soft skills")
 except Exception as e:
     print(f"   ❌ Error loading Resume Analyzer: {e}")
 